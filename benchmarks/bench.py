@@ -0,0 +1,483 @@
+"""
+Offline benchmarks for yahoo_fantasy_sports.
+
+Every scenario runs against a local fake Yahoo server (see
+``yahoo_fantasy_sports.testing``) serving fixtures shaped like recorded Yahoo
+responses, so no OAuth credentials or network access are needed.
+
+Run all scenarios and save the results::
+
+    $ python benchmarks/bench.py --output before.json
+
+Inject 20ms of latency and 1% of server errors::
+
+    $ python benchmarks/bench.py --latency 0.02 --error-rate 0.01
+
+Compare two runs, exiting with 1 if anything got slower by more than 10%::
+
+    $ python benchmarks/bench.py --compare before.json after.json
+"""
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from yahoo_fantasy_sports import GamesFactory  # noqa: E402
+from yahoo_fantasy_sports.draft import DraftTracker  # noqa: E402
+from yahoo_fantasy_sports.game import Game, Games  # noqa: E402
+from yahoo_fantasy_sports.instrumentation import (  # noqa: E402
+    MetricsAggregator, active)
+from yahoo_fantasy_sports.normalize import normalize  # noqa: E402
+from yahoo_fantasy_sports.planner import QueryPlanner  # noqa: E402
+from yahoo_fantasy_sports.testing import (  # noqa: E402
+    FakeYahoo, FakeYahooServer, GAMES, sample_fixtures, start_draft)
+from yahoo_fantasy_sports.transport import (  # noqa: E402
+    HttpxTransport, MemoryTransport, RequestsTransport)
+from yahoo_fantasy_sports.utils import base_url, yfs_request  # noqa: E402
+
+SCENARIOS = OrderedDict()
+
+GAME_KEYS = [game[1] for game in GAMES]
+
+
+def scenario(name):
+    """
+    Registers a scenario. The decorated function receives the fake and an
+    OAuth stand-in, does any setup and returns the operation to measure.
+    """
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+@scenario('games_factory_game')
+def games_factory_game(fake, oauth):
+    factory = GamesFactory(oauth)
+    return lambda: factory('nfl')
+
+
+@scenario('games_factory_games')
+def games_factory_games(fake, oauth):
+    factory = GamesFactory(oauth)
+    return lambda: factory(*GAME_KEYS)
+
+
+@scenario('game_refresh')
+def game_refresh(fake, oauth):
+    game = GamesFactory(oauth)('nfl')
+    return game.refresh
+
+
+@scenario('games_refresh')
+def games_refresh(fake, oauth):
+    games = GamesFactory(oauth)(*GAME_KEYS)
+    return games.refresh
+
+
+@scenario('games_from_snapshot')
+def games_from_snapshot(fake, oauth):
+    data = GamesFactory(oauth)(*GAME_KEYS).snapshot()
+    return lambda: Games.from_snapshot(oauth, data)
+
+
+@scenario('games_filter')
+def games_filter(fake, oauth):
+    games = GamesFactory(oauth)(*GAME_KEYS)
+    return lambda: games.filter(is_available=True, game_codes=['nfl', 'nba'])
+
+
+@scenario('planner_team_rosters')
+def planner_team_rosters(fake, oauth):
+    team_keys = sorted(fake.fixtures['team'])
+
+    def run():
+        planner = QueryPlanner(oauth)
+        for key in team_keys:
+            planner.add('team', key, sub='roster')
+            planner.add('team', key, sub='standings')
+        planner.execute()
+    return run
+
+
+@scenario('planner_player_stats')
+def planner_player_stats(fake, oauth):
+    player_keys = sorted(fake.fixtures['player'])[:100]
+
+    def run():
+        planner = QueryPlanner(oauth)
+        for key in player_keys:
+            planner.add('player', key, sub='stats;type=week;week=2')
+        planner.execute()
+    return run
+
+
+def _large_game_response(fake, scale=50):
+    """
+    Returns the NFL game response, merged as the planner hands it to
+    ``Game``, with ``scale`` times more weeks, stats and roster positions.
+    """
+    status, body = fake.handle(
+        '/game/nfl;out=game_weeks,stat_categories,position_types,'
+        'roster_positions')
+    game = body['fantasy_content']['game']
+    subs = {}
+    for part in game[1:]:
+        subs.update(copy.deepcopy(part))
+
+    weeks = subs['game_weeks']
+    count = weeks.pop('count')
+    for number in range(count * scale):
+        weeks[str(number)] = weeks[str(number % count)]
+    weeks['count'] = count * scale
+
+    stats = subs['stat_categories']['stats']
+    subs['stat_categories']['stats'] = [
+        {'stat': dict(s['stat'], stat_id=i * 1000 + s['stat']['stat_id'])}
+        for i in range(scale) for s in stats]
+    subs['roster_positions'] = [
+        {'roster_position': dict(p['roster_position'],
+                                 abbreviation='{0}{1}'.format(
+                                     p['roster_position']['abbreviation'],
+                                     i))}
+        for i in range(scale) for p in subs['roster_positions']]
+
+    return {'fantasy_content': {'game': [game[0], subs]}}
+
+
+def _legacy_sections(response):
+    # per-section walkers copying a few fields, as ``Game`` once did, kept
+    # as a baseline
+    game = response['fantasy_content']['game']
+    meta = dict(game[0])
+
+    game_weeks = {}
+    for number, week in game[1]['game_weeks'].items():
+        if number == 'count':
+            continue
+        game_weeks[number] = {'start': week['game_week']['start'],
+                              'end': week['game_week']['end']}
+
+    stats = {}
+    for stat in game[1]['stat_categories']['stats']:
+        if 'position_types' in stat['stat']:
+            stats[stat['stat']['stat_id']] = {
+                'sort_order': stat['stat']['sort_order'],
+                'display_name': stat['stat']['display_name'],
+                'name': stat['stat']['name'],
+                'position_types': stat['stat']['position_types']
+            }
+        else:
+            stats[stat['stat']['stat_id']] = {
+                'sort_order': stat['stat']['sort_order'],
+                'display_name': stat['stat']['display_name'],
+                'name': stat['stat']['name']
+            }
+
+    position_types = {}
+    for position_type in game[1]['position_types']:
+        position_types[position_type['position_type']['type']] = \
+            position_type['position_type']['display_name']
+
+    roster_positions = {}
+    for roster_position in game[1]['roster_positions']:
+        rp = roster_position['roster_position']
+        if 'position_type' in rp:
+            roster_positions[rp['abbreviation']] = {
+                'position': rp['position'],
+                'display_name': rp['display_name'],
+                'position_type': rp['position_type']
+            }
+        else:
+            roster_positions[rp['abbreviation']] = {
+                'position': rp['position'],
+                'display_name': rp['display_name'],
+            }
+
+    return meta, game_weeks, stats, position_types, roster_positions
+
+
+@scenario('game_sections_legacy')
+def game_sections_legacy(fake, oauth):
+    response = _large_game_response(fake)
+    return lambda: _legacy_sections(response)
+
+
+@scenario('game_sections_refresh')
+def game_sections_refresh(fake, oauth):
+    # what ``Game`` runs: the direct section walkers and the indexes
+    response = _large_game_response(fake)
+    game = Game.__new__(Game)
+    return lambda: game._refresh(response)
+
+
+@scenario('game_sections_normalize')
+def game_sections_normalize(fake, oauth):
+    # the generic walker alone, over the same response
+    response = _large_game_response(fake)
+    return lambda: normalize(response)
+
+
+@scenario('normalize_league_teams')
+def normalize_league_teams(fake, oauth):
+    status, body = fake.handle('/leagues;league_keys={0}/teams'.format(
+        ','.join(sorted(fake.fixtures['league']))))
+    return lambda: normalize(body)
+
+
+@scenario('draft_pick_latency')
+def draft_pick_latency(fake, oauth):
+    """
+    Time from a pick being made in one of the leagues to its subscriber
+    being notified by the next poll of every league.
+    """
+    league_keys = sorted(fake.fixtures['league'])
+    state = {}
+
+    def restart():
+        state['picks'] = [start_draft(fake.fixtures, key)
+                          for key in league_keys]
+        state['tracker'] = DraftTracker(oauth, league_keys)
+        state['tracker'].subscribe(notified.append)
+        state['turn'] = 0
+
+    notified = []
+    restart()
+
+    def run():
+        make = state['picks'][state['turn'] % len(league_keys)]
+        state['turn'] += 1
+        if not make():
+            # every draft is over, start over
+            while any(make() for make in state['picks']):
+                pass
+            restart()
+            return run()
+        del notified[:]
+        state['tracker'].poll()
+        assert len(notified) == 1
+    return run
+
+
+@scenario('request_no_hooks')
+def request_no_hooks(fake, oauth):
+    uri = base_url + '/game/nfl'
+    assert not active()
+    return lambda: yfs_request(oauth, uri)
+
+
+@scenario('request_metrics')
+def request_metrics(fake, oauth):
+    uri = base_url + '/game/nfl'
+    metrics = MetricsAggregator()
+
+    def run():
+        metrics.install()
+        try:
+            yfs_request(oauth, uri)
+        finally:
+            metrics.uninstall()
+    return run
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = int(round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def measure(name, fake, oauth, iterations):
+    """
+    Runs scenario ``name`` ``iterations`` times and returns its metrics.
+    """
+    # errors are only injected into the measured runs
+    error_rate, fake.error_rate = fake.error_rate, 0.0
+    op = SCENARIOS[name](fake, oauth)
+
+    # warm up once, then measure peak memory over a single run
+    tracemalloc.start()
+    op()
+    tracemalloc.reset_peak()
+    op()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    fake.error_rate = error_rate
+    fake.reset()
+    timings = []
+    errors = 0
+    started = default_timer()
+    for _ in range(iterations):
+        start = default_timer()
+        try:
+            op()
+        except Exception:
+            errors += 1
+        timings.append(default_timer() - start)
+    elapsed = default_timer() - started
+
+    return OrderedDict([
+        ('iterations', iterations),
+        ('errors', errors),
+        ('requests_per_op', fake.requests / iterations),
+        ('wall_total_s', elapsed),
+        ('wall_mean_s', elapsed / iterations),
+        ('wall_p50_s', _percentile(timings, 50)),
+        ('wall_p95_s', _percentile(timings, 95)),
+        ('throughput_ops_s', iterations / elapsed if elapsed else 0.0),
+        ('memory_peak_bytes', peak),
+    ])
+
+
+def run(args):
+    fixtures = sample_fixtures(leagues=args.leagues)
+    fake = FakeYahoo(fixtures, latency=args.latency, jitter=args.jitter,
+                     error_rate=args.error_rate, seed=args.seed)
+    names = args.scenario or list(SCENARIOS)
+
+    results = OrderedDict()
+    if args.in_memory:
+        oauth = fake.oauth()
+        transport = None
+        if args.backend != 'session':
+            transport = MemoryTransport(fake.handle).install()
+        try:
+            for name in names:
+                results[name] = measure(name, fake, oauth, args.iterations)
+        finally:
+            if transport is not None:
+                transport.uninstall()
+    else:
+        with FakeYahooServer(fake) as server:
+            oauth = server.oauth()
+            transport = None
+            if args.backend == 'requests':
+                transport = RequestsTransport(base_url=server.url)
+            elif args.backend == 'httpx':
+                # the fake server only speaks HTTP/1.1
+                transport = HttpxTransport(base_url=server.url, http2=False)
+            if transport is not None:
+                transport.install()
+            try:
+                for name in names:
+                    results[name] = measure(name, fake, oauth,
+                                            args.iterations)
+            finally:
+                if transport is not None:
+                    transport.uninstall()
+
+    return OrderedDict([
+        ('meta', OrderedDict([
+            ('label', args.label),
+            ('created', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())),
+            ('python', platform.python_version()),
+            ('implementation', platform.python_implementation()),
+            ('transport', 'memory' if args.in_memory else 'http'),
+            ('backend', args.backend),
+            ('latency_s', args.latency),
+            ('jitter_s', args.jitter),
+            ('error_rate', args.error_rate),
+        ])),
+        ('results', results),
+    ])
+
+
+COMPARED = ('wall_mean_s', 'requests_per_op', 'memory_peak_bytes')
+
+
+def compare(base, new, threshold):
+    """
+    Prints the change of every compared metric between two result files.
+
+    :returns: Names of the metrics that regressed by more than ``threshold``.
+    :rtype: list
+    """
+    regressions = []
+    print('{0:<28}{1:<20}{2:>14}{3:>14}{4:>9}'.format(
+        'scenario', 'metric', 'base', 'new', 'change'))
+
+    for name, result in new['results'].items():
+        if name not in base['results']:
+            continue
+        for metric in COMPARED:
+            old_value = base['results'][name][metric]
+            new_value = result[metric]
+            change = (new_value - old_value) / old_value if old_value else 0.0
+            flag = ''
+            if change > threshold:
+                flag = ' !'
+                regressions.append('{0}.{1}'.format(name, metric))
+            print('{0:<28}{1:<20}{2:>14.6g}{3:>14.6g}{4:>+8.1%}{5}'.format(
+                name, metric, old_value, new_value, change, flag))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('scenario', nargs='*',
+                        help='scenarios to run (default: all of them)')
+    parser.add_argument('-n', '--iterations', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='maximum random seconds added to latency')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests failing with a 500')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--leagues', type=int, default=4,
+                        help='number of leagues in the fixtures')
+    parser.add_argument('--in-memory', action='store_true',
+                        help='skip HTTP and call the fake directly')
+    parser.add_argument('--backend', default='session',
+                        choices=('session', 'requests', 'httpx'),
+                        help='send requests with the OAuth session or a '
+                             'transport backend (the in-memory backend '
+                             'with --in-memory)')
+    parser.add_argument('--label', default=None,
+                        help='version label stored with the results')
+    parser.add_argument('-o', '--output', help='write results to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'),
+                        help='compare two result files')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative change reported as a regression')
+    parser.add_argument('--list', action='store_true',
+                        help='list the available scenarios')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('\n'.join(SCENARIOS))
+        return 0
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        return 1 if compare(base, new, args.threshold) else 0
+
+    unknown = set(args.scenario) - set(SCENARIOS)
+    if unknown:
+        parser.error('unknown scenarios: {0}'.format(', '.join(unknown)))
+
+    results = run(args)
+    data = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(data + '\n')
+    print(data)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,388 @@
+"""
+Load test of yahoo_fantasy_sports against a local fake Yahoo server.
+
+Simulated users each loop over a weighted mix of actions on the public API
+for a fixed duration, waiting a random think time between two actions, so
+that peak traffic can be reproduced without waiting for Sunday.
+
+Fifty users for a minute, with 30ms of upstream latency and a shared cache::
+
+    $ python benchmarks/load.py --users 50 --duration 60 --latency 0.03 \\
+        --cache
+
+A league heavy mix behind a client pool::
+
+    $ python benchmarks/load.py --pool \\
+        --mix league_scoreboard=5,team_roster=3,game_refresh=1
+
+Reported figures are the throughput of actions, their latency percentiles
+overall and per action, the share of library requests answered by the cache
+and the upstream amplification, i.e. the requests received by the fake per
+action.
+"""
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from timeit import default_timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from yahoo_fantasy_sports import GamesFactory  # noqa: E402
+from yahoo_fantasy_sports.cache import SQLiteCache  # noqa: E402
+from yahoo_fantasy_sports.draft import DraftTracker  # noqa: E402
+from yahoo_fantasy_sports.instrumentation import (  # noqa: E402
+    add_hook, remove_hook)
+from yahoo_fantasy_sports.planner import QueryPlanner  # noqa: E402
+from yahoo_fantasy_sports.pool import ClientPool  # noqa: E402
+from yahoo_fantasy_sports.testing import (  # noqa: E402
+    FakeYahoo, FakeYahooServer, GAMES, sample_fixtures)
+from yahoo_fantasy_sports.transport import MemoryTransport  # noqa: E402
+
+ACTIONS = OrderedDict()
+
+GAME_KEYS = [game[1] for game in GAMES]
+
+DEFAULT_MIX = ('games_factory=2,games_factory_all=1,game_refresh=2,'
+               'games_filter=3,league_scoreboard=3,team_roster=3,'
+               'draft_poll=1')
+
+
+def action(name):
+    """
+    Registers an action. The decorated function receives the user and
+    performs the action once.
+    """
+    def register(func):
+        ACTIONS[name] = func
+        return func
+    return register
+
+
+class User(object):
+    """
+    State of a simulated user: their OAuth stand-in, their league and team,
+    and the games they loaded.
+    """
+
+    def __init__(self, number, oauth, fixtures, seed):
+        self.number = number
+        self.oauth = oauth
+        self.random = random.Random(seed)
+        league_keys = sorted(fixtures['league'])
+        self.league_key = league_keys[number % len(league_keys)]
+        team_keys = fixtures['league'][self.league_key]['children']['teams']
+        self.team_key = team_keys[number % len(team_keys)]
+        self.weeks = len([s for s in fixtures['league'][self.league_key]
+                          ['subs'] if s.startswith('scoreboard;')])
+        self.game = None
+        self.games = None
+        self.tracker = None
+
+
+@action('games_factory')
+def games_factory(user):
+    user.game = GamesFactory(user.oauth)('nfl')
+
+
+@action('games_factory_all')
+def games_factory_all(user):
+    user.games = GamesFactory(user.oauth)(*GAME_KEYS)
+
+
+@action('game_refresh')
+def game_refresh(user):
+    if user.game is None:
+        return games_factory(user)
+    user.game.refresh()
+
+
+@action('games_filter')
+def games_filter(user):
+    if user.games is None:
+        games_factory_all(user)
+    user.games.filter(is_available=True, game_codes=['nfl', 'nba'])
+
+
+@action('league_scoreboard')
+def league_scoreboard(user):
+    # leagues are read through the planner until they get a resource
+    planner = QueryPlanner(user.oauth)
+    planner.add('league', user.league_key, sub='scoreboard;week={0}'.format(
+        user.random.randint(1, user.weeks)))
+    planner.execute()
+
+
+@action('team_roster')
+def team_roster(user):
+    planner = QueryPlanner(user.oauth)
+    planner.add('team', user.team_key, sub='roster')
+    planner.add('team', user.team_key, sub='standings')
+    planner.execute()
+
+
+@action('draft_poll')
+def draft_poll(user):
+    if user.tracker is None:
+        user.tracker = DraftTracker(user.oauth, [user.league_key])
+    user.tracker.poll()
+
+
+def parse_mix(text):
+    """
+    Parses ``'action=weight,...'`` into ``(names, weights)``.
+    """
+    names = []
+    weights = []
+    for part in text.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in ACTIONS:
+            raise ValueError("unknown action '{0}'".format(name))
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = int(round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+class Recorder(object):
+    """
+    Collects the latency of every action and counts the library requests by
+    cache outcome.
+    """
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.requests = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def action(self, name, elapsed, error):
+        with self._lock:
+            self.timings[name].append(elapsed)
+            if error:
+                self.errors[name] += 1
+
+    def post_request(self, event):
+        if event.cache == 'revalidate':
+            # sent in the background, not on behalf of a user
+            return
+        with self._lock:
+            self.requests[event.cache or 'none'] += 1
+
+
+def run_user(user, names, weights, think_time, deadline, recorder):
+    while time.time() < deadline:
+        name = _choice(user.random, names, weights)
+        start = default_timer()
+        error = False
+        try:
+            ACTIONS[name](user)
+        except Exception:
+            error = True
+        recorder.action(name, default_timer() - start, error)
+        if think_time:
+            time.sleep(min(user.random.expovariate(1 / think_time),
+                           max(deadline - time.time(), 0)))
+
+
+def _choice(rng, names, weights):
+    point = rng.uniform(0, sum(weights))
+    for name, weight in zip(names, weights):
+        point -= weight
+        if point <= 0:
+            return name
+    return names[-1]
+
+
+def _summary(timings, errors, elapsed):
+    return OrderedDict([
+        ('actions', len(timings)),
+        ('errors', errors),
+        ('throughput_ops_s', len(timings) / elapsed if elapsed else 0.0),
+        ('p50_s', percentile(timings, 50)),
+        ('p95_s', percentile(timings, 95)),
+        ('p99_s', percentile(timings, 99)),
+    ])
+
+
+def run(args):
+    fixtures = sample_fixtures(leagues=args.leagues, weeks=args.weeks)
+    fake = FakeYahoo(fixtures, latency=args.latency, jitter=args.jitter,
+                     error_rate=args.error_rate, seed=args.seed)
+    names, weights = parse_mix(args.mix)
+    recorder = Recorder()
+    add_hook(post=recorder.post_request)
+
+    directory = tempfile.mkdtemp()
+    installed = []
+    server = None
+    try:
+        if args.in_memory:
+            installed.append(MemoryTransport(fake.handle).install())
+        else:
+            server = FakeYahooServer(fake)
+            server.start()
+        pool = None
+        if args.pool:
+            pool = ClientPool(max_connections=args.max_connections)
+            installed.append(pool.install())
+        if args.cache:
+            installed.append(SQLiteCache(
+                os.path.join(directory, 'cache.sqlite'),
+                stale_ttl=args.stale_ttl).install())
+
+        users = []
+        for number in range(args.users):
+            oauth = fake.oauth() if server is None else server.oauth()
+            if pool is not None:
+                pool.add(number, oauth)
+            users.append(User(number, oauth, fixtures, args.seed + number))
+
+        fake.reset()
+        started = time.time()
+        deadline = started + args.duration
+        threads = []
+        for user in users:
+            thread = threading.Thread(target=run_user, args=(
+                user, names, weights, args.think_time, deadline, recorder))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+            if args.ramp_up:
+                time.sleep(args.ramp_up / args.users)
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - started
+        shared = pool.shared if pool is not None else 0
+    finally:
+        remove_hook(post=recorder.post_request)
+        for component in reversed(installed):
+            component.uninstall()
+        if server is not None:
+            server.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    timings = [t for values in recorder.timings.values() for t in values]
+    total = _summary(timings, sum(recorder.errors.values()), elapsed)
+    requests = sum(recorder.requests.values())
+    cached = recorder.requests['hit'] + recorder.requests['stale']
+    total['library_requests'] = requests
+    total['cache_hit_rate'] = cached / requests if requests else 0.0
+    total['pool_shared'] = shared
+    total['upstream_requests'] = fake.requests
+    total['amplification'] = fake.requests / len(timings) if timings else 0.0
+
+    return OrderedDict([
+        ('meta', OrderedDict([
+            ('created', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())),
+            ('users', args.users),
+            ('duration_s', args.duration),
+            ('think_time_s', args.think_time),
+            ('mix', OrderedDict(zip(names, weights))),
+            ('transport', 'memory' if args.in_memory else 'http'),
+            ('cache', args.cache),
+            ('pool', args.pool),
+            ('latency_s', args.latency),
+            ('error_rate', args.error_rate),
+        ])),
+        ('total', total),
+        ('actions', OrderedDict(
+            (name, _summary(recorder.timings[name], recorder.errors[name],
+                            elapsed))
+            for name in names)),
+        ('requests_by_cache', dict(recorder.requests)),
+    ])
+
+
+def report(result):
+    total = result['total']
+    print('{0} users, {1:.0f}s: {2} actions, {3:.1f} ops/s, {4} errors'.format(
+        result['meta']['users'], result['meta']['duration_s'],
+        total['actions'], total['throughput_ops_s'], total['errors']))
+    print('latency p50 {0:.1f}ms  p95 {1:.1f}ms  p99 {2:.1f}ms'.format(
+        total['p50_s'] * 1000, total['p95_s'] * 1000, total['p99_s'] * 1000))
+    print('cache hit rate {0:.1%}, pool shared {1}, upstream {2} requests, '
+          '{3:.2f} per action'.format(
+              total['cache_hit_rate'], total['pool_shared'],
+              total['upstream_requests'], total['amplification']))
+    print()
+    print('{0:<20}{1:>9}{2:>9}{3:>10}{4:>10}{5:>10}'.format(
+        'action', 'count', 'errors', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for name, summary in result['actions'].items():
+        print('{0:<20}{1:>9}{2:>9}{3:>10.1f}{4:>10.1f}{5:>10.1f}'.format(
+            name, summary['actions'], summary['errors'],
+            summary['p50_s'] * 1000, summary['p95_s'] * 1000,
+            summary['p99_s'] * 1000))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-u', '--users', type=int, default=20)
+    parser.add_argument('-d', '--duration', type=float, default=10.0,
+                        help='seconds the users keep acting')
+    parser.add_argument('--ramp-up', type=float, default=0.0,
+                        help='seconds over which users are started')
+    parser.add_argument('--think-time', type=float, default=0.1,
+                        help='mean seconds a user waits between two actions')
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help='weighted actions, e.g. game_refresh=2,'
+                             'team_roster=1 (default: %(default)s)')
+    parser.add_argument('--cache', action='store_true',
+                        help='install a SQLite response cache')
+    parser.add_argument('--stale-ttl', type=float, default=0,
+                        help='seconds the cache serves expired responses')
+    parser.add_argument('--pool', action='store_true',
+                        help='serve every user from a client pool')
+    parser.add_argument('--max-connections', type=int, default=10,
+                        help='connections of the client pool')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='maximum random seconds added to latency')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests failing with a 500')
+    parser.add_argument('--leagues', type=int, default=4,
+                        help='number of leagues in the fixtures')
+    parser.add_argument('--weeks', type=int, default=3,
+                        help='number of weeks in the fixtures')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--in-memory', action='store_true',
+                        help='skip HTTP and call the fake directly')
+    parser.add_argument('-o', '--output', help='write results to this file')
+    parser.add_argument('--list', action='store_true',
+                        help='list the available actions')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('\n'.join(ACTIONS))
+        return 0
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    result = run(args)
+    report(result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
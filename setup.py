@@ -42,5 +42,7 @@ setup(
   ],
   platforms=['Any'],
   license='MIT',
-  install_requires = required
+  install_requires = required,
+  extras_require = {'pyarrow': ['pyarrow'], 'http2': ['httpx[http2]'],
+                    'simulate': ['numpy']}
 )
@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from requests import HTTPError
+
+from yahoo_fantasy_sports.backfill import Backfill
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+
+def _rows(path, table):
+    with open(os.path.join(path, table + '.jsonl')) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.fake = FakeYahoo(sample_fixtures(leagues=2, teams=4, players=3))
+
+    def backfill(self, **kwargs):
+        kwargs.setdefault('weeks', [1, 2])
+        kwargs.setdefault('max_keys', 2)
+        kwargs.setdefault('retries', 0)
+        return Backfill(self.fake.oauth(), '348', self.path, **kwargs)
+
+    def test_run(self):
+        rows = self.backfill(workers=4).run()
+        self.assertEqual(rows, {'leagues': 2, 'teams': 8, 'rosters': 48,
+                                'player_stats': 480})
+
+        teams = _rows(self.path, 'teams')
+        self.assertEqual(set(t['league_key'] for t in teams),
+                         set(['348.l.1', '348.l.2']))
+        stats = _rows(self.path, 'player_stats')
+        self.assertEqual(set(s['week'] for s in stats), set([1, 2]))
+        self.assertEqual(len(set((s['player_key'], s['week'], s['stat_id'])
+                                 for s in stats)), 480)
+
+    def test_resume(self):
+        self.fake.errors = {'348.p.7,348.p.8': 401}
+        backfill = self.backfill(workers=1)
+        self.assertRaises(HTTPError, backfill.run)
+        self.assertEqual(backfill.completed, ['leagues', 'teams', 'rosters'])
+
+        first = self.fake.requests
+        self.fake.errors = {}
+        rows = self.backfill(workers=1).run()
+        self.assertEqual(rows['player_stats'], 480)
+        self.assertLess(self.fake.requests - first, first)
+
+        stats = _rows(self.path, 'player_stats')
+        self.assertEqual(len(stats), 480)
+        self.assertEqual(len(set((s['player_key'], s['week'], s['stat_id'])
+                                 for s in stats)), 480)
+
+    def test_other_game(self):
+        self.backfill(weeks=[1]).run()
+        self.assertRaises(Exception, Backfill(self.fake.oauth(), '353',
+                                              self.path).run)
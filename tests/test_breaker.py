@@ -0,0 +1,192 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from requests import HTTPError
+
+from yahoo_fantasy_sports import instrumentation, utils
+from yahoo_fantasy_sports.breaker import CircuitBreaker, CircuitOpen
+from yahoo_fantasy_sports.cache import SQLiteCache
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+from yahoo_fantasy_sports.utils import base_url, yfs_request
+
+GAME = base_url + '/game/nfl'
+LEAGUE = base_url + '/league/348.l.1'
+
+
+def _wait_for_revalidation():
+    for _ in range(200):
+        if not utils._revalidating:
+            return
+        time.sleep(0.01)
+    raise AssertionError("revalidation did not finish")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+        self.oauth = self.fake.oauth()
+        self.breaker = CircuitBreaker(failures=2, reset_timeout=60).install()
+        self.addCleanup(self.breaker.uninstall)
+
+    def test_opens_per_endpoint(self):
+        self.fake.errors['league'] = 503
+        for _ in range(2):
+            self.assertRaises(HTTPError, yfs_request, self.oauth, LEAGUE)
+        self.assertEqual(self.breaker.state('league'), 'open')
+
+        requests = self.fake.requests
+        self.assertRaises(CircuitOpen, yfs_request, self.oauth, LEAGUE)
+        self.assertEqual(self.fake.requests, requests)
+        self.assertIn('fantasy_content', yfs_request(self.oauth, GAME))
+        self.assertEqual(self.breaker.state('game'), 'closed')
+
+    def test_client_errors_do_not_count(self):
+        self.fake.errors['league'] = 404
+        for _ in range(3):
+            self.assertRaises(HTTPError, yfs_request, self.oauth, LEAGUE)
+        self.assertEqual(self.breaker.state('league'), 'closed')
+
+    def test_half_open(self):
+        self.fake.errors['league'] = 503
+        for _ in range(2):
+            self.assertRaises(HTTPError, yfs_request, self.oauth, LEAGUE)
+        self.breaker.reset_timeout = 0
+        self.assertEqual(self.breaker.state('league'), 'half-open')
+
+        # the probe fails and opens the circuit again
+        self.assertRaises(HTTPError, yfs_request, self.oauth, LEAGUE)
+        self.breaker.reset_timeout = 60
+        self.assertEqual(self.breaker.state('league'), 'open')
+
+        self.breaker.reset_timeout = 0
+        del self.fake.errors['league']
+        yfs_request(self.oauth, LEAGUE)
+        self.assertEqual(self.breaker.state('league'), 'closed')
+
+    def test_single_probe(self):
+        breaker = self.breaker
+        breaker.record(LEAGUE, 0.1, HTTPError(response=None))
+        breaker.record(LEAGUE, 0.1, HTTPError(response=None))
+        self.assertEqual(breaker.state('league'), 'closed')
+
+        breaker.latency = 1.0
+        breaker.record(LEAGUE, 2.0)
+        breaker.record(LEAGUE, 2.0)
+        breaker.reset_timeout = 0
+        breaker.acquire(LEAGUE)
+        self.assertRaises(CircuitOpen, breaker.acquire, LEAGUE)
+        breaker.record(LEAGUE, 0.1)
+        breaker.acquire(LEAGUE)
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+        self.oauth = self.fake.oauth()
+        self.cache = SQLiteCache(os.path.join(directory, 'cache.sqlite'),
+                                 public_ttl=0, stale_ttl=60).install()
+        self.addCleanup(self.cache.uninstall)
+
+    def test_stale_responses_are_revalidated(self):
+        self.assertNotIn('stale', yfs_request(self.oauth, GAME))
+        self.assertEqual(self.fake.requests, 1)
+
+        events = []
+        instrumentation.add_hook(post=events.append)
+        self.addCleanup(instrumentation.remove_hook, None, events.append)
+        response = yfs_request(self.oauth, GAME)
+        self.assertTrue(response['stale'])
+        self.assertEqual(response['fantasy_content']['game'][0]['code'],
+                         'nfl')
+        self.assertEqual(events[0].cache, 'stale')
+
+        _wait_for_revalidation()
+        self.assertEqual(self.fake.requests, 2)
+        self.assertEqual([e.cache for e in events], ['stale', 'revalidate'])
+        self.assertEqual(events[1].status, 200)
+
+    def test_stale_responses_are_not_network_samples(self):
+        yfs_request(self.oauth, GAME)
+        metrics = instrumentation.MetricsAggregator().install()
+        self.addCleanup(metrics.uninstall)
+        yfs_request(self.oauth, GAME)
+        _wait_for_revalidation()
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(
+            sorted(r['cache'] for r in snapshot['requests']),
+            ['revalidate', 'stale'])
+        # only the background request went over the network
+        self.assertEqual(snapshot['network_seconds']['game']['count'], 1)
+
+    def test_served_while_circuit_is_open(self):
+        yfs_request(self.oauth, GAME)
+        breaker = CircuitBreaker(failures=1, reset_timeout=60).install()
+        self.addCleanup(breaker.uninstall)
+        self.fake.errors['game'] = 503
+
+        self.assertTrue(yfs_request(self.oauth, GAME)['stale'])
+        _wait_for_revalidation()
+        self.assertEqual(breaker.state('game'), 'open')
+
+        self.assertTrue(yfs_request(self.oauth, GAME)['stale'])
+        _wait_for_revalidation()
+        self.assertEqual(self.fake.requests, 2)
+        self.assertRaises(CircuitOpen, yfs_request, self.oauth,
+                          GAME + '/game_weeks')
+
+    def test_no_revalidation_while_circuit_is_open(self):
+        yfs_request(self.oauth, GAME)
+        breaker = CircuitBreaker(failures=1, latency=1,
+                                 reset_timeout=60).install()
+        self.addCleanup(breaker.uninstall)
+        breaker.record(GAME, 2.0)
+
+        self.assertTrue(yfs_request(self.oauth, GAME)['stale'])
+        self.assertFalse(utils._revalidating)
+        self.assertEqual(self.fake.requests, 1)
+
+    def test_stale_window(self):
+        self.cache.stale_ttl = 0
+        yfs_request(self.oauth, GAME)
+        self.assertNotIn('stale', yfs_request(self.oauth, GAME))
+        self.assertEqual(self.fake.requests, 2)
+
+
+class TestDefaultCacheWhileCircuitIsOpen(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+        self.oauth = self.fake.oauth()
+        self.cache = SQLiteCache(
+            os.path.join(directory, 'cache.sqlite')).install()
+        self.addCleanup(self.cache.uninstall)
+        self.breaker = CircuitBreaker(failures=1, reset_timeout=60).install()
+        self.addCleanup(self.breaker.uninstall)
+
+    def test_expired_responses_are_served(self):
+        yfs_request(self.oauth, LEAGUE)
+        # expire the response, which is past the default stale_ttl of 0
+        self.cache._connection().execute('UPDATE responses SET expires = 0')
+        self.fake.errors['league'] = 503
+        self.assertRaises(HTTPError, yfs_request, self.oauth, LEAGUE)
+        self.assertEqual(self.breaker.state('league'), 'open')
+
+        response = yfs_request(self.oauth, LEAGUE)
+        self.assertTrue(response['stale'])
+        self.assertEqual(self.fake.requests, 2)
+        self.assertFalse(utils._revalidating)
+
+    def test_nothing_cached(self):
+        self.fake.errors['league'] = 503
+        self.assertRaises(HTTPError, yfs_request, self.oauth, LEAGUE)
+        self.assertRaises(CircuitOpen, yfs_request, self.oauth, LEAGUE)
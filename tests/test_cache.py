@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory, instrumentation
+from yahoo_fantasy_sports.cache import PUBLIC, SQLiteCache, cache_scope
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+from yahoo_fantasy_sports.utils import base_url, yfs_request
+
+LEAGUE = base_url + '/league/348.l.1'
+
+
+def _fetch_in_child(path, queue):
+    fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+    with SQLiteCache(path):
+        GamesFactory(fake.oauth())('nfl')
+    queue.put(fake.requests)
+
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'cache.sqlite')
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+        self.cache = SQLiteCache(self.path).install()
+        self.addCleanup(self.cache.uninstall)
+
+    def oauth(self, token):
+        oauth = self.fake.oauth()
+        oauth.access_token = token
+        return oauth
+
+    def test_scope(self):
+        oauth = self.oauth('alice')
+        self.assertEqual(cache_scope(oauth, base_url + '/game/nfl'), PUBLIC)
+        self.assertTrue(cache_scope(oauth, LEAGUE).startswith('user:'))
+        self.assertNotEqual(cache_scope(oauth, LEAGUE),
+                            cache_scope(self.oauth('bob'), LEAGUE))
+        self.assertTrue(cache_scope(
+            oauth, base_url + '/users;use_login=1/games').startswith('user:'))
+        self.assertIsNone(cache_scope(None, LEAGUE))
+
+    def test_nested_private_resources_are_not_public(self):
+        oauth = self.oauth('alice')
+        self.assertEqual(cache_scope(
+            oauth, base_url + '/games;game_keys=nfl;out=game_weeks,'
+            'stat_categories,position_types,roster_positions'), PUBLIC)
+        self.assertEqual(cache_scope(
+            oauth, base_url + '/game/348/stat_categories'), PUBLIC)
+        for uri in ('/game/348/leagues;league_keys=348.l.1',
+                    '/games;game_keys=348/leagues;league_keys=348.l.1/teams',
+                    '/game/348/players;start=0;count=25',
+                    '/game/348;out=leagues'):
+            self.assertTrue(cache_scope(oauth, base_url + uri)
+                            .startswith('user:'), uri)
+
+    def test_public_responses_are_shared(self):
+        GamesFactory(self.oauth('alice'))('nfl')
+        self.assertEqual(self.fake.requests, 2)
+
+        # another worker process opening the same database
+        other = SQLiteCache(self.path)
+        self.cache.uninstall()
+        other.install()
+        self.addCleanup(other.uninstall)
+
+        events = []
+        instrumentation.add_hook(post=events.append)
+        self.addCleanup(instrumentation.remove_hook, None, events.append)
+        game = GamesFactory(self.oauth('bob'))('nfl')
+        self.assertEqual(game.name, 'Football')
+        self.assertEqual(self.fake.requests, 2)
+        self.assertEqual([e.cache for e in events], ['hit', 'hit'])
+
+    def test_shared_across_processes(self):
+        queue = multiprocessing.Queue()
+        for _ in range(2):
+            child = multiprocessing.Process(target=_fetch_in_child,
+                                            args=(self.path, queue))
+            child.start()
+            child.join()
+        self.assertEqual([queue.get(), queue.get()], [2, 0])
+
+    def test_user_responses_are_isolated(self):
+        yfs_request(self.oauth('alice'), LEAGUE)
+        yfs_request(self.oauth('alice'), LEAGUE)
+        self.assertEqual(self.fake.requests, 1)
+        yfs_request(self.oauth('bob'), LEAGUE)
+        self.assertEqual(self.fake.requests, 2)
+
+    def test_ttl(self):
+        self.cache.ttl = 0
+        yfs_request(self.oauth('alice'), LEAGUE)
+        yfs_request(self.oauth('alice'), LEAGUE)
+        self.assertEqual(self.fake.requests, 2)
+
+    def test_errors_are_not_cached(self):
+        fake = FakeYahoo(sample_fixtures(), error_rate=1.0)
+        self.assertRaises(Exception, yfs_request, fake.oauth(),
+                          base_url + '/game/nfl')
+        self.assertIsNone(self.cache.get((PUBLIC, '/game/nfl')))
+
+    def test_size_cap(self):
+        self.cache.max_bytes = 2500
+        for key in range(10):
+            self.cache.set((PUBLIC, str(key)), b'x' * 1000)
+        self.assertIsNone(self.cache.get((PUBLIC, '7')))
+        self.assertEqual(self.cache.get((PUBLIC, '9')), b'x' * 1000)
+        self.assertEqual(self.cache.get((PUBLIC, '8')), b'x' * 1000)
+
+    def test_size_is_tracked(self):
+        def sizes():
+            db = self.cache._connection()
+            return (db.execute('SELECT size FROM usage').fetchone()[0],
+                    db.execute('SELECT SUM(size) FROM responses')
+                    .fetchone()[0] or 0)
+
+        self.cache.max_bytes = 2500
+        self.cache.set((PUBLIC, '1'), b'x' * 1000)
+        self.cache.set((PUBLIC, '1'), b'x' * 500)
+        self.assertEqual(sizes(), (500, 500))
+        for key in range(2, 6):
+            self.cache.set((PUBLIC, str(key)), b'x' * 1000)
+        self.assertEqual(sizes(), (2000, 2000))
+
+        # another worker opening the database keeps the same total
+        SQLiteCache(self.path)
+        self.assertEqual(sizes(), (2000, 2000))
+        self.cache.clear()
+        self.assertEqual(sizes(), (0, 0))
@@ -0,0 +1,64 @@
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory, changes
+from yahoo_fantasy_sports.changes import Added, Changed, Removed, diff
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+
+class TestDiff(unittest.TestCase):
+
+    def test_diff(self):
+        old = {'a': 1, 'b': {'c': [1, 2, 3]}, 'd': 'x'}
+        new = {'a': 1, 'b': {'c': [1, 5]}, 'e': 'y'}
+        self.assertEqual(sorted(diff(old, new), key=repr), sorted([
+            (Changed, ('b', 'c', 1), 2, 5),
+            (Removed, ('b', 'c', 2), 3, None),
+            (Removed, ('d',), 'x', None),
+            (Added, ('e',), None, 'y'),
+        ], key=repr))
+        self.assertEqual(list(diff(old, dict(old))), [])
+
+
+class TestGameChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.fixtures = sample_fixtures(teams=2, players=1)
+        self.fake = FakeYahoo(self.fixtures)
+        self.games = GamesFactory(self.fake.oauth())('nfl', 'nba')
+        self.game = self.games[348]
+        self.events = []
+        changes.subscribe(self.events.append, 'game')
+        self.addCleanup(changes.unsubscribe, self.events.append)
+
+    def test_no_changes(self):
+        self.game.refresh()
+        self.assertEqual(self.events, [])
+
+    def test_changes(self):
+        game = self.fixtures['game']['348']
+        game['meta']['is_registration_over'] = 1
+        weeks = game['subs']['game_weeks']
+        weeks['game_weeks']['0']['game_week']['end'] = '2015-09-17'
+
+        self.game.refresh()
+        events = dict((e.section, e) for e in self.events)
+        self.assertEqual(len(self.events), 2)
+        self.assertIsInstance(events['is_registration_over'], Changed)
+        self.assertEqual(events['is_registration_over'].new, 1)
+        self.assertEqual(events['game_weeks'].path, ('0', 'end'))
+        self.assertEqual(events['game_weeks'].old, '2015-09-16')
+        self.assertIs(events['game_weeks'].resource, self.game)
+
+    def test_games_refresh_and_filters(self):
+        available = []
+        changes.subscribe(available.append, sections=['is_available'])
+        self.addCleanup(changes.unsubscribe, available.append)
+
+        game = self.fixtures['game']['348']
+        game['meta']['is_registration_over'] = 1
+        game['filters']['is_available'] = '0'
+        self.games.refresh()
+        self.assertEqual([e.section for e in self.events],
+                         ['is_available', 'is_registration_over'])
+        self.assertEqual([(e.old, e.new) for e in available],
+                         [(True, False)])
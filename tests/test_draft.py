@@ -0,0 +1,91 @@
+import time
+import unittest
+
+from requests import HTTPError
+
+from yahoo_fantasy_sports.draft import DraftTracker, Pick
+from yahoo_fantasy_sports.testing import (
+    FakeYahoo, sample_fixtures, start_draft)
+
+LEAGUES = ['348.l.1', '348.l.2', '348.l.3']
+
+
+class TestDraftTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.fixtures = sample_fixtures(leagues=3, teams=2, players=2)
+        self.fake = FakeYahoo(self.fixtures)
+        self.pick = dict((key, start_draft(self.fixtures, key))
+                         for key in LEAGUES)
+        self.tracker = DraftTracker(self.fake.oauth(), LEAGUES, max_keys=2)
+        self.received = []
+        self.tracker.subscribe(self.received.append)
+
+    def test_poll(self):
+        self.assertEqual(self.tracker.poll(), [])
+        self.assertEqual(self.fake.requests, 2)
+
+        self.pick['348.l.1']()
+        self.pick['348.l.1']()
+        self.pick['348.l.3']()
+        picks = self.tracker.poll()
+        self.assertEqual(picks, self.received)
+        self.assertEqual(picks[0], Pick('348.l.1', 1, 1, '348.l.1.t.1',
+                                        '348.p.1'))
+        self.assertEqual([(p.league_key, p.pick) for p in picks],
+                         [('348.l.1', 1), ('348.l.1', 2), ('348.l.3', 1)])
+        self.assertEqual(self.tracker.last_pick('348.l.1').player_key,
+                         '348.p.3')
+        self.assertIsNone(self.tracker.last_pick('348.l.2'))
+
+        self.assertEqual(self.tracker.poll(), [])
+        self.assertEqual(len(self.received), 3)
+
+    def test_finished_drafts_are_not_polled(self):
+        while self.pick['348.l.1']():
+            pass
+        self.assertEqual(len(self.tracker.poll()), 4)
+        self.assertTrue(self.tracker.is_over('348.l.1'))
+        self.assertEqual(self.tracker.active, ['348.l.2', '348.l.3'])
+
+        log = len(self.fake.log)
+        self.tracker.poll()
+        self.assertEqual(len(self.fake.log), log + 1)
+        self.assertNotIn('348.l.1', self.fake.log[-1])
+
+    def test_refused_leagues_are_not_polled(self):
+        self.fake.errors = {'348.l.2': 403}
+        self.tracker.max_keys = 3
+        self.tracker.poll()
+        self.assertEqual(list(self.tracker.errors), ['348.l.2'])
+        self.assertEqual(self.tracker.active, ['348.l.1', '348.l.3'])
+
+        requests = self.fake.requests
+        self.pick['348.l.1']()
+        self.assertEqual(len(self.tracker.poll()), 1)
+        self.assertEqual(self.fake.requests, requests + 1)
+
+    def test_refused_chunk_does_not_swallow_picks(self):
+        # max_keys=2: '348.l.3' is alone in the second request
+        self.fake.errors = {'348.l.3': 403}
+        self.pick['348.l.1']()
+        self.assertEqual(len(self.tracker.poll()), 1)
+        self.assertEqual(len(self.received), 1)
+        self.assertEqual(list(self.tracker.errors), ['348.l.3'])
+
+    def test_failing_request_does_not_swallow_picks(self):
+        self.fake.errors = {'348.l.3': 401}
+        self.pick['348.l.1']()
+        self.assertRaises(HTTPError, self.tracker.poll)
+        self.assertEqual([p.league_key for p in self.received], ['348.l.1'])
+        self.assertEqual(self.tracker.active, LEAGUES)
+
+    def test_background_polling(self):
+        self.tracker.interval = 0.01
+        with self.tracker:
+            self.pick['348.l.2']()
+            for _ in range(200):
+                if self.received:
+                    break
+                time.sleep(0.01)
+        self.assertEqual([p.league_key for p in self.received], ['348.l.2'])
@@ -0,0 +1,73 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory
+from yahoo_fantasy_sports.backfill import Backfill
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+else:
+    from yahoo_fantasy_sports.export import (
+        TableWriter, export_backfill, export_games, read_table)
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=3))
+
+    def test_export_games(self):
+        games = GamesFactory(self.fake.oauth())('nfl', 'nba')
+        for format in ('arrow', 'parquet'):
+            paths = export_games([games[k] for k in games.games], self.path,
+                                 format)
+
+            weeks = read_table(paths['game_weeks'])
+            self.assertEqual(weeks.num_rows, 17 + 24)
+            nfl = [w for w in weeks.to_pylist() if w['game_key'] == '348']
+            self.assertEqual(nfl[0]['week'], 1)
+            self.assertEqual(nfl[0]['start'], datetime.date(2015, 9, 10))
+
+            stats = read_table(paths['stat_categories']).to_pylist()
+            self.assertEqual(stats[0]['position_types'], ['O'])
+            self.assertEqual(stats[-1]['position_types'], [])
+
+    def test_weeks_keep_yahoo_numbers(self):
+        fixtures = sample_fixtures(teams=2, players=1)
+        weeks = fixtures['game']['348']['subs']['game_weeks']['game_weeks']
+        for number in range(weeks['count']):
+            week = weeks[str(number)]['game_week']
+            week['week'] = str(number + 3)
+        game = GamesFactory(FakeYahoo(fixtures).oauth())('nfl')
+
+        paths = export_games([game], self.path)
+        numbers = [w['week'] for w in
+                   read_table(paths['game_weeks']).to_pylist()]
+        self.assertEqual(numbers, list(range(3, 20)))
+
+    def test_batches(self):
+        path = os.path.join(self.path, 'player_stats.arrow')
+        with TableWriter(path, 'player_stats', batch_size=4) as writer:
+            writer.write({'player_key': '348.p.1', 'week': 1,
+                          'stat_id': str(i), 'value': '3'}
+                         for i in range(10))
+        reader = pyarrow.ipc.open_file(pyarrow.memory_map(path))
+        self.assertEqual(reader.num_record_batches, 3)
+        self.assertEqual(read_table(path).column('stat_id').to_pylist(),
+                         list(range(10)))
+
+    def test_export_backfill(self):
+        rows = Backfill(self.fake.oauth(), '348', self.path,
+                        weeks=[1]).run()
+        paths = export_backfill(self.path, format='parquet')
+        for table, count in rows.items():
+            self.assertEqual(read_table(paths[table]).num_rows, count)
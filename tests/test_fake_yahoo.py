@@ -0,0 +1,53 @@
+import unittest
+
+from requests import HTTPError
+
+from yahoo_fantasy_sports import GamesFactory
+from yahoo_fantasy_sports.testing import (
+    FakeYahoo, FakeYahooServer, sample_fixtures)
+from yahoo_fantasy_sports.utils import base_url, yfs_request
+
+
+class TestFakeYahoo(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=4, players=3))
+
+    def test_games_over_http(self):
+        with FakeYahooServer(self.fake) as server:
+            games = GamesFactory(server.oauth())('nfl', 'mlb')
+
+        self.assertEqual(self.fake.requests, 2)
+        self.assertTrue(games[348].is_available)
+        self.assertFalse(games[357].is_available)
+        self.assertEqual(len(games[348].game_weeks), 17)
+        self.assertEqual(games[348].position_types['DT'], 'Defense/ST')
+
+    def test_nested_collection(self):
+        uri = base_url + '/league/348.l.1/teams;out=standings'
+        league = yfs_request(self.fake.oauth(), uri)['fantasy_content']
+        teams = league['league'][1]['teams']
+
+        self.assertEqual(teams['count'], 4)
+        self.assertEqual(teams['3']['team'][0][0]['team_key'], '348.l.1.t.4')
+        self.assertEqual(teams['3']['team'][1]['team_standings']['rank'], 4)
+
+    def test_sub_resource_parameters(self):
+        uri = base_url + '/player/348.p.2/stats;type=week;week=3'
+        player = yfs_request(self.fake.oauth(), uri)['fantasy_content']
+        stats = player['player'][1]['player_stats']
+        self.assertEqual(stats['week'], '3')
+
+    def test_unknown_key_fails_whole_collection(self):
+        uri = base_url + '/games;game_keys=nfl,xyz'
+        self.assertRaises(HTTPError, yfs_request, self.fake.oauth(), uri)
+
+    def test_error_injection(self):
+        fake = FakeYahoo(sample_fixtures(), errors={'game_keys=nfl': 503})
+        with self.assertRaises(HTTPError) as cm:
+            GamesFactory(fake.oauth())('nfl')
+        self.assertIn("Injected error for 'game_keys=nfl'",
+                      str(cm.exception))
+
+        fake = FakeYahoo(sample_fixtures(), error_rate=1.0)
+        self.assertRaises(HTTPError, GamesFactory(fake.oauth()), 'nba')
@@ -0,0 +1,46 @@
+import time
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory
+from yahoo_fantasy_sports.freshness import format_timestamp
+from yahoo_fantasy_sports.game import Game
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+
+class TestFreshness(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+
+    def test_format_timestamp(self):
+        self.assertEqual(format_timestamp(1445000000),
+                         '2015-10-16 12:53:20 +00:00')
+
+    def test_game(self):
+        start = time.time()
+        game = GamesFactory(self.fake.oauth())('nfl')
+
+        self.assertGreaterEqual(game.updated_at, start)
+        self.assertEqual(game.last_updated,
+                         format_timestamp(game.updated_at))
+        self.assertLess(game.age, 60)
+        self.assertEqual(game.expires_at, game.updated_at + Game.ttl)
+        self.assertFalse(game.is_stale())
+        self.assertTrue(game.is_stale(0))
+
+        game._updated_at -= Game.ttl
+        self.assertTrue(game.is_stale())
+        game.refresh()
+        self.assertFalse(game.is_stale())
+
+    def test_games(self):
+        games = GamesFactory(self.fake.oauth())('nfl', 'nba')
+        self.assertFalse(games.is_stale(60))
+        games._updated_at = 0
+        games.refresh()
+        self.assertLess(games.age, 60)
+
+    def test_never_loaded(self):
+        game = Game.__new__(Game)
+        self.assertIsNone(game.last_updated)
+        self.assertTrue(game.is_stale())
@@ -0,0 +1,101 @@
+import datetime
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory, YahooFantasySportsError
+from yahoo_fantasy_sports.game import Game
+from yahoo_fantasy_sports.planner import QueryPlanner
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+
+class TestGameIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+        self.game = GamesFactory(self.fake.oauth())('nfl')
+
+    def test_sections(self):
+        self.assertEqual(self.game.stat_categories[4]['name'],
+                         'Passing Yards')
+        self.assertEqual(self.game.roster_positions['K']['position_type'],
+                         'K')
+
+    def test_sections_wait_for_availability(self):
+        game = self.game
+        updated_at = game.updated_at
+        planner = QueryPlanner(self.fake.oauth())
+        game._plan_refresh(planner)
+        sections, available = planner.plan()
+
+        sections.execute(self.fake.oauth())
+        self.assertEqual(game.updated_at, updated_at)
+        available.execute(self.fake.oauth())
+        self.assertGreater(game.updated_at, updated_at)
+        self.assertTrue(game.is_available)
+
+    def test_lookups(self):
+        game = self.game
+        self.assertEqual(game.stat('4')['display_name'], 'Pass Yds')
+        self.assertIs(game.stat(4), game.stat('4'))
+        self.assertIsNone(game.stat(999))
+        self.assertEqual(game.stat_ids_for('O'), (4, 5, 6, 9, 10, 12, 13))
+        self.assertEqual(game.stat_ids_for('DT'), (32,))
+        self.assertEqual(game.stat_ids_for('X'), ())
+        self.assertEqual(game.stat_id_for('Rush TD'), 10)
+        self.assertEqual(game.roster_position('W/R/T')['display_name'],
+                         'Wide Receiver/Running Back/Tight End')
+
+    def test_shared_display_names(self):
+        fixtures = sample_fixtures(teams=2, players=1)
+        stats = fixtures['game']['348']['subs']['stat_categories'][
+            'stat_categories']['stats']
+        stats.append({'stat': {'stat_id': 33, 'name': 'Interception',
+                               'display_name': 'Int', 'sort_order': '1',
+                               'position_types': [{'position_type': 'DT'}]}})
+        game = GamesFactory(FakeYahoo(fixtures).oauth())('nfl')
+
+        self.assertRaises(YahooFantasySportsError, game.stat_id_for, 'Int')
+        self.assertEqual(game.stat_id_for('Int', 'O'), 6)
+        self.assertEqual(game.stat_id_for('Int', 'DT'), 33)
+        self.assertIsNone(game.stat_id_for('Int', 'K'))
+        self.assertEqual(game.stat_id_for('Sack'), 32)
+
+    def test_decode_stats(self):
+        decoded = self.game.decode_stats([
+            {'stat': {'stat_id': '4', 'value': '305'}},
+            {'stat_id': '32', 'value': '1'},
+            {'stat_id': '1000', 'value': '7'},
+        ])
+        self.assertEqual(decoded, {'Pass Yds': '305', 'Sack': '1',
+                                   '1000': '7'})
+
+    def test_snapshot_rebuilds_indexes(self):
+        data = self.game.snapshot()
+        self.assertNotIn('_stats_by_id', self.game._state())
+        game = Game.from_snapshot(None, data)
+        self.assertEqual(game.stat_id_for('Pass TD'), 5)
+
+
+class TestGameWeeks(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+        self.game = GamesFactory(self.fake.oauth())('nfl')
+
+    def test_week_for(self):
+        game = self.game
+        self.assertEqual(game.week_for('2015-09-10'), 1)
+        self.assertEqual(game.week_for(datetime.date(2015, 9, 16)), 1)
+        self.assertEqual(game.week_for(datetime.datetime(2015, 9, 17, 20)),
+                         2)
+        self.assertEqual(game.week_for('2016-01-03'), 17)
+        self.assertIsNone(game.week_for('2015-09-09'))
+        self.assertIsNone(game.week_for('2016-01-07'))
+
+    def test_current_week(self):
+        self.assertIsNone(self.game.current_week)
+
+    def test_gap_between_weeks(self):
+        self.game._game_weeks['1']['start'] = '2015-09-20'
+        self.game._build_indexes()
+        self.assertIsNone(self.game.week_for('2015-09-18'))
+        self.assertEqual(self.game.week_for('2015-09-20'), 2)
@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+# seconds ``import yahoo_fantasy_sports`` may take, best of a few runs
+IMPORT_BUDGET = 0.1
+
+# modules that must only be imported once they are actually used
+LAZY_MODULES = ('pyarrow', 'requests', 'xml.dom.minidom', 'json', 'logging',
+                'pickle', 'sqlite3')
+
+SCRIPT = """
+import sys, time
+before = set(sys.modules)
+start = time.time()
+import yahoo_fantasy_sports
+elapsed = time.time() - start
+imported = sorted(set(sys.modules) - before)
+import json
+print(json.dumps({'elapsed': elapsed,
+                  'modules': imported}))
+"""
+
+
+def _import():
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT],
+                                     cwd=ROOT)
+    return json.loads(output.decode('utf-8'))
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_heavy_modules_are_lazy(self):
+        modules = _import()['modules']
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules)
+
+    def test_import_budget(self):
+        elapsed = min(_import()['elapsed'] for _ in range(3))
+        self.assertLess(elapsed, IMPORT_BUDGET)
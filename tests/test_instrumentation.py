@@ -0,0 +1,71 @@
+import unittest
+
+from requests import HTTPError
+
+from yahoo_fantasy_sports import GamesFactory, instrumentation
+from yahoo_fantasy_sports.instrumentation import (
+    MetricsAggregator, add_hook, remove_hook, uri_template)
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+from yahoo_fantasy_sports.utils import base_url, yfs_request
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=2))
+        self.metrics = MetricsAggregator().install()
+        self.addCleanup(self.metrics.uninstall)
+
+    def test_uri_template(self):
+        self.assertEqual(
+            uri_template(base_url + '/teams;team_keys=1.l.1.t.1,1.l.1.t.2'
+                         ';out=standings/roster;week=5'),
+            '/teams;team_keys={team_keys};out=standings/roster;week={week}')
+        self.assertEqual(uri_template(base_url + '/game/nfl/game_weeks'),
+                         '/game/{game_key}/game_weeks')
+
+    def test_hooks_receive_events(self):
+        pre, post = [], []
+        add_hook(pre=pre.append, post=post.append)
+        self.addCleanup(remove_hook, pre.append, post.append)
+
+        yfs_request(self.fake.oauth(), base_url + '/game/nfl')
+
+        self.assertEqual(len(pre), 1)
+        self.assertIs(pre[0], post[0])
+        event = post[0]
+        self.assertEqual(event.status, 200)
+        self.assertEqual(event.resource, 'game')
+        self.assertEqual(event.uri_template, '/game/{game_key}')
+        self.assertGreater(event.bytes, 0)
+        self.assertGreater(event.network_time, 0)
+        self.assertIsNone(event.cache)
+
+    def test_metrics(self):
+        GamesFactory(self.fake.oauth())('nfl', 'nba')
+        fake = FakeYahoo(sample_fixtures(), error_rate=1.0)
+        self.assertRaises(HTTPError, yfs_request, fake.oauth(),
+                          base_url + '/game/nfl')
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['requests'], [
+            {'resource': 'game', 'status': '200', 'cache': 'none',
+             'count': 2},
+            {'resource': 'game', 'status': '500', 'cache': 'none',
+             'count': 1},
+        ])
+        self.assertEqual(snapshot['network_seconds']['game']['count'], 3)
+        self.assertEqual(snapshot['decode_seconds']['game']['buckets'][-1],
+                         [float('inf'), 3])
+
+        text = self.metrics.to_prometheus()
+        self.assertIn('yfs_requests_total{resource="game",status="200",'
+                      'cache="none"} 2', text)
+        self.assertIn('yfs_request_network_seconds_count{resource="game"} 3',
+                      text)
+        self.assertIn('yfs_request_network_seconds_bucket{resource="game",'
+                      'le="+Inf"} 3', text)
+
+    def test_inactive_without_hooks(self):
+        self.metrics.uninstall()
+        self.assertFalse(instrumentation.active())
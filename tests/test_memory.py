@@ -0,0 +1,69 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory
+from yahoo_fantasy_sports.cache import SQLiteCache
+from yahoo_fantasy_sports.memory import (
+    MemoryProfile, cached_responses, deep_sizeof, resource_sizes)
+from yahoo_fantasy_sports.pool import ClientPool
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+
+class TestMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures())
+
+    def test_deep_sizeof(self):
+        shared = 'x' * 1000
+        value = {'a': [shared, shared], 'b': (shared,)}
+        size = deep_sizeof(value)
+        self.assertGreater(size, sys.getsizeof(shared))
+        self.assertLess(size, 2 * sys.getsizeof(shared))
+
+        seen = set()
+        deep_sizeof(shared, seen)
+        self.assertEqual(deep_sizeof(value, seen),
+                         size - sys.getsizeof(shared))
+
+    def test_resource_sizes(self):
+        games = GamesFactory(self.fake.oauth())('nfl', 'nba')
+        sizes = resource_sizes([games] + list(games._games.values()))
+
+        self.assertEqual(sizes['Game'].count, 2)
+        self.assertEqual(sizes['Games'].count, 1)
+        self.assertGreater(sizes['Game'].attributes['_game_weeks'], 0)
+        # games are charged to Game, the collection only holds references
+        self.assertLess(sizes['Games'].bytes, sizes['Game'].bytes / 10)
+        self.assertEqual(sizes['Games'].attributes['_oauth'], 0)
+
+    def test_cached_responses(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        with SQLiteCache(os.path.join(path, 'cache.sqlite')):
+            with ClientPool() as pool:
+                pool.add('a', self.fake.oauth()).games('nfl')
+                responses = cached_responses()
+
+        sources = sorted(set(r.source for r in responses))
+        self.assertEqual(sources, ['cache', 'pool'])
+        self.assertTrue(all(r.resource == 'game' for r in responses))
+        sizes = [r.bytes for r in responses]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+
+    def test_profile(self):
+        with MemoryProfile(top=5, frames=3) as profile:
+            games = GamesFactory(self.fake.oauth())('nfl', 'nba')
+            games.refresh()
+
+        self.assertGreater(profile.peak, 0)
+        self.assertLessEqual(len(profile.sites), 5)
+        package = os.path.dirname(os.path.dirname(__file__))
+        for site in profile.sites:
+            self.assertTrue(any(package in frame or 'json' in frame
+                                for frame in site.traceback))
+        self.assertGreaterEqual(profile.resources['Game'].count, 2)
+        self.assertIn('retained by resources:', profile.report())
@@ -0,0 +1,61 @@
+import unittest
+
+from yahoo_fantasy_sports.normalize import normalize
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+
+class TestNormalize(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=2))
+
+    def get(self, path):
+        status, body = self.fake.handle(path)
+        self.assertEqual(status, 200)
+        return normalize(body)
+
+    def test_resource(self):
+        game = self.get('/game/nfl;out=game_weeks,stat_categories,'
+                        'position_types')['game']
+        self.assertEqual(game['code'], 'nfl')
+        self.assertEqual(len(game['game_weeks']), 17)
+        self.assertEqual(game['game_weeks'][1]['week'], '2')
+
+        stats = game['stat_categories']['stats']
+        self.assertEqual(stats[0]['position_types'], ['O'])
+        self.assertEqual(game['position_types'][2]['type'], 'DT')
+
+    def test_collection(self):
+        teams = self.get('/league/348.l.1/teams')['league']['teams']
+        self.assertEqual([t['team_key'] for t in teams],
+                         ['348.l.1.t.1', '348.l.1.t.2'])
+        self.assertEqual(teams[0]['name'], 'Team 1')
+
+    def test_roster(self):
+        team = self.get('/team/348.l.1.t.1/roster')['team']
+        players = team['roster']['players']
+        self.assertEqual(team['roster']['week'], '1')
+        self.assertEqual(players[0]['name']['full'], 'Player 1')
+        self.assertEqual(players[0]['selected_position']['position'], 'QB')
+
+    def test_empty_collection(self):
+        self.assertEqual(
+            normalize({'fantasy_content': {'games': []}})['games'], [])
+        self.assertEqual(
+            normalize({'games': {'count': 0}})['games'], [])
+
+    def test_single_entry_arrays_are_lists(self):
+        player = normalize({'player': [
+            [{'player_key': '348.p.1'}],
+            {'eligible_positions': [{'position': 'QB'}]}]})['player']
+        self.assertEqual(player['eligible_positions'], ['QB'])
+        player = normalize({'player': [
+            [{'player_key': '348.p.1'}],
+            {'eligible_positions': [{'position': 'WR'},
+                                    {'position': 'TE'}]}]})['player']
+        self.assertEqual(player['eligible_positions'], ['WR', 'TE'])
+
+    def test_record_with_count(self):
+        record = {'name': 'Waivers', 'count': 0}
+        self.assertEqual(normalize({'transaction': record})['transaction'],
+                         record)
@@ -0,0 +1,197 @@
+import unittest
+
+from requests import HTTPError
+
+from yahoo_fantasy_sports import GamesFactory, YahooFantasySportsError
+from yahoo_fantasy_sports.planner import QueryPlanner
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+from yahoo_fantasy_sports.utils import base_url
+
+
+class FakeResponse(object):
+
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+
+class FakeOAuth(object):
+    """Serves canned responses keyed by URI and records every request."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested = []
+        self.oauth = self
+        self.base_url = None
+        self.session = self
+
+    def token_is_valid(self):
+        return True
+
+    def get(self, uri, params=None):
+        self.requested.append(uri)
+        return FakeResponse(self.responses[uri])
+
+
+def team(key, **subs):
+    return {'team': [[{'team_key': key}, {'name': key}]] +
+            [{name: data} for name, data in subs.items()]}
+
+
+def game(key, code, sections):
+    meta = {'game_key': key, 'game_id': key, 'code': code, 'name': code,
+            'url': '', 'season': '2015', 'is_registration_over': 0,
+            'type': 'full'}
+    return {'game': [meta] + [{name: data} for name, data in sections]}
+
+
+GAME_SECTIONS = [
+    ('game_weeks', {'0': {'game_week': {'week': '1', 'start': '2015-09-10',
+                                        'end': '2015-09-14'}},
+                    'count': 1}),
+    ('stat_categories', {'stats': [
+        {'stat': {'stat_id': 4, 'name': 'Passing Yards',
+                  'display_name': 'Pass Yds', 'sort_order': '1'}}]}),
+    ('position_types', [
+        {'position_type': {'type': 'O', 'display_name': 'Offense'}}]),
+    ('roster_positions', [
+        {'roster_position': {'position': 'QB', 'abbreviation': 'QB',
+                             'display_name': 'Quarterback',
+                             'position_type': 'O'}}]),
+]
+
+
+class TestQueryPlanner(unittest.TestCase):
+
+    def test_merges_keys_and_out(self):
+        planner = QueryPlanner(FakeOAuth({}))
+        for n in range(40):
+            planner.add('team', '346.l.1.t.{0}'.format(n), sub='standings')
+            planner.add('team', '346.l.1.t.{0}'.format(n), sub='stats')
+            planner.add('team', '346.l.1.t.{0}'.format(n),
+                        sub='roster;week=5')
+
+        requests = planner.plan()
+        self.assertEqual(len(planner), 120)
+        self.assertEqual(len(requests), 4)
+        self.assertEqual(
+            [r.uri.split(';', 1)[0] for r in requests],
+            [base_url + '/teams'] * 4)
+        self.assertTrue(requests[0].uri.endswith(';out=standings,stats'))
+        self.assertTrue(requests[2].uri.endswith('/roster;week=5'))
+        self.assertEqual([len(r.keys) for r in requests], [25, 15, 25, 15])
+        self.assertIn('120 accesses -> 4 requests', planner.explain())
+
+    def test_fans_out_response(self):
+        uri = base_url + '/teams;team_keys=1.l.1.t.1,1.l.1.t.2;out=standings'
+        oauth = FakeOAuth({uri: {'fantasy_content': {'teams': {
+            '0': team('1.l.1.t.1', team_standings={'rank': 1}),
+            '1': team('1.l.1.t.2', team_standings={'rank': 2}),
+            'count': 2}}}})
+
+        planner = QueryPlanner(oauth)
+        seen = []
+        first = planner.add('team', '1.l.1.t.1', sub='standings')
+        second = planner.add('team', '1.l.1.t.2', sub='standings',
+                             callback=seen.append)
+        self.assertRaises(YahooFantasySportsError, first.result)
+        self.assertEqual(planner.execute(), 1)
+
+        self.assertEqual(
+            first.result()['fantasy_content']['team'][1]['team_standings'],
+            {'rank': 1})
+        self.assertEqual(seen, [second.result()])
+        self.assertEqual(len(planner), 0)
+
+    def test_missing_resource_resolves_to_none(self):
+        uri = base_url + '/games;game_keys=nfl;is_available=1'
+        oauth = FakeOAuth({uri: {'fantasy_content': {'games': []}}})
+
+        planner = QueryPlanner(oauth)
+        access = planner.add('game', 'nfl', parameters={'is_available': 1})
+        planner.execute()
+        self.assertIsNone(access.result())
+
+    def test_games_are_loaded_in_batch(self):
+        responses = {}
+        # games are refreshed by their numeric keys once loaded
+        for keys in ('348,nba', '348,353'):
+            uri = base_url + '/games;game_keys=' + keys
+            responses[uri + ';out=game_weeks,stat_categories,'
+                      'position_types,roster_positions'] = \
+                {'fantasy_content': {'games': {
+                    '0': game('348', 'nfl', GAME_SECTIONS),
+                    '1': game('353', 'nba', GAME_SECTIONS),
+                    'count': 2}}}
+            responses[uri + ';is_available=1'] = \
+                {'fantasy_content': {'games': {
+                    '0': game('353', 'nba', []), 'count': 1}}}
+        oauth = FakeOAuth(responses)
+
+        games = GamesFactory(oauth)(348, 'nba')
+        self.assertEqual(len(oauth.requested), 2)
+        self.assertFalse(games[348].is_available)
+        self.assertTrue(games[353].is_available)
+        self.assertEqual(games[353].game_weeks['0']['end'], '2015-09-14')
+        self.assertEqual(games[348].position_types, {'O': 'Offense'})
+
+        games.refresh()
+        self.assertEqual(len(oauth.requested), 4)
+
+
+class TestBisection(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(leagues=6, teams=2, players=1))
+        self.planner = QueryPlanner(self.fake.oauth())
+
+    def test_isolates_failing_keys(self):
+        # a private league and one that does not exist
+        self.fake.errors = {'348.l.3': 403}
+        keys = ['348.l.{0}'.format(i) for i in (1, 2, 3, 4, 99, 5, 6)]
+        seen = []
+        accesses = [self.planner.add('league', key, sub='draftresults',
+                                     callback=seen.append) for key in keys]
+        self.assertEqual(self.planner.execute(), 1)
+
+        self.assertEqual(list(self.planner.errors), ['348.l.3', '348.l.99'])
+        self.assertEqual(
+            self.planner.errors['348.l.3'].response.status_code, 403)
+        self.assertEqual(
+            self.planner.errors['348.l.99'].response.status_code, 400)
+        for key, access in zip(keys, accesses):
+            if key in self.planner.errors:
+                self.assertIs(access.error, self.planner.errors[key])
+                self.assertRaises(HTTPError, access.result)
+            else:
+                self.assertIsNone(access.error)
+                self.assertEqual(
+                    access.result()['fantasy_content']['league'][0]
+                    ['league_key'], key)
+        self.assertEqual(seen.count(None), 2)
+        self.assertEqual(len(seen), 7)
+        # the batch, then halves down to the failing keys
+        self.assertEqual(self.fake.requests, 11)
+
+    def test_single_key_raises(self):
+        self.planner.add('league', '348.l.99', sub='draftresults')
+        self.assertRaises(HTTPError, self.planner.execute)
+
+    def test_every_key_failing_raises(self):
+        self.fake.errors = {'draftresults': 403}
+        for i in range(1, 5):
+            self.planner.add('league', '348.l.{0}'.format(i),
+                             sub='draftresults')
+        self.assertRaises(HTTPError, self.planner.execute)
+
+    def test_other_errors_raise(self):
+        self.fake.errors = {'leagues': 401}
+        self.planner.add('league', '348.l.1', sub='draftresults')
+        self.planner.add('league', '348.l.2', sub='draftresults')
+        self.assertRaises(HTTPError, self.planner.execute)
+        self.assertEqual(self.fake.requests, 1)
@@ -0,0 +1,137 @@
+import threading
+import time
+import unittest
+
+from yahoo_fantasy_sports import YahooFantasySportsError, utils
+from yahoo_fantasy_sports.pool import ClientPool
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+from yahoo_fantasy_sports.utils import base_url, yfs_request
+
+USER_GAMES = base_url + '/users;use_login=1/games'
+
+
+class CountingTransport(object):
+    """
+    Sends requests with the OAuth session, recording how many are in flight.
+    """
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.tokens = []
+        self._lock = threading.Lock()
+
+    def get(self, oauth, uri):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            self.tokens.append(oauth.access_token)
+        try:
+            time.sleep(0.02)
+            return utils.send_request(oauth, uri)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+class ExpiringOAuth(object):
+
+    def __init__(self, oauth):
+        self._oauth = oauth
+        self.session = oauth.session
+        self.oauth = oauth
+        self.access_token = oauth.access_token
+        self.refreshes = 0
+
+    def token_is_valid(self):
+        return self.refreshes > 0
+
+    def refresh_access_token(self):
+        time.sleep(0.02)
+        self.refreshes += 1
+
+
+class TestClientPool(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+        self.transport = CountingTransport()
+        previous = utils.set_transport(self.transport)
+        self.addCleanup(utils.set_transport, previous)
+        self.pool = ClientPool(max_connections=2).install()
+        self.addCleanup(self.pool.uninstall)
+
+    def oauth(self, token):
+        oauth = self.fake.oauth()
+        oauth.access_token = token
+        return oauth
+
+    def test_public_responses_are_shared(self):
+        for user in ('alice', 'bob', 'carol'):
+            self.pool.add(user, self.oauth(user))
+        self.assertEqual(self.pool['alice'].games('nfl').code, 'nfl')
+        self.assertEqual(self.pool['bob'].games('nfl').code, 'nfl')
+        self.assertEqual(self.fake.requests, 2)
+        self.assertEqual(self.pool.shared, 2)
+
+        self.pool.clear_public()
+        self.pool['carol'].games('nfl')
+        self.assertEqual(self.fake.requests, 4)
+
+    def test_user_requests_are_isolated(self):
+        for user in ('alice', 'bob'):
+            client = self.pool.add(user, self.oauth(user))
+            yfs_request(client.oauth, USER_GAMES)
+            yfs_request(client.oauth, USER_GAMES)
+        self.assertEqual(self.fake.requests, 4)
+        self.assertEqual(self.transport.tokens,
+                         ['alice', 'alice', 'bob', 'bob'])
+        self.assertEqual(self.pool.shared, 0)
+
+    def test_nested_leagues_are_not_shared(self):
+        uri = base_url + '/games;game_keys=348/leagues;league_keys=348.l.1'
+        for user in ('alice', 'bob'):
+            client = self.pool.add(user, self.oauth(user))
+            yfs_request(client.oauth, uri)
+        self.assertEqual(self.fake.requests, 2)
+        self.assertEqual(self.transport.tokens, ['alice', 'bob'])
+        self.assertEqual(self.pool.shared, 0)
+
+    def test_concurrency(self):
+        users = ['user{0}'.format(i) for i in range(8)]
+        for user in users:
+            self.pool.add(user, self.oauth(user))
+
+        def fetch(user):
+            yfs_request(self.pool[user].oauth, USER_GAMES)
+            yfs_request(self.pool[user].oauth, base_url + '/game/nfl')
+        threads = [threading.Thread(target=fetch, args=(user,))
+                   for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.transport.peak, 2)
+        # a single request for the game, whoever sent it
+        self.assertEqual(self.fake.requests, 9)
+
+    def test_token_refreshed_once(self):
+        oauth = ExpiringOAuth(self.oauth('alice'))
+        self.pool.add('alice', oauth)
+        threads = [threading.Thread(target=yfs_request,
+                                    args=(oauth, USER_GAMES))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(oauth.refreshes, 1)
+        self.assertEqual(self.fake.requests, 4)
+
+    def test_remove(self):
+        self.pool.add('alice', self.oauth('alice'))
+        self.assertIn('alice', self.pool)
+        self.pool.remove('alice')
+        self.assertEqual(len(self.pool), 0)
+        self.assertRaises(YahooFantasySportsError, lambda: self.pool['alice'])
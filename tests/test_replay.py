@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+import unittest
+from timeit import default_timer
+
+from requests import HTTPError
+
+from yahoo_fantasy_sports import GamesFactory, YahooFantasySportsError
+from yahoo_fantasy_sports.replay import (
+    FixtureStore, RecordingTransport, ReplayTransport, normalize_uri)
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+from yahoo_fantasy_sports.transport import MemoryTransport
+from yahoo_fantasy_sports.utils import base_url, yfs_request
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.store = FixtureStore(path)
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=2),
+                              latency=0.02)
+
+    def test_normalize_uri(self):
+        self.assertEqual(
+            normalize_uri(base_url + '/games;is_available=1;game_keys=nfl,'
+                          'nba/game_weeks?format=json'),
+            '/games;game_keys=nfl,nba;is_available=1/game_weeks')
+
+    def test_record_then_replay(self):
+        with RecordingTransport(self.store):
+            recorded = GamesFactory(self.fake.oauth())('nfl', 'mlb')
+            self.assertRaises(HTTPError, yfs_request, self.fake.oauth(),
+                              base_url + '/game/xyz')
+        self.assertEqual(len(self.store), 3)
+        self.fake.reset()
+
+        with ReplayTransport(self.store):
+            start = default_timer()
+            replayed = GamesFactory(None)('nfl', 'mlb')
+            self.assertLess(default_timer() - start, 0.02)
+            self.assertRaises(HTTPError, yfs_request, None,
+                              base_url + '/game/xyz')
+            self.assertRaises(YahooFantasySportsError, GamesFactory(None),
+                              'nba')
+
+        self.assertEqual(self.fake.requests, 0)
+        self.assertEqual(replayed[348].game_weeks,
+                         recorded[348].game_weeks)
+        self.assertFalse(replayed[357].is_available)
+
+    def test_record_through_installed_transport(self):
+        transport = MemoryTransport(self.fake.handle).install()
+        self.addCleanup(transport.uninstall)
+        with RecordingTransport(self.store):
+            GamesFactory(self.fake.oauth())('nfl')
+        self.assertEqual(len(transport.sent), 2)
+        self.assertEqual(len(self.store), 2)
+
+    def test_replay_simulates_latency(self):
+        with RecordingTransport(self.store):
+            GamesFactory(self.fake.oauth())('nfl')
+
+        with ReplayTransport(self.store, simulate_latency=True):
+            start = default_timer()
+            GamesFactory(None)('nfl')
+            self.assertGreaterEqual(default_timer() - start, 0.04)
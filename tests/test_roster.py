@@ -0,0 +1,93 @@
+import time
+import unittest
+from xml.dom import minidom
+
+from yahoo_fantasy_sports.ratelimit import (
+    DeadlineExceeded, RateLimiter, deadline)
+from yahoo_fantasy_sports.roster import Lineup, set_lineups
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+
+class TestLineup(unittest.TestCase):
+
+    def test_to_xml(self):
+        lineup = Lineup('348.l.1.t.1', {'348.p.2': 'BN', '348.p.1': 'W/R/T'},
+                        week=3)
+        doc = minidom.parseString(lineup.to_xml())
+        self.assertEqual(
+            doc.getElementsByTagName('coverage_type')[0].firstChild.data,
+            'week')
+        self.assertEqual(
+            [p.firstChild.data
+             for p in doc.getElementsByTagName('position')], ['W/R/T', 'BN'])
+        self.assertTrue(lineup.uri.endswith('/team/348.l.1.t.1/roster'))
+
+    def test_week_or_date(self):
+        self.assertRaises(Exception, Lineup, '348.l.1.t.1', {})
+        self.assertIn(b'<date>2015-11-02</date>',
+                      Lineup('353.l.1.t.1', {}, date='2015-11-02').to_xml())
+
+
+class TestSetLineups(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=6, players=2))
+        self.lineups = [Lineup('348.l.1.t.{0}'.format(t), {'348.p.1': 'QB'},
+                               week=1) for t in range(1, 7)]
+
+    def test_all_succeed(self):
+        result = set_lineups(self.fake.oauth(), self.lineups, workers=3)
+        self.assertTrue(result.ok)
+        self.assertEqual(len(result.succeeded), 6)
+        self.assertEqual(len(self.fake.writes), 6)
+        self.assertTrue(all(m == 'PUT' for m, _, _ in self.fake.writes))
+
+    def test_retries_only_retryable_failures(self):
+        self.fake.errors = {'t.2/': 503, 't.3/': 400}
+        oauth = self.fake.oauth()
+        result = set_lineups(oauth, self.lineups, retries=2, backoff=0)
+        self.assertEqual(sorted(result.failed), ['348.l.1.t.2', '348.l.1.t.3'])
+        self.assertEqual(result.attempts['348.l.1.t.2'], 3)
+        self.assertEqual(result.attempts['348.l.1.t.3'], 1)
+        self.assertEqual(result.attempts['348.l.1.t.1'], 1)
+        self.assertEqual(len(self.fake.writes), 4)
+
+    def test_deadline(self):
+        limiter = RateLimiter(5, burst=2).install()
+        self.addCleanup(limiter.uninstall)
+        result = set_lineups(self.fake.oauth(), self.lineups,
+                             deadline=time.time() + 0.3)
+        self.assertFalse(result.ok)
+        self.assertLess(result.elapsed, 0.5)
+        self.assertTrue(all(isinstance(e, DeadlineExceeded)
+                            for e in result.failed.values()))
+        self.assertEqual(len(result.succeeded) + len(result.failed) +
+                         len(result.in_flight), 6)
+
+    def test_running_requests_are_in_flight(self):
+        self.fake.latency = 0.3
+        result = set_lineups(self.fake.oauth(), self.lineups[:2],
+                             deadline=time.time() + 0.1)
+        self.assertFalse(result.ok)
+        self.assertEqual(result.failed, {})
+        self.assertEqual(sorted(result.in_flight),
+                         ['348.l.1.t.1', '348.l.1.t.2'])
+        self.assertEqual(result.attempts['348.l.1.t.1'], 1)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_rate(self):
+        limiter = RateLimiter(50, burst=5)
+        start = time.time()
+        for _ in range(10):
+            limiter.acquire()
+        # five tokens from the burst, then five at 50 per second
+        self.assertGreater(time.time() - start, 0.08)
+
+    def test_deadline(self):
+        limiter = RateLimiter(1, burst=1)
+        limiter.acquire()
+        with deadline(time.time() + 0.1):
+            self.assertRaises(DeadlineExceeded, limiter.acquire)
+        self.assertLess(limiter._tokens, 0.1)
@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory
+from yahoo_fantasy_sports.freshness import Freshness
+from yahoo_fantasy_sports.scheduler import RefreshScheduler
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+
+class Counter(Freshness):
+
+    def __init__(self, ttl, delay=0.0):
+        self.ttl = ttl
+        self.delay = delay
+        self.refreshes = 0
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._updated_at = time.time()
+
+    def refresh(self):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+            self.refreshes += 1
+        self._updated_at = time.time()
+
+
+def _wait(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+class TestRefreshScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = RefreshScheduler(workers=2, lead=0.5, jitter=0.1,
+                                          idle=60).start()
+        self.addCleanup(self.scheduler.stop)
+
+    def test_refreshes_before_expiry(self):
+        resource = self.scheduler.register(Counter(ttl=0.2))
+        _wait(lambda: resource.refreshes >= 2)
+        self.assertFalse(resource.is_stale())
+
+        self.scheduler.unregister(resource)
+        refreshes = resource.refreshes
+        time.sleep(0.3)
+        self.assertEqual(resource.refreshes, refreshes)
+
+    def test_caps_concurrency(self):
+        resources = [self.scheduler.register(Counter(ttl=0.1, delay=0.05))
+                     for _ in range(6)]
+        _wait(lambda: all(r.refreshes for r in resources))
+        self.assertLessEqual(max(r.peak for r in resources), 1)
+
+        running = []
+        original = Counter.refresh
+
+        def refresh(resource):
+            # refreshes running besides this one
+            running.append(sum(r.running for r in resources))
+            original(resource)
+        for resource in resources:
+            resource.refresh = refresh.__get__(resource)
+        _wait(lambda: len(running) >= 12)
+        self.assertLessEqual(max(running), 1)
+
+    def test_idle_resources_are_parked(self):
+        self.scheduler.idle = 0.05
+        resource = self.scheduler.register(Counter(ttl=0.2))
+        time.sleep(0.4)
+        self.assertEqual(resource.refreshes, 0)
+        self.assertTrue(resource.is_stale())
+
+        self.scheduler.touch(resource)
+        _wait(lambda: resource.refreshes == 1)
+
+    def test_game(self):
+        fake = FakeYahoo(sample_fixtures(teams=2, players=1))
+        game = GamesFactory(fake.oauth())('nfl')
+        self.scheduler.register(game, ttl=0.2)
+        updated_at = game.updated_at
+        _wait(lambda: game.updated_at != updated_at)
+        self.assertGreaterEqual(fake.requests, 4)
+        self.assertEqual(game.code, 'nfl')
@@ -0,0 +1,111 @@
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory
+from yahoo_fantasy_sports.search import PlayerIndex, distance, fold
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+PLAYERS = {
+    '348.p.1': 'Tom Brady',
+    '348.p.2': 'Tom Savage',
+    '348.p.3': "Le'Veon Bell",
+    '348.p.4': u'Jos\xe9 Abreu',
+    '348.p.5': 'Odell Beckham Jr.',
+    '348.p.6': 'Tommy Bohanon',
+}
+
+
+class TestPlayerIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PlayerIndex(PLAYERS, game_key='348')
+
+    def test_fold(self):
+        self.assertEqual(fold(u"Le'Veon  Bell-Jones"), 'le veon bell jones')
+        self.assertEqual(fold(u'Jos\xe9'), 'jose')
+
+    def test_distance(self):
+        self.assertEqual(distance('brady', 'brady', 2), 0)
+        self.assertEqual(distance('bardy', 'brady', 2), 2)
+        self.assertEqual(distance('brdy', 'brady', 2), 1)
+        self.assertEqual(distance('savage', 'brady', 2), 3)
+
+    def test_prefix(self):
+        self.assertEqual(self.index.prefix('tom'),
+                         ['348.p.1', '348.p.2', '348.p.6'])
+        self.assertEqual(self.index.prefix('Tom S'), ['348.p.2'])
+        self.assertEqual(self.index.prefix('tom', limit=1), ['348.p.1'])
+
+    def test_search(self):
+        search = self.index.search
+        self.assertEqual(search('tom b'), ['348.p.1', '348.p.6'])
+        self.assertEqual(search('brady'), ['348.p.1'])
+        self.assertEqual(search('bell leveon'), ['348.p.3'])
+        self.assertEqual(search('bell le'), ['348.p.3'])
+        self.assertEqual(search('jose'), ['348.p.4'])
+        self.assertEqual(search('beckam'), ['348.p.5'])
+        self.assertEqual(search('tom bardy'), ['348.p.1'])
+        self.assertEqual(search('beckam', max_edits=0), [])
+        self.assertEqual(search('bell lev', max_edits=0), [])
+        self.assertEqual(search(' '), [])
+
+    def test_update_and_remove(self):
+        index = self.index
+        index.update({'348.p.1': 'Thomas Brady', '348.p.7': 'Tom Brady'})
+        self.assertEqual(index.prefix('tom b'), ['348.p.7'])
+        self.assertEqual(index.search('thomas'), ['348.p.1'])
+        index.remove(['348.p.1', '348.p.5', '348.p.99'])
+        self.assertEqual(index.search('thomas'), [])
+        self.assertEqual(index.search('beckham'), [])
+        self.assertNotIn('beckham', index._token_keys)
+        self.assertEqual(len(index), 5)
+
+    def test_serialization(self):
+        index = PlayerIndex.loads(self.index.dumps())
+        self.assertEqual(index.players, PLAYERS)
+        self.assertEqual(index.search('tom bardy'), ['348.p.1'])
+
+
+class TestBuild(unittest.TestCase):
+
+    def test_build_and_refresh(self):
+        fixtures = sample_fixtures(teams=4, players=3)
+        fake = FakeYahoo(fixtures)
+        index = PlayerIndex.build(fake.oauth(), '348', page_size=5)
+        self.assertEqual(len(index), 12)
+        self.assertEqual(index.search('player 12'), ['348.p.12'])
+        self.assertEqual(fake.requests, 3)
+
+        fixtures['player']['348.p.13'] = {'meta': [
+            {'player_key': '348.p.13'},
+            {'name': {'full': 'Rookie Player'}},
+        ]}
+        fixtures['game']['348']['children']['players'].append('348.p.13')
+        self.assertEqual(index.refresh(fake.oauth(), page_size=5), 1)
+        self.assertEqual(fake.requests, 4)
+        self.assertEqual(index.search('rookie'), ['348.p.13'])
+        self.assertEqual(index.pulled, 13)
+
+    def test_refresh_rebuilds_when_players_move(self):
+        fixtures = sample_fixtures(teams=4, players=3)
+        fake = FakeYahoo(fixtures)
+        index = PlayerIndex.build(fake.oauth(), '348', page_size=5)
+
+        # a player removed from the start shifts every later one
+        fixtures['game']['348']['children']['players'].remove('348.p.2')
+        self.assertEqual(index.refresh(fake.oauth(), page_size=5), 0)
+        self.assertNotIn('348.p.2', index)
+        self.assertEqual(len(index), 11)
+        self.assertEqual(index.pulled, 11)
+
+        # nothing moved since
+        requests = fake.requests
+        self.assertEqual(index.refresh(fake.oauth(), page_size=5), 0)
+        self.assertEqual(fake.requests, requests + 1)
+
+    def test_game_player_index(self):
+        fake = FakeYahoo(sample_fixtures(teams=2, players=2))
+        game = GamesFactory(fake.oauth())('nfl')
+        index = game.player_index()
+        self.assertIs(game.player_index(), index)
+        self.assertEqual(index.search('playr 3'), ['348.p.3'])
+        self.assertNotIn('_player_index', game._state())
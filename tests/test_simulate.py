@@ -0,0 +1,93 @@
+import unittest
+
+from yahoo_fantasy_sports.simulate import (
+    LeagueSeason, fantasy_points, schedule_from_scoreboards, simulate,
+    simulate_leagues, team_distribution)
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+TEAMS = ['t.1', 't.2', 't.3', 't.4']
+
+
+def season(means, wins=None, playoff_teams=2):
+    schedule = [(5, 't.1', 't.2'), (5, 't.3', 't.4'),
+                (6, 't.1', 't.3'), (6, 't.2', 't.4')]
+    return LeagueSeason(TEAMS, schedule, dict(zip(TEAMS, means)),
+                        dict((key, 10.0) for key in TEAMS), wins,
+                        playoff_teams=playoff_teams, league_key='348.l.1')
+
+
+class TestSeason(unittest.TestCase):
+
+    def test_fantasy_points(self):
+        stats = [{'stat': {'stat_id': '4', 'value': '250'}},
+                 {'stat_id': 5, 'value': '2'},
+                 {'stat_id': 6, 'value': '-'},
+                 {'stat_id': 7, 'value': '9'}]
+        self.assertAlmostEqual(
+            fantasy_points(stats, {'4': 0.04, '5': 4, '6': -2}), 18.0)
+
+    def test_team_distribution(self):
+        mean, std = team_distribution([[10, 20], [5, 5, 5], []])
+        self.assertEqual(mean, 20)
+        self.assertAlmostEqual(std, 50 ** 0.5)
+
+    def test_from_yahoo(self):
+        fake = FakeYahoo(sample_fixtures(teams=4, players=10, weeks=4))
+        loaded = LeagueSeason.from_yahoo(
+            fake.oauth(), '348.l.1', {'4': 0.04, '5': 4}, [3, 4], [1, 2])
+
+        self.assertEqual(loaded.team_keys,
+                         ['348.l.1.t.{0}'.format(i) for i in range(1, 5)])
+        self.assertEqual(loaded.wins['348.l.1.t.1'], 3)
+        self.assertEqual(len(loaded.schedule), 4)
+        self.assertEqual(set(week for week, _, _ in loaded.schedule),
+                         set([3, 4]))
+        for key in loaded.team_keys:
+            self.assertGreater(loaded.means[key], 0)
+            self.assertGreater(loaded.stds[key], 0)
+
+    def test_schedule_from_scoreboards(self):
+        league = {'scoreboard': {'week': '7', 'matchups': [
+            {'teams': [{'team_key': 't.1'}, {'team_key': 't.2'}]}]}}
+        self.assertEqual(schedule_from_scoreboards([league]),
+                         [(7, 't.1', 't.2')])
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestSimulate(unittest.TestCase):
+
+    def test_even_teams(self):
+        odds = simulate(season([100.0] * 4), 20000, seed=1)
+
+        self.assertEqual(odds.simulations, 20000)
+        for probability in odds.matchups.values():
+            self.assertAlmostEqual(probability, 0.5, delta=0.02)
+        self.assertAlmostEqual(sum(odds.playoffs.values()), 2)
+        for key in TEAMS:
+            self.assertAlmostEqual(odds.playoffs[key], 0.5, delta=0.02)
+            self.assertAlmostEqual(odds.wins[key], 1, delta=0.02)
+
+    def test_favorites(self):
+        odds = simulate(season([130.0, 100.0, 100.0, 70.0],
+                               wins={'t.4': 3}), 20000, seed=1, batch=3000)
+
+        self.assertGreater(odds.matchups[(5, 't.1', 't.2')], 0.95)
+        self.assertGreater(odds.matchups[(6, 't.2', 't.4')], 0.95)
+        self.assertGreater(odds.playoffs['t.1'], 0.9)
+        # the head start outweighs the weak schedule
+        self.assertGreater(odds.playoffs['t.4'], 0.99)
+
+    def test_seed(self):
+        first = simulate(season([110.0, 100.0, 90.0, 100.0]), 1000, seed=3)
+        second = simulate(season([110.0, 100.0, 90.0, 100.0]), 1000, seed=3)
+        self.assertEqual(first, second)
+
+    def test_processes(self):
+        seasons = [season([110.0, 100.0, 90.0, 100.0]), season([100.0] * 4)]
+        self.assertEqual(simulate_leagues(seasons, 1000, seed=5, processes=2),
+                         simulate_leagues(seasons, 1000, seed=5))
@@ -0,0 +1,94 @@
+import pickle
+import time
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory, YahooFantasySportsError
+from yahoo_fantasy_sports.breaker import CircuitBreaker
+from yahoo_fantasy_sports.game import Game, Games
+from yahoo_fantasy_sports.snapshot import dumps, loads
+from yahoo_fantasy_sports.testing import FakeYahoo, sample_fixtures
+from yahoo_fantasy_sports.utils import base_url
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures(teams=2, players=2))
+        self.games = GamesFactory(self.fake.oauth())('nfl', 'nba', 'mlb')
+        self.fake.reset()
+
+    def test_restore_games(self):
+        games = Games.from_snapshot(self.fake.oauth(), self.games.snapshot())
+
+        self.assertEqual(self.fake.requests, 0)
+        self.assertEqual(sorted(games.games), [348, 353, 357])
+        self.assertEqual(games.last_updated, self.games.last_updated)
+        for key in games.games:
+            self.assertEqual(games[key]._state(), self.games[key]._state())
+
+    def test_restore_game(self):
+        game = Game.from_snapshot(None, self.games[353].snapshot())
+        self.assertEqual(game.name, 'Basketball')
+        self.assertEqual(game.last_updated, self.games[353].last_updated)
+        self.assertRaises(YahooFantasySportsError, Games.from_snapshot, None,
+                          self.games[353].snapshot())
+
+    def test_stale_games_revalidate_on_access(self):
+        data = self.games.snapshot()
+        games = Games.from_snapshot(self.fake.oauth(), data, ttl=3600)
+        games[348]
+        self.assertEqual(self.fake.requests, 0)
+
+        start = time.time()
+        games = Games.from_snapshot(self.fake.oauth(), data, ttl=0)
+        self.assertEqual(games[348].code, 'nfl')
+        games._revalidation.join()
+        self.assertEqual(self.fake.requests, 2)
+        self.assertGreaterEqual(games.updated_at, start)
+
+    def test_stale_games_revalidate_on_listing(self):
+        games = Games.from_snapshot(self.fake.oauth(), self.games.snapshot(),
+                                    ttl=0)
+        self.assertEqual(sorted(games.games), [348, 353, 357])
+        games._revalidation.join()
+        self.assertEqual(self.fake.requests, 2)
+
+    def test_failed_revalidation_backs_off(self):
+        games = Games.from_snapshot(self.fake.oauth(), self.games.snapshot(),
+                                    ttl=0)
+        self.fake.errors = {'games': 503}
+        games[348]
+        games._revalidation.join()
+        requests = self.fake.requests
+        self.assertGreater(requests, 0)
+
+        for _ in range(20):
+            self.assertEqual(games[348].code, 'nfl')
+        games._revalidation.join()
+        self.assertEqual(self.fake.requests, requests)
+
+    def test_no_revalidation_while_circuit_is_open(self):
+        breaker = CircuitBreaker(failures=1, latency=1,
+                                 reset_timeout=60).install()
+        self.addCleanup(breaker.uninstall)
+        breaker.record(base_url + '/games', 2.0)
+
+        games = Games.from_snapshot(self.fake.oauth(), self.games.snapshot(),
+                                    ttl=0)
+        games[348]
+        self.assertIsNone(games._revalidation)
+        self.assertEqual(self.fake.requests, 0)
+
+    def test_rejects_invalid_snapshots(self):
+        self.assertRaises(YahooFantasySportsError, loads, 'game', b'nope')
+
+        data = bytearray(dumps('game', {}))
+        data[4] = 99
+        self.assertRaises(YahooFantasySportsError, loads, 'game',
+                          bytes(data))
+
+    def test_snapshots_cannot_reference_code(self):
+        data = dumps('game', {})
+        evil = data[:5] + __import__('zlib').compress(
+            pickle.dumps({'kind': 'game', 'state': time.time}))
+        self.assertRaises(YahooFantasySportsError, loads, 'game', evil)
@@ -0,0 +1,106 @@
+import unittest
+
+from yahoo_fantasy_sports import GamesFactory, YahooFantasySportsError, utils
+from yahoo_fantasy_sports.pool import ClientPool
+from yahoo_fantasy_sports.testing import (
+    FakeYahoo, FakeYahooServer, sample_fixtures)
+from yahoo_fantasy_sports.transport import (
+    HttpxTransport, MemoryTransport, RequestsTransport, authorization)
+from yahoo_fantasy_sports.utils import base_url, yfs_put, yfs_request
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class OAuth1(object):
+
+    consumer_key = 'ck~1'
+    consumer_secret = 'cs&x'
+    access_token = 'at=2'
+    access_token_secret = 'ts 3'
+
+    def token_is_valid(self):
+        return True
+
+
+class TestAuthorization(unittest.TestCase):
+
+    def test_oauth1(self):
+        uri = base_url + '/games;game_keys=348,nba;out=game_weeks'
+        header = authorization(OAuth1(), 'GET', uri, {'format': 'json'},
+                               nonce='abc', timestamp=1700000000)
+
+        self.assertTrue(header.startswith('OAuth realm="yahooapis.com", '))
+        self.assertIn('oauth_token="at%3D2"', header)
+        # as signed by oauthlib
+        self.assertIn(
+            'oauth_signature="EbAhAlZfpcUdwsXj8v%2BcTcak3oA%3D"', header)
+
+    def test_bearer(self):
+        oauth = FakeYahoo({}).oauth()
+        self.assertEqual(authorization(oauth, 'GET', base_url),
+                         'Bearer fake-token')
+
+
+class TestTransports(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeYahoo(sample_fixtures())
+
+    def test_memory(self):
+        with MemoryTransport(self.fake.handle, history=2) as transport:
+            games = GamesFactory(OAuth1())('nfl', 'nba')
+            yfs_put(OAuth1(), base_url + '/team/348.l.1.t.1/roster', '<x/>')
+
+        self.assertEqual(games[353].game_key, '353')
+        self.assertEqual(len(transport.sent), 2)
+        method, uri, headers = transport.sent[-1]
+        self.assertEqual(method, 'PUT')
+        self.assertTrue(headers['Authorization'].startswith('OAuth '))
+        self.assertEqual(headers['Content-Type'], 'application/xml')
+        self.assertEqual(self.fake.writes[0][2], '<x/>')
+
+    def test_signed_after_rate_limiting(self):
+        events = []
+
+        class Limiter(object):
+            def acquire(self):
+                events.append('acquire')
+
+        class Token(OAuth1):
+            def token_is_valid(self):
+                events.append('sign')
+                return True
+
+        previous = utils.set_rate_limiter(Limiter())
+        self.addCleanup(utils.set_rate_limiter, previous)
+        with MemoryTransport(self.fake.handle):
+            yfs_request(Token(), base_url + '/game/nfl')
+        self.assertEqual(events, ['acquire', 'sign'])
+
+    def test_requests_to_stub(self):
+        with FakeYahooServer(self.fake) as server:
+            with RequestsTransport(base_url=server.url):
+                game = GamesFactory(self.fake.oauth())('nfl')
+        self.assertEqual(game.game_key, '348')
+        self.assertEqual(self.fake.requests, 2)
+
+    def test_pool_sends_through_backend(self):
+        transport = MemoryTransport(self.fake.handle).install()
+        self.addCleanup(transport.uninstall)
+        with ClientPool() as pool:
+            pool.add('a', self.fake.oauth()).games('nfl')
+        self.assertEqual(len(transport.sent), self.fake.requests)
+
+    @unittest.skipIf(httpx is None, "httpx is not installed")
+    def test_httpx(self):
+        with FakeYahooServer(self.fake) as server:
+            with HttpxTransport(base_url=server.url, http2=False):
+                game = GamesFactory(self.fake.oauth())('nfl')
+        self.assertEqual(game.game_key, '348')
+
+    @unittest.skipIf(httpx is not None, "httpx is installed")
+    def test_httpx_missing(self):
+        self.assertRaises(YahooFantasySportsError, HttpxTransport)
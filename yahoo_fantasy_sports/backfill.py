@@ -0,0 +1,343 @@
+from __future__ import absolute_import, division, print_function
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent import futures
+from functools import partial
+
+import six
+
+from .error import YahooFantasySportsError
+from .normalize import normalize
+from .planner import QueryPlanner
+from .ratelimit import RateLimiter
+from .utils import base_url, is_retryable
+
+logger = logging.getLogger(__name__)
+
+# stages run in this order, each one walking the keys found by the previous
+STAGES = ('leagues', 'teams', 'rosters', 'stats')
+
+TABLES = ('leagues', 'teams', 'rosters', 'player_stats')
+
+CHECKPOINT = 'checkpoint.json'
+
+# os.rename does not replace existing files on Windows
+_replace = getattr(os, 'replace', os.rename)
+
+
+class Backfill(object):
+    """
+    Exports every league of a game the user belongs to, their teams, weekly
+    rosters and weekly player stats as JSON lines files in ``path``, one per
+    table in ``TABLES``.
+
+    Requests are batched by a ``QueryPlanner`` and sent by ``workers``
+    threads. Progress is checkpointed in ``path``: running a backfill again
+    on the same directory resumes where the previous run stopped, dropping
+    any row written after its last checkpoint.
+
+    >>> Backfill(oauth, '348', 'export/2015', rate=10).run()
+
+    :param oauth: OAuth1 instance connected to the Yahoo servers.
+    :type oauth: yahoo_oauth.Oauth1
+    :param game_key: Game to export.
+    :type game_key: str
+    :param path: Output directory, created if missing.
+    :type path: str
+    :param league_keys: Leagues to export instead of the user's leagues.
+    :type league_keys: list
+    :param weeks: Weeks to export, by default every week of the game.
+    :type weeks: list
+    :param workers: Number of requests in flight at once.
+    :type workers: int
+    :param rate: Requests per second, enforced by a ``RateLimiter`` for the
+        duration of the run.
+    :type rate: float
+    :param retries: Number of times a request failing with a retryable error
+        is sent again.
+    :type retries: int
+    :param max_keys: Maximum number of keys in a single request.
+    :type max_keys: int
+    :param checkpoint_interval: Minimum seconds between two checkpoints.
+    :type checkpoint_interval: float
+    """
+
+    def __init__(self, oauth, game_key, path, league_keys=None, weeks=None,
+                 workers=8, rate=None, retries=2, max_keys=25,
+                 checkpoint_interval=1.0):
+        self._oauth = oauth
+        self.game_key = str(game_key)
+        self.path = path
+        self.league_keys = league_keys
+        self.weeks = weeks
+        self.workers = workers
+        self.rate = rate
+        self.retries = retries
+        self.max_keys = max_keys
+        self.checkpoint_interval = checkpoint_interval
+        self.requests = 0
+        self._files = {}
+        self._state = None
+        self._players = None
+        self._saved_at = 0.0
+        self._lock = threading.Lock()
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def __repr__(self):
+        return "<{0} {1} {2}>".format(self.__class__.__name__, self.game_key,
+                                      self.path)
+
+    @property
+    def completed(self):
+        """
+        Stages completed so far, including by previous runs.
+        """
+        state = self._state or self._load()
+        return list(state['stages'])
+
+    def run(self):
+        """
+        Runs, or resumes, the backfill.
+
+        :returns: Number of rows written per table by the whole backfill.
+        :rtype: dict
+        :raises YahooFantasySportsError: If ``path`` holds a backfill of
+            another game.
+        """
+        self._state = self._load()
+        self._players = set(self._state['keys']['player'])
+        self._open()
+        limiter = RateLimiter(self.rate, burst=self.workers) \
+            if self.rate else None
+        try:
+            if limiter is not None:
+                limiter.install()
+            for stage in STAGES:
+                if stage not in self._state['stages']:
+                    self._run_stage(stage)
+        finally:
+            if limiter is not None:
+                limiter.uninstall()
+            self._save()
+            self._close()
+
+        return dict(self._state['rows'])
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.path, CHECKPOINT)) as f:
+                state = json.load(f)
+        except IOError:
+            return {
+                'game_key': self.game_key,
+                'stages': [],
+                'done': [],
+                'weeks': None,
+                'keys': {'league': [], 'team': [], 'player': []},
+                'offsets': dict((table, 0) for table in TABLES),
+                'rows': dict((table, 0) for table in TABLES),
+            }
+
+        if state['game_key'] != self.game_key:
+            raise YahooFantasySportsError(
+                "'{0}' holds a backfill of game {1}".format(
+                    self.path, state['game_key']))
+        return state
+
+    def _save(self):
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+        self._state['offsets'] = dict(
+            (table, f.tell()) for table, f in six.iteritems(self._files))
+
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._state, f)
+        _replace(tmp, os.path.join(self.path, CHECKPOINT))
+        self._saved_at = time.time()
+
+    def _open(self):
+        for table in TABLES:
+            filename = os.path.join(self.path, table + '.jsonl')
+            f = open(filename, 'ab')
+            # rows written after the last checkpoint are fetched again
+            f.truncate(self._state['offsets'][table])
+            f.seek(0, os.SEEK_END)
+            self._files[table] = f
+
+    def _close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def _write(self, table, rows):
+        f = self._files[table]
+        for row in rows:
+            f.write(json.dumps(row, sort_keys=True).encode('utf-8') + b'\n')
+        self._state['rows'][table] += len(rows)
+
+    def _run_stage(self, stage):
+        keys = self._state['keys']
+        planner = QueryPlanner(self._oauth, max_keys=self.max_keys)
+
+        if stage == 'leagues':
+            if self.league_keys is None:
+                self._discover_leagues()
+            else:
+                keys['league'] = [str(k) for k in self.league_keys]
+            if self._state['weeks'] is None:
+                self._state['weeks'] = self._game_weeks()
+        elif stage == 'teams':
+            for key in keys['league']:
+                planner.add('league', key, sub='teams',
+                            callback=self._teams)
+        elif stage == 'rosters':
+            for week in self._state['weeks']:
+                for key in keys['team']:
+                    planner.add('team', key,
+                                sub='roster;week={0}'.format(week),
+                                callback=partial(self._roster, week))
+        elif stage == 'stats':
+            for week in self._state['weeks']:
+                for key in keys['player']:
+                    planner.add('player', key,
+                                sub='stats;type=week;week={0}'.format(week),
+                                callback=partial(self._player_stats, week))
+
+        done = set(self._state['done'])
+        self._execute([r for r in planner.plan() if r.uri not in done])
+
+        self._state['stages'].append(stage)
+        self._state['done'] = []
+        self._save()
+
+    def _execute(self, requests):
+        executor = futures.ThreadPoolExecutor(max_workers=self.workers)
+        running = []
+        try:
+            running = [executor.submit(self._fetch, request)
+                       for request in requests]
+            for future in futures.as_completed(running):
+                request = future.result()
+                # callbacks write rows, run them from a single thread
+                request.resolve()
+                for key, error in six.iteritems(request.errors):
+                    logger.warning("Skipping %s %s: %s", request.resource,
+                                   key, error)
+                self._state['done'].append(request.uri)
+                if time.time() - self._saved_at >= self.checkpoint_interval:
+                    self._save()
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+
+    def _fetch(self, request):
+        for attempt in range(self.retries + 1):
+            try:
+                return request.fetch(self._oauth)
+            except Exception as e:
+                if attempt == self.retries or not is_retryable(e):
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+            finally:
+                with self._lock:
+                    self.requests += 1
+
+    def _discover_leagues(self):
+        from .utils import yfs_request
+
+        uri = '{0}/users;use_login=1/games;game_keys={1}/leagues'.format(
+            base_url, self.game_key)
+        response = yfs_request(self._oauth, uri)
+        self.requests += 1
+
+        league_keys = []
+        for user in normalize(response)['users']:
+            for game in user.get('games', []):
+                league_keys.extend(
+                    league['league_key'] for league in game.get('leagues', []))
+        self._state['keys']['league'] = league_keys
+
+    def _game_weeks(self):
+        if self.weeks is not None:
+            return list(self.weeks)
+
+        from .game import Game
+        game = Game(self._oauth, self.game_key)
+        self.requests += 2
+        return list(range(1, len(game.game_weeks) + 1))
+
+    def _teams(self, response):
+        if response is None:
+            return
+        league = normalize(response)['league']
+        league_key = league['league_key']
+        self._write('leagues', [{
+            'league_key': league_key,
+            'game_key': self.game_key,
+            'name': league.get('name'),
+            'season': league.get('season'),
+            'num_teams': league.get('num_teams'),
+        }])
+
+        rows = [{
+            'team_key': team['team_key'],
+            'league_key': league_key,
+            'name': team.get('name'),
+        } for team in league.get('teams', [])]
+        self._write('teams', rows)
+        self._state['keys']['team'].extend(r['team_key'] for r in rows)
+
+    def _roster(self, week, response):
+        if response is None:
+            return
+        team = normalize(response)['team']
+        players = self._state['keys']['player']
+
+        rows = []
+        for player in team['roster'].get('players', []):
+            player_key = player['player_key']
+            rows.append({
+                'team_key': team['team_key'],
+                'week': week,
+                'player_key': player_key,
+                'position': player.get('selected_position', {}).get(
+                    'position'),
+            })
+            if player_key not in self._players:
+                self._players.add(player_key)
+                players.append(player_key)
+        self._write('rosters', rows)
+
+    def _player_stats(self, week, response):
+        if response is None:
+            return
+        player = normalize(response)['player']
+
+        self._write('player_stats', [{
+            'player_key': player['player_key'],
+            'week': week,
+            'stat_id': int(stat['stat_id']),
+            'value': stat['value'],
+        } for stat in player['player_stats']['stats']])
+
+
+def backfill(oauth, game_key, path, **kwargs):
+    """
+    Runs or resumes a ``Backfill``, see its parameters.
+
+    :returns: Number of rows written per table.
+    :rtype: dict
+    """
+    return Backfill(oauth, game_key, path, **kwargs).run()
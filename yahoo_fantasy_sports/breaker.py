@@ -0,0 +1,158 @@
+from __future__ import absolute_import, division, print_function
+
+import threading
+from timeit import default_timer
+
+from . import utils
+from .error import YahooFantasySportsError
+from .instrumentation import resource_type
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpen(YahooFantasySportsError):
+    """
+    Raised instead of sending a request to an endpoint whose circuit is
+    open.
+    """
+    pass
+
+
+class _Circuit(object):
+
+    __slots__ = ('failures', 'opened_at', 'probing')
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+
+class CircuitBreaker(object):
+    """
+    Thread-safe circuit breaker failing fast instead of sending requests to
+    an endpoint class (``game``, ``league``, ``team``, ...) that keeps
+    failing.
+
+    A request fails when Yahoo answers with a retryable error, cannot be
+    reached, or takes more than ``latency`` seconds to answer. After
+    ``failures`` consecutive failures the circuit of the endpoint opens and
+    requests to it raise ``CircuitOpen``, unless a cached response can be
+    served instead. Once ``reset_timeout`` seconds have passed, a single
+    request is let through: the circuit closes if it succeeds and opens
+    again otherwise.
+
+    >>> breaker = CircuitBreaker(failures=3, latency=5).install()
+
+    :param failures: Consecutive failures opening the circuit.
+    :type failures: int
+    :param latency: Seconds after which a successful request still counts
+        as a failure, or ``None``.
+    :type latency: float
+    :param reset_timeout: Seconds an open circuit waits before letting a
+        request through.
+    :type reset_timeout: float
+    """
+
+    def __init__(self, failures=5, latency=None, reset_timeout=30.0):
+        if failures < 1:
+            raise ValueError("failures must be at least 1")
+        self.failures = failures
+        self.latency = latency
+        self.reset_timeout = reset_timeout
+        self._circuits = {}
+        self._lock = threading.Lock()
+        self._previous = None
+
+    def __repr__(self):
+        return "<{0} failures={1} latency={2}>".format(
+            self.__class__.__name__, self.failures, self.latency)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def install(self):
+        """
+        Makes every request sent to Yahoo go through this breaker.
+        """
+        self._previous = utils.set_circuit_breaker(self)
+        return self
+
+    def uninstall(self):
+        utils.set_circuit_breaker(self._previous)
+        self._previous = None
+
+    def state(self, endpoint):
+        """
+        Returns the state of the circuit of ``endpoint``, e.g. ``'team'``:
+        ``'closed'``, ``'open'`` or ``'half-open'``.
+
+        :rtype: str
+        """
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or circuit.opened_at is None:
+                return CLOSED
+            if circuit.probing or \
+                    default_timer() - circuit.opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return OPEN
+
+    def refuses(self, uri):
+        """
+        Returns whether a request to ``uri`` would raise ``CircuitOpen``
+        right now, without letting it through.
+
+        :rtype: bool
+        """
+        return self.state(resource_type(uri)) == OPEN
+
+    def acquire(self, uri):
+        """
+        Lets a request to ``uri`` through, or raises ``CircuitOpen``.
+
+        :raises CircuitOpen: If the circuit of the endpoint is open, or
+            half-open with a request already on its way.
+        """
+        endpoint = resource_type(uri)
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or circuit.opened_at is None:
+                return
+            if not circuit.probing and \
+                    default_timer() - circuit.opened_at >= self.reset_timeout:
+                circuit.probing = True
+                return
+        raise CircuitOpen("Circuit of '{0}' requests is open".format(endpoint))
+
+    def record(self, uri, elapsed, error=None):
+        """
+        Records the outcome of a request let through by ``acquire``.
+
+        :param elapsed: Seconds the request took.
+        :type elapsed: float
+        :param error: Exception raised by the request, if any.
+        """
+        failed = utils.is_retryable(error) if error is not None else \
+            self.latency is not None and elapsed > self.latency
+        endpoint = resource_type(uri)
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None:
+                if not failed:
+                    return
+                circuit = self._circuits[endpoint] = _Circuit()
+
+            if not failed:
+                circuit.failures = 0
+                circuit.opened_at = None
+            else:
+                circuit.failures += 1
+                if circuit.probing or circuit.failures >= self.failures:
+                    circuit.opened_at = default_timer()
+            circuit.probing = False
@@ -0,0 +1,266 @@
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from . import utils
+from .instrumentation import resource_type
+from .replay import normalize_uri
+
+PUBLIC = 'public'
+
+# resources whose responses are identical for every user
+PUBLIC_RESOURCES = ('game',)
+
+# sub-resources of public resources that are identical for every user too;
+# anything else nested under them, such as leagues, teams or players, is
+# seen in the context of the user
+PUBLIC_SUBRESOURCES = ('game_weeks', 'stat_categories', 'position_types',
+                       'roster_positions')
+
+
+def cache_scope(oauth, uri, public_resources=PUBLIC_RESOURCES):
+    """
+    Returns the scope a response to ``uri`` may be shared in: ``'public'``
+    for data that is the same for every user, ``'user:<id>'`` for anything
+    else, or ``None`` if the user behind ``oauth`` cannot be identified, in
+    which case the response must not be cached at all.
+
+    :rtype: str
+    """
+    if _is_public(uri, public_resources):
+        return PUBLIC
+
+    identity = getattr(oauth, 'guid', None) or \
+        getattr(oauth, 'access_token', None)
+    if not identity:
+        return None
+    return 'user:' + hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def _is_public(uri, public_resources):
+    if 'use_login' in uri or resource_type(uri) not in public_resources:
+        return False
+
+    path = uri.split('?', 1)[0]
+    if '/fantasy/v2' in path:
+        path = path.split('/fantasy/v2', 1)[1]
+    segments = path.strip('/').split('/')
+    # a single resource is followed by its key, a collection is not
+    nested = segments[1:] if segments[0].split(';', 1)[0].endswith('s') \
+        else segments[2:]
+
+    subresources = [segment.split(';', 1)[0] for segment in nested]
+    for segment in segments:
+        for part in segment.split(';')[1:]:
+            name, _, value = part.partition('=')
+            if name == 'out':
+                subresources.extend(value.split(','))
+    return all(sub in PUBLIC_SUBRESOURCES for sub in subresources if sub)
+
+
+class SQLiteCache(object):
+    """
+    Response cache shared by every process on a machine, stored in a SQLite
+    database in WAL mode so that readers never block on writers.
+
+    Public responses (game metadata and its weeks, stat categories, position
+    types and roster positions) are shared by every user, anything else
+    is only ever served back to the user it was fetched for. Entries expire
+    after ``ttl`` seconds, or ``public_ttl`` for public ones, but are kept
+    for ``stale_ttl`` more seconds during which they are served marked as
+    stale while being refreshed in the background. While the circuit
+    breaker refuses requests to an endpoint, its expired entries are served
+    as stale whatever their age. Whenever the stored bodies exceed
+    ``max_bytes``, entries past ``stale_ttl`` and then the entries closest
+    to expiry are evicted.
+
+    >>> cache = SQLiteCache('/tmp/yfs-cache.sqlite').install()
+
+    :param path: Database file, created if missing.
+    :type path: str
+    :param ttl: Seconds user-scoped responses are kept.
+    :type ttl: float
+    :param public_ttl: Seconds public responses are kept.
+    :type public_ttl: float
+    :param stale_ttl: Seconds expired responses may still be served.
+    :type stale_ttl: float
+    :param max_bytes: Cap on the size of the stored bodies.
+    :type max_bytes: int
+    :param public_resources: Resource types shared by every user.
+    :type public_resources: tuple
+    """
+
+    def __init__(self, path, ttl=300, public_ttl=3600, stale_ttl=0,
+                 max_bytes=64 * 1024 * 1024,
+                 public_resources=PUBLIC_RESOURCES):
+        self.path = path
+        self.ttl = ttl
+        self.public_ttl = public_ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self.public_resources = public_resources
+        self._local = threading.local()
+        self._previous = None
+
+        with self._connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                       'scope TEXT NOT NULL, '
+                       'uri TEXT NOT NULL, '
+                       'content BLOB NOT NULL, '
+                       'size INTEGER NOT NULL, '
+                       'stored REAL NOT NULL, '
+                       'expires REAL NOT NULL, '
+                       'PRIMARY KEY (scope, uri))')
+            db.execute('CREATE INDEX IF NOT EXISTS responses_expires '
+                       'ON responses (expires)')
+            # running total of the stored bodies, kept up to date by every
+            # write so that checking it against max_bytes costs nothing
+            db.execute('CREATE TABLE IF NOT EXISTS usage ('
+                       'id INTEGER PRIMARY KEY, '
+                       'size INTEGER NOT NULL)')
+            db.execute('INSERT OR IGNORE INTO usage (id, size) '
+                       'SELECT 0, COALESCE(SUM(size), 0) FROM responses')
+
+    def __repr__(self):
+        return "<{0} {1}>".format(self.__class__.__name__, self.path)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def install(self):
+        """
+        Makes every ``yfs_request`` go through this cache.
+        """
+        self._previous = utils.set_cache(self)
+        return self
+
+    def uninstall(self):
+        utils.set_cache(self._previous)
+        self._previous = None
+
+    def _connection(self):
+        # sqlite connections can be used neither from another thread nor
+        # after a fork, so each thread of each process opens its own
+        pid = os.getpid()
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != pid:
+            db = sqlite3.connect(self.path, timeout=30,
+                                 isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+            self._local.pid = pid
+        return db
+
+    def key(self, oauth, uri):
+        scope = cache_scope(oauth, uri, self.public_resources)
+        if scope is None:
+            return None
+        return scope, normalize_uri(uri)
+
+    def get(self, key):
+        """
+        Returns the body cached for ``key`` if it has not expired.
+
+        :rtype: bytes
+        """
+        row = self._connection().execute(
+            'SELECT content FROM responses '
+            'WHERE scope = ? AND uri = ? AND expires > ?',
+            key + (time.time(),)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def get_stale(self, key, max_age=None):
+        """
+        Returns the body cached for ``key`` if it has expired less than
+        ``max_age`` seconds ago.
+
+        :param max_age: Seconds past expiry, by default ``stale_ttl``, or
+            ``float('inf')`` for any age.
+        :type max_age: float
+        :rtype: bytes
+        """
+        if max_age is None:
+            max_age = self.stale_ttl
+        if not max_age:
+            return None
+        row = self._connection().execute(
+            'SELECT content FROM responses '
+            'WHERE scope = ? AND uri = ? AND expires > ?',
+            key + (time.time() - max_age,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key, content):
+        """
+        Stores ``content`` for ``key``, replacing any previous body, then
+        evicts entries if the cache grew over ``max_bytes``.
+        """
+        now = time.time()
+        ttl = self.public_ttl if key[0] == PUBLIC else self.ttl
+        db = self._connection()
+        # the write, the running total and the eviction share a single
+        # transaction, so concurrent writers never both evict
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute('SELECT size FROM responses '
+                             'WHERE scope = ? AND uri = ?', key).fetchone()
+            db.execute('INSERT OR REPLACE INTO responses '
+                       '(scope, uri, content, size, stored, expires) '
+                       'VALUES (?, ?, ?, ?, ?, ?)',
+                       key + (sqlite3.Binary(content), len(content), now,
+                              now + ttl))
+            size = self._grow(db, len(content) - (row[0] if row else 0))
+            if size > self.max_bytes:
+                self._evict(db, now, size)
+
+    def _grow(self, db, delta):
+        db.execute('UPDATE usage SET size = size + ? WHERE id = 0', (delta,))
+        return db.execute('SELECT size FROM usage WHERE id = 0') \
+            .fetchone()[0]
+
+    def _evict(self, db, now, size):
+        size -= self._delete_expired(db, now)
+        evicted = []
+        rows = db.execute('SELECT rowid, size FROM responses '
+                          'ORDER BY expires')
+        for rowid, row_size in rows:
+            if size <= self.max_bytes:
+                break
+            evicted.append((rowid,))
+            size -= row_size
+        rows.close()
+        db.executemany('DELETE FROM responses WHERE rowid = ?', evicted)
+        db.execute('UPDATE usage SET size = ? WHERE id = 0', (size,))
+
+    def _delete_expired(self, db, now):
+        expires = now - self.stale_ttl
+        size = db.execute('SELECT COALESCE(SUM(size), 0) FROM responses '
+                          'WHERE expires <= ?', (expires,)).fetchone()[0]
+        db.execute('DELETE FROM responses WHERE expires <= ?', (expires,))
+        return size
+
+    def purge(self):
+        """
+        Deletes every entry too old to be served, even as stale.
+        """
+        db = self._connection()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            self._grow(db, -self._delete_expired(db, time.time()))
+
+    def clear(self):
+        """
+        Deletes every entry.
+        """
+        db = self._connection()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            db.execute('DELETE FROM responses')
+            db.execute('UPDATE usage SET size = 0 WHERE id = 0')
@@ -0,0 +1,132 @@
+from __future__ import absolute_import, division, print_function
+
+from collections import namedtuple
+
+import six
+
+# ``(callback, resource, sections)`` of the subscribers to change events;
+# while it is empty refreshes do not compare anything
+subscribers = []
+
+
+class Change(namedtuple('Change', 'resource section path old new')):
+    """
+    Difference found in a section of a resource by a refresh.
+
+    ``resource`` is the refreshed object, ``section`` the name of the
+    section, e.g. ``'stat_categories'``, and ``path`` the keys and list
+    indexes leading to the value within the section, empty when the section
+    is a plain value such as ``'is_available'``.
+    """
+    __slots__ = ()
+
+
+class Added(Change):
+    """
+    Value appearing at ``path``, ``old`` is ``None``.
+    """
+    __slots__ = ()
+
+
+class Removed(Change):
+    """
+    Value no longer at ``path``, ``new`` is ``None``.
+    """
+    __slots__ = ()
+
+
+class Changed(Change):
+    """
+    Value at ``path`` replaced by another one.
+    """
+    __slots__ = ()
+
+
+def subscribe(callback, resource=None, sections=None):
+    """
+    Registers ``callback`` to be called with every ``Change`` found by
+    refreshes.
+
+    >>> subscribe(print, 'game', ['is_available'])
+    >>> game.refresh()
+    Changed(resource=<Game 348>, section='is_available', path=(), ...)
+
+    :param resource: Only report changes to this kind of resource, e.g.
+        ``'game'``.
+    :type resource: str
+    :param sections: Only report changes to these sections.
+    :type sections: list
+    """
+    subscribers.append((callback, resource,
+                        frozenset(sections) if sections else None))
+
+
+def unsubscribe(callback):
+    """
+    Unregisters every subscription of ``callback``.
+    """
+    subscribers[:] = [s for s in subscribers if s[0] != callback]
+
+
+def active():
+    """
+    Returns ``True`` if anything subscribed to changes.
+    """
+    return bool(subscribers)
+
+
+def diff(old, new, path=()):
+    """
+    Yields ``(change_type, path, old, new)`` for every difference between
+    ``old`` and ``new``, going down dicts by key and lists by index.
+    """
+    if type(old) is dict and type(new) is dict:
+        for key, value in six.iteritems(old):
+            if key not in new:
+                yield Removed, path + (key,), value, None
+            elif value != new[key]:
+                for change in diff(value, new[key], path + (key,)):
+                    yield change
+        for key, value in six.iteritems(new):
+            if key not in old:
+                yield Added, path + (key,), None, value
+    elif type(old) is list and type(new) is list:
+        for index, (a, b) in enumerate(zip(old, new)):
+            if a != b:
+                for change in diff(a, b, path + (index,)):
+                    yield change
+        for index in range(len(new), len(old)):
+            yield Removed, path + (index,), old[index], None
+        for index in range(len(old), len(new)):
+            yield Added, path + (index,), None, new[index]
+    elif old != new:
+        yield Changed, path, old, new
+
+
+def publish(resource, previous):
+    """
+    Reports the changes made to the sections of ``resource`` by a refresh.
+
+    Sections are compared with ``==`` against their value before the
+    refresh, which stops at the first difference, and only walked by
+    ``diff`` when they differ.
+
+    :param previous: Section values before the refresh, as returned by
+        ``Resource._tracked``.
+    :type previous: dict
+    """
+    changes = []
+    for section, name in sorted(six.iteritems(resource.tracked_sections)):
+        old, new = previous.get(section), getattr(resource, name, None)
+        if old is new or old == new:
+            continue
+        for kind, path, a, b in diff(old, new):
+            changes.append(kind(resource, section, path, a, b))
+
+    for change in changes:
+        for callback, wanted, sections in list(subscribers):
+            if wanted is not None and wanted != resource.resource:
+                continue
+            if sections is not None and change.section not in sections:
+                continue
+            callback(change)
@@ -1,11 +1,50 @@
 from __future__ import absolute_import, division, print_function
 
-from abc import ABCMeta
+from abc import ABCMeta, abstractmethod
 from six import add_metaclass
 
+from .freshness import Freshness
+
 
 @add_metaclass(ABCMeta)
-class Collection(object):
+class Collection(Freshness):
     """
     Base class for creating collections such as ``Games``, ``Leagues``, etc...
     """
+
+    @abstractmethod
+    def _state(self):
+        """
+        Returns the loaded data of the collection as plain values.
+        """
+
+    @abstractmethod
+    def _restore(self, oauth, state, **kwargs):
+        """
+        Loads data returned by ``_state``.
+        """
+
+    def snapshot(self):
+        """
+        Serializes the loaded data, including ``updated_at``, so it can be
+        restored with ``from_snapshot`` without contacting Yahoo.
+
+        :rtype: bytes
+        """
+        from .snapshot import dumps
+        return dumps(self.collection, self._state())
+
+    @classmethod
+    def from_snapshot(cls, oauth, data, **kwargs):
+        """
+        Restores a collection serialized with ``snapshot``.
+
+        :param oauth: OAuth1 instance used by later refreshes.
+        :type oauth: yahoo_oauth.Oauth1
+        :param data: Snapshot.
+        :type data: bytes
+        """
+        from .snapshot import loads
+        collection = cls.__new__(cls)
+        collection._restore(oauth, loads(cls.collection, data), **kwargs)
+        return collection
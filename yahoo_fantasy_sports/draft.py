@@ -0,0 +1,199 @@
+from __future__ import absolute_import, division, print_function
+
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from functools import partial
+
+from .planner import QueryPlanner, is_key_error
+
+logger = logging.getLogger(__name__)
+
+
+class Pick(namedtuple('Pick', 'league_key pick round team_key player_key')):
+    """
+    Player drafted in a league. ``pick`` and ``round`` are numbered from 1.
+    """
+    __slots__ = ()
+
+
+class DraftTracker(object):
+    """
+    Follows live drafts, reporting each pick to subscribers as soon as a
+    poll sees it.
+
+    Every poll fetches the draft results of all tracked leagues with as few
+    ``leagues`` collection requests as possible. Yahoo lists every pick of
+    the draft from the start, with a player once it is made, so only the
+    picks after the last one seen are looked at. Leagues whose draft is over
+    are no longer polled, nor are leagues Yahoo refuses, e.g. private or
+    unknown ones, which are reported in ``errors`` instead.
+
+    >>> tracker = DraftTracker(oauth, league_keys, interval=1.0)
+    >>> tracker.subscribe(lambda pick: print(pick.player_key))
+    >>> tracker.start()
+
+    :param oauth: OAuth1 instance connected to the Yahoo servers.
+    :type oauth: yahoo_oauth.Oauth1
+    :param league_keys: Leagues to follow.
+    :type league_keys: list
+    :param interval: Seconds waited between two polls.
+    :type interval: float
+    :param max_keys: Maximum number of leagues per request.
+    :type max_keys: int
+    """
+
+    def __init__(self, oauth, league_keys, interval=2.0, max_keys=25):
+        self._oauth = oauth
+        self.interval = interval
+        self.max_keys = max_keys
+        self.picks = OrderedDict((str(key), []) for key in league_keys)
+        self._done = set()
+        # leagues refused by Yahoo, no longer polled
+        self.errors = OrderedDict()
+        self._subscribers = []
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def __repr__(self):
+        return "<{0} leagues={1} done={2}>".format(
+            self.__class__.__name__, len(self.picks), len(self._done))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def subscribe(self, callback):
+        """
+        Registers ``callback`` to be called with every new ``Pick``, in
+        draft order within each league.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def last_pick(self, league_key):
+        """
+        Returns the last pick seen in ``league_key``, or ``None``.
+
+        :rtype: Pick
+        """
+        picks = self.picks[str(league_key)]
+        return picks[-1] if picks else None
+
+    def is_over(self, league_key):
+        """
+        Returns ``True`` once every pick of the draft of ``league_key`` has
+        been made.
+
+        :rtype: bool
+        """
+        return str(league_key) in self._done
+
+    @property
+    def active(self):
+        """
+        Keys of the leagues still polled.
+        """
+        return [key for key in self.picks
+                if key not in self._done and key not in self.errors]
+
+    def poll(self):
+        """
+        Fetches the draft results of the leagues still drafting once, and
+        reports their new picks.
+
+        :returns: The new picks.
+        :rtype: list
+        :raises HTTPError: If a request failed for another reason than the
+            leagues it asked for, once the picks of the other requests have
+            been reported
+        """
+        planner = QueryPlanner(self._oauth, self.max_keys)
+        new = []
+        for league_key in self.active:
+            planner.add('league', league_key, sub='draftresults',
+                        callback=partial(self._parse, league_key, new))
+
+        # each request is resolved and its picks reported on its own, so
+        # that a failing request cannot hold back the picks of the others
+        failure = None
+        reported = 0
+        for request in planner.plan():
+            try:
+                request.execute(self._oauth)
+                refused = request.errors
+            except Exception as e:
+                if not is_key_error(e):
+                    failure = failure or e
+                    continue
+                # refused outright, e.g. a single private league
+                refused = dict.fromkeys(request.keys, e)
+            for league_key, error in refused.items():
+                logger.warning("No longer polling %s: %s", league_key, error)
+                self.errors[league_key] = error
+
+            for pick in new[reported:]:
+                for callback in list(self._subscribers):
+                    callback(pick)
+            reported = len(new)
+
+        if failure is not None:
+            raise failure
+        return new
+
+    def _parse(self, league_key, new, response):
+        if response is None:
+            return
+        results = response['fantasy_content']['league'][1].get(
+            'draft_results')
+        if not isinstance(results, dict):
+            # no draft order yet
+            return
+
+        picks = self.picks[league_key]
+        count = int(results['count'])
+        for number in range(len(picks), count):
+            result = results[str(number)]['draft_result']
+            player_key = result.get('player_key')
+            if not player_key:
+                break
+            pick = Pick(league_key, int(result['pick']), int(result['round']),
+                        result['team_key'], player_key)
+            picks.append(pick)
+            new.append(pick)
+        if count and len(picks) == count:
+            self._done.add(league_key)
+
+    def start(self):
+        """
+        Starts polling in a background thread until every draft is over or
+        ``stop`` is called.
+        """
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops polling, waiting for the poll in progress to finish.
+        """
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            thread.join()
+
+    def _run(self):
+        while self.active and not self._stopping.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Failed to poll draft results")
+            self._stopping.wait(self.interval)
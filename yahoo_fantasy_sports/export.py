@@ -0,0 +1,340 @@
+from __future__ import absolute_import, division, print_function
+
+import datetime
+import json
+import os
+
+import six
+
+from .error import YahooFantasySportsError
+
+FORMATS = ('arrow', 'parquet')
+
+# columns of every exported table, as (name, type) pairs
+SCHEMAS = {
+    'games': (
+        ('game_key', 'string'), ('game_id', 'string'), ('code', 'string'),
+        ('name', 'string'), ('season', 'string'), ('type', 'string'),
+        ('url', 'string'), ('is_registration_over', 'bool'),
+        ('is_available', 'bool'),
+    ),
+    'game_weeks': (
+        ('game_key', 'string'), ('week', 'int64'), ('start', 'date32'),
+        ('end', 'date32'),
+    ),
+    'stat_categories': (
+        ('game_key', 'string'), ('stat_id', 'int64'), ('name', 'string'),
+        ('display_name', 'string'), ('sort_order', 'int64'),
+        ('position_types', 'list<string>'),
+    ),
+    'roster_positions': (
+        ('game_key', 'string'), ('abbreviation', 'string'),
+        ('position', 'string'), ('display_name', 'string'),
+        ('position_type', 'string'),
+    ),
+    'leagues': (
+        ('league_key', 'string'), ('game_key', 'string'), ('name', 'string'),
+        ('season', 'string'), ('num_teams', 'int64'),
+    ),
+    'teams': (
+        ('team_key', 'string'), ('league_key', 'string'), ('name', 'string'),
+    ),
+    'rosters': (
+        ('team_key', 'string'), ('week', 'int64'), ('player_key', 'string'),
+        ('position', 'string'),
+    ),
+    'player_stats': (
+        ('player_key', 'string'), ('week', 'int64'), ('stat_id', 'int64'),
+        ('value', 'string'),
+    ),
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise YahooFantasySportsError(
+            "Exporting requires pyarrow, install it with "
+            "'pip install yahoo-fantasy-sports[pyarrow]'")
+    return pyarrow
+
+
+def _date(value):
+    if value is None or isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _int(value):
+    return None if value is None or value == '' else int(value)
+
+
+def _bool(value):
+    return None if value is None or value == '' else bool(int(value))
+
+
+def _text(value):
+    return None if value is None else six.text_type(value)
+
+
+_CONVERTERS = {
+    'string': _text,
+    'int64': _int,
+    'bool': _bool,
+    'date32': _date,
+    'list<string>': lambda v: None if v is None else [_text(e) for e in v],
+}
+
+
+def arrow_schema(table):
+    """
+    Returns the ``pyarrow.Schema`` of one of the tables in ``SCHEMAS``.
+    """
+    pa = _pyarrow()
+    types = {
+        'string': pa.string(),
+        'int64': pa.int64(),
+        'bool': pa.bool_(),
+        'date32': pa.date32(),
+        'list<string>': pa.list_(pa.string()),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in SCHEMAS[table]])
+
+
+class TableWriter(object):
+    """
+    Writes rows of one of the tables in ``SCHEMAS`` to a columnar file,
+    buffering ``batch_size`` rows per record batch.
+
+    Arrow IPC files (``'arrow'``) are written uncompressed so that readers
+    can memory map them and use the columns without copying or decoding.
+    Parquet files (``'parquet'``) are smaller but decoded when read.
+
+    >>> with TableWriter('player_stats.arrow', 'player_stats') as writer:
+    ...     writer.write(rows)
+
+    :param path: File to write.
+    :type path: str
+    :param table: Table name.
+    :type table: str
+    :param format: ``'arrow'`` or ``'parquet'``.
+    :type format: str
+    :param batch_size: Rows per record batch, or Parquet row group.
+    :type batch_size: int
+    """
+
+    def __init__(self, path, table, format='arrow', batch_size=65536):
+        if format not in FORMATS:
+            raise YahooFantasySportsError(
+                "Unknown format '{0}'".format(format))
+        if table not in SCHEMAS:
+            raise YahooFantasySportsError("Unknown table '{0}'".format(table))
+
+        pa = _pyarrow()
+        self.path = path
+        self.table = table
+        self.format = format
+        self.batch_size = batch_size
+        self.rows = 0
+        self.schema = arrow_schema(table)
+        self._columns = [(name, _CONVERTERS[kind])
+                         for name, kind in SCHEMAS[table]]
+        self._buffer = dict((name, []) for name, _ in self._columns)
+        self._buffered = 0
+
+        if format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._sink = pa.OSFile(path, 'wb')
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+
+    def __repr__(self):
+        return "<{0} {1} {2}>".format(self.__class__.__name__, self.table,
+                                      self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, rows):
+        """
+        Appends rows, dicts keyed by column name. Missing columns are null.
+        """
+        for row in rows:
+            buffer = self._buffer
+            for name, convert in self._columns:
+                buffer[name].append(convert(row.get(name)))
+            self._buffered += 1
+            if self._buffered >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows as a record batch.
+        """
+        if not self._buffered:
+            return
+        pa = _pyarrow()
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(self._buffer[field.name], type=field.type)
+             for field in self.schema], schema=self.schema)
+        if self.format == 'parquet':
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+        self.rows += self._buffered
+        self._buffer = dict((name, []) for name, _ in self._columns)
+        self._buffered = 0
+
+    def close(self):
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        if self.format == 'arrow':
+            self._sink.close()
+        self._writer = None
+
+
+def game_rows(game):
+    """
+    Returns the rows describing ``game`` for the ``games``, ``game_weeks``,
+    ``stat_categories`` and ``roster_positions`` tables.
+
+    :type game: Game
+    :rtype: dict
+    """
+    key = game.game_key
+    rows = {
+        'games': [{
+            'game_key': key,
+            'game_id': game.game_id,
+            'code': game.code,
+            'name': game.name,
+            'season': game.season,
+            'type': game.type,
+            'url': game.url,
+            'is_registration_over': game.is_registration_over,
+            'is_available': game.is_available,
+        }],
+        'game_weeks': [],
+        'stat_categories': [],
+        'roster_positions': [],
+    }
+
+    # weeks keep the number Yahoo gives them, seasons may not start at 1
+    for number, week in sorted(six.iteritems(game.game_weeks),
+                               key=lambda w: int(w[0])):
+        rows['game_weeks'].append({'game_key': key,
+                                   'week': int(week.get('week',
+                                                        int(number) + 1)),
+                                   'start': week['start'],
+                                   'end': week['end']})
+
+    for stat_id, stat in sorted(six.iteritems(game.stat_categories),
+                                key=lambda s: int(s[0])):
+        rows['stat_categories'].append({
+            'game_key': key,
+            'stat_id': stat_id,
+            'name': stat['name'],
+            'display_name': stat['display_name'],
+            'sort_order': stat['sort_order'],
+            'position_types': stat.get('position_types', []),
+        })
+
+    for abbreviation, position in sorted(
+            six.iteritems(game.roster_positions)):
+        row = dict(position, game_key=key, abbreviation=abbreviation)
+        rows['roster_positions'].append(row)
+
+    return rows
+
+
+def _extension(format):
+    return '.parquet' if format == 'parquet' else '.arrow'
+
+
+def export_games(games, directory, format='arrow'):
+    """
+    Exports games to one file per table in ``directory``.
+
+    >>> games = GamesFactory(oauth)('nfl', 'nba')
+    >>> export_games([games[key] for key in games.games], 'export')
+
+    :param games: Games to export.
+    :type games: list of Game
+    :param directory: Output directory, created if missing.
+    :type directory: str
+    :param format: ``'arrow'`` or ``'parquet'``.
+    :type format: str
+    :returns: Path of the file written for each table.
+    :rtype: dict
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    tables = ('games', 'game_weeks', 'stat_categories', 'roster_positions')
+    paths = dict((t, os.path.join(directory, t + _extension(format)))
+                 for t in tables)
+    writers = dict((t, TableWriter(paths[t], t, format)) for t in tables)
+    try:
+        for game in games:
+            for table, rows in six.iteritems(game_rows(game)):
+                writers[table].write(rows)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return paths
+
+
+def export_backfill(path, directory=None, format='arrow',
+                    batch_size=65536):
+    """
+    Converts the JSON lines tables written by a ``Backfill`` into columnar
+    files, streaming them so that whole seasons never have to fit in memory.
+
+    :param path: Backfill directory.
+    :type path: str
+    :param directory: Output directory, by default ``path``.
+    :type directory: str
+    :param format: ``'arrow'`` or ``'parquet'``.
+    :type format: str
+    :returns: Path of the file written for each table.
+    :rtype: dict
+    """
+    from .backfill import TABLES
+
+    directory = directory or path
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    paths = {}
+    for table in TABLES:
+        source = os.path.join(path, table + '.jsonl')
+        if not os.path.exists(source):
+            continue
+        paths[table] = os.path.join(directory, table + _extension(format))
+        with open(source) as f:
+            with TableWriter(paths[table], table, format,
+                             batch_size) as writer:
+                writer.write(json.loads(line) for line in f)
+    return paths
+
+
+def read_table(path):
+    """
+    Opens a file written by a ``TableWriter`` as a ``pyarrow.Table``. Arrow
+    IPC files are memory mapped, their columns point straight into the page
+    cache, so opening even multi-GB files is instant.
+
+    :rtype: pyarrow.Table
+    """
+    pa = _pyarrow()
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
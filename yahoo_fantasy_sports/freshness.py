@@ -0,0 +1,68 @@
+from __future__ import absolute_import, division, print_function
+
+import time
+
+
+def format_timestamp(timestamp):
+    """
+    Formats a Unix timestamp as ``'YYYY-MM-DD HH:mm:ss +00:00'`` in UTC.
+
+    :rtype: str
+    """
+    return time.strftime('%Y-%m-%d %H:%M:%S +00:00', time.gmtime(timestamp))
+
+
+class Freshness(object):
+    """
+    Tracks when a resource or collection was last loaded from Yahoo.
+
+    Subclasses set ``_updated_at`` to ``time.time()`` whenever they finish
+    loading, and may override ``ttl``, the number of seconds their data is
+    considered fresh for.
+    """
+    ttl = 300
+
+    _updated_at = None
+
+    @property
+    def updated_at(self):
+        """
+        Unix timestamp of the last load, or ``None`` if never loaded.
+        """
+        return self._updated_at
+
+    @property
+    def last_updated(self):
+        """
+        Time of the last load formatted as ``'YYYY-MM-DD HH:mm:ss +00:00'``.
+        """
+        if self._updated_at is None:
+            return None
+        return format_timestamp(self._updated_at)
+
+    @property
+    def age(self):
+        """
+        Seconds since the last load.
+        """
+        if self._updated_at is None:
+            return float('inf')
+        return time.time() - self._updated_at
+
+    @property
+    def expires_at(self):
+        """
+        Unix timestamp at which the data becomes stale according to ``ttl``.
+        """
+        if self._updated_at is None:
+            return 0.0
+        return self._updated_at + self.ttl
+
+    def is_stale(self, ttl=None):
+        """
+        Returns ``True`` if the data is older than ``ttl`` seconds, by default
+        the ``ttl`` of the resource.
+
+        :rtype: bool
+        """
+        return self.age >= (self.ttl if ttl is None else ttl)
@@ -3,9 +3,20 @@ from __future__ import absolute_import, division, print_function
 from . import Resource
 from . import Collection
 from . import YahooFantasySportsError
-from .utils import build_uri, yfs_request
+from .planner import QueryPlanner
+from . import utils
 
-import arrow
+import bisect
+import datetime
+from functools import partial
+import six
+import threading
+import time
+
+# seconds waited before revalidating games again after a failure, at most
+# their ttl, doubled on every consecutive failure up to the maximum
+REVALIDATION_RETRY = 30.0
+REVALIDATION_RETRY_MAX = 600.0
 
 
 class GamesFactory(object):
@@ -39,32 +50,121 @@ class Games(Collection):
     Games Collection.
     """
     collection = "games"
+    ttl = 3600
 
     def __init__(self, oauth, *game_keys):
         self._oauth = oauth
         self._games = {}
 
-        for key in game_keys:
-            if isinstance(key, str):
-                game = Game(oauth, key)
-            else:
-                game = Game(oauth, str(key))
+        # load every game through a single planner so that all of them are
+        # fetched with a couple of collection requests
+        planner = QueryPlanner(oauth)
+        games = [Game._planned(oauth, str(key), planner) for key in game_keys]
+        planner.execute()
+
+        for game in games:
             self._games[int(game.game_key)] = game
 
-        self._last_updated = arrow.utcnow().format('YYYY-MM-DD HH:mm:ss ZZ')
+        self._updated_at = time.time()
+        self._init_revalidation(None)
+
+    @classmethod
+    def from_snapshot(cls, oauth, data, ttl=None):
+        """
+        Restores games serialized with ``snapshot`` without contacting Yahoo.
+
+        :param oauth: OAuth1 instance used by later refreshes.
+        :type oauth: yahoo_oauth.Oauth1
+        :param data: Snapshot.
+        :type data: bytes
+        :param ttl: Seconds after which the games are considered stale. The
+            first use of the collection once they are stale, through
+            ``games[key]``, ``games.games`` or ``filter``, refreshes all of
+            them in a background thread, while the restored data keeps
+            being served. ``Game`` objects held on to are refreshed in place
+            but reading them does not check staleness, so keep going through
+            the collection.
+        :type ttl: float
+        """
+        return super(Games, cls).from_snapshot(oauth, data, ttl=ttl)
+
+    def _state(self):
+        return {
+            'games': [game._state() for game in self._games.values()],
+            'updated_at': self._updated_at,
+        }
+
+    def _restore(self, oauth, state, ttl=None):
+        self._oauth = oauth
+        self._games = {}
+
+        for game_state in state['games']:
+            game = Game.__new__(Game)
+            game._restore(oauth, game_state)
+            self._games[int(game.game_key)] = game
+
+        self._updated_at = state['updated_at']
+        self._init_revalidation(ttl)
+
+    def _init_revalidation(self, ttl):
+        self._ttl = ttl
+        self._revalidation = None
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._retry_at = None
+
+    def _revalidate(self):
+        """
+        Starts refreshing the games in the background if they are stale,
+        unless the last attempt failed too recently or the circuit breaker
+        refuses game requests.
+        """
+        if self._ttl is None or not self.is_stale(self._ttl):
+            return
+        if self._retry_at is not None and time.time() < self._retry_at:
+            return
+        breaker = utils._breaker
+        if breaker is not None and breaker.refuses(utils.base_url + '/games'):
+            return
+
+        with self._lock:
+            if self._revalidation is not None and \
+                    self._revalidation.is_alive():
+                return
+            self._revalidation = threading.Thread(
+                target=self._background_refresh)
+            self._revalidation.daemon = True
+            self._revalidation.start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            import logging
+            logging.getLogger(__name__).exception(
+                "Failed to revalidate %s", self)
+            self._failures += 1
+            delay = min(max(self._ttl, 1.0), REVALIDATION_RETRY) * \
+                2 ** (self._failures - 1)
+            self._retry_at = time.time() + min(delay, REVALIDATION_RETRY_MAX)
+        else:
+            self._failures = 0
+            self._retry_at = None
 
     def __repr__(self):
         return "<{0} {1}>".format(
                 self.__class__.__name__, str(self._games))
 
     def __getitem__(self, key):
+        self._revalidate()
         return self._games[key]
 
     def filter(self, is_available=None, game_types=None, game_codes=None,
                seasons=None):
+        self._revalidate()
         filtered_game_keys = []
 
-        for key, game in self._games.iteritems():
+        for key, game in six.iteritems(self._games):
             if is_available and not game.is_available:
                 continue
 
@@ -86,132 +186,211 @@ class Games(Collection):
         Refreshes the entire object to contain the latest data from the Yahoo
         servers.
         """
-        for game in self._games:
-            game.refresh()
+        planner = QueryPlanner(self._oauth)
+        previous = []
+        for game in self._games.values():
+            previous.append((game, game._tracked()))
+            game._plan_refresh(planner)
+        planner.execute()
+        self._updated_at = time.time()
+        for game, sections in previous:
+            game._publish_changes(sections)
 
     @property
     def games(self):
+        self._revalidate()
         return self._games.keys()
 
-    @property
-    def last_updated(self):
-        return self._last_updated
-
 
 class Game(Resource):
     """
     Game Resource
     """
     resource = "game"
+    ttl = 3600
+    sections = ('game_weeks', 'stat_categories', 'position_types',
+                'roster_positions')
+    tracked_sections = {
+        'game_weeks': '_game_weeks',
+        'stat_categories': '_stats',
+        'position_types': '_position_types',
+        'roster_positions': '_roster_positions',
+        'is_available': '_is_available',
+        'is_registration_over': '_is_registration_over',
+    }
+
+    # lookup tables derived from the sections, rebuilt on every refresh and
+    # restore rather than stored in snapshots
+    _indexes = ('_stats_by_id', '_stat_ids_by_position_type',
+                '_stat_ids_by_display_name', '_week_starts', '_week_ends',
+                '_week_numbers')
 
     def __init__(self, oauth, game_key):
         self._oauth = oauth
         self._game_key = game_key
         self.refresh()
 
+    @classmethod
+    def _planned(cls, oauth, game_key, planner):
+        """
+        Creates a game that is loaded once ``planner`` is executed.
+        """
+        game = cls.__new__(cls)
+        game._oauth = oauth
+        game._game_key = game_key
+        game._plan_refresh(planner)
+        return game
+
     def refresh(self):
         """
         Refreshes the entire object to contain the latest data from the Yahoo
         servers.
         """
-        self._refresh_meta()
-        self._refresh_game_weeks()
-        self._refresh_stat_categories()
-        self._refresh_position_types()
-        self._refresh_roster_positions()
-        self._refresh_is_available()
-        self._last_updated = arrow.utcnow().format('YYYY-MM-DD HH:mm:ss ZZ')
-
-    def _refresh_meta(self):
-        uri = build_uri(self.resource, resource_key=self._game_key)
-        metadata = yfs_request(self._oauth, uri)['fantasy_content']['game'][0]
-        self._game_key = metadata['game_key']
-        self._game_id = metadata['game_id']
-        self._code = metadata['code']
-        self._name = metadata['name']
-        self._url = metadata['url']
-        self._season = metadata['season']
-        self._is_registration_over = metadata['is_registration_over']
-        self._type = metadata['type']
-
-    def _refresh_game_weeks(self):
-        self._game_weeks = {}
-        uri = build_uri(self.resource, resource_key=self._game_key,
-                        sub='game_weeks')
-        weeks = yfs_request(self._oauth, uri)['fantasy_content']['game'][1]
-        weeks = weeks['game_weeks']
-
-        for number, week in weeks.iteritems():
-            # skip 'count' field
-            if number == 'count':
-                continue
-
-            self._game_weeks[number] = {
-                'start': week['game_week']['start'],
-                'end': week['game_week']['end']
-            }
+        planner = QueryPlanner(self._oauth)
+        previous = self._tracked()
+        self._plan_refresh(planner)
+        planner.execute()
+        self._publish_changes(previous)
 
-    def _refresh_stat_categories(self):
-        self._stats = {}
-        uri = build_uri(self.resource, resource_key=self._game_key,
-                        sub='stat_categories')
-        stats = yfs_request(self._oauth, uri)['fantasy_content']['game'][1]
-        stats = stats['stat_categories']['stats']
-
-        for stat in stats:
-            if 'position_types' in stat['stat']:
-                self._stats[stat['stat']['stat_id']] = {
-                    'sort_order': stat['stat']['sort_order'],
-                    'display_name': stat['stat']['display_name'],
-                    'name': stat['stat']['name'],
-                    'position_types': stat['stat']['position_types']
-                }
-            else:
-                self._stats[stat['stat']['stat_id']] = {
-                    'sort_order': stat['stat']['sort_order'],
-                    'display_name': stat['stat']['display_name'],
-                    'name': stat['stat']['name']
-                }
-
-    def _refresh_position_types(self):
-        self._position_types = {}
-        uri = build_uri(self.resource, resource_key=self._game_key,
-                        sub='position_types')
-        position_types = yfs_request(self._oauth, uri)['fantasy_content']
-        position_types = position_types['game'][1]['position_types']
-
-        for position_type in position_types:
-            self._position_types[position_type['position_type']['type']] = \
-                position_type['position_type']['display_name']
-
-    def _refresh_roster_positions(self):
-        self._roster_positions = {}
-        uri = build_uri(self.resource, resource_key=self._game_key,
-                        sub='roster_positions')
-        roster_positions = yfs_request(self._oauth, uri)['fantasy_content']
-        roster_positions = roster_positions['game'][1]['roster_positions']
-
-        for roster_position in roster_positions:
-            rp = roster_position['roster_position']
-            if 'position_type' in rp:
-                self._roster_positions[rp['abbreviation']] = {
-                    'position': rp['position'],
-                    'display_name': rp['display_name'],
-                    'position_type': rp['position_type']
-                }
-            else:
-                self._roster_positions[rp['abbreviation']] = {
-                    'position': rp['position'],
-                    'display_name': rp['display_name'],
-                }
-
-    def _refresh_is_available(self):
-        uri = build_uri(self.resource + 's',
-                        parameters={'game_keys': self._game_key,
-                                    'is_available': 1})
-        response = \
-            yfs_request(self._oauth, uri)['fantasy_content']['games']
-        self._is_available = True if response else False
+    def _plan_refresh(self, planner):
+        """
+        Declares everything ``refresh`` needs on ``planner``. The game is
+        updated when the planner is executed.
+        """
+        # both responses are applied together once they arrived, so that
+        # readers never see new sections next to the previous availability
+        responses = {}
+
+        def arrived(name, response):
+            responses[name] = response
+            if len(responses) == 2:
+                self._refresh(responses['sections'],
+                              responses['is_available'])
+
+        planner.add(self.resource, self._game_key, out=self.sections,
+                    callback=partial(arrived, 'sections'))
+        planner.add(self.resource, self._game_key,
+                    parameters={'is_available': 1},
+                    callback=partial(arrived, 'is_available'))
+
+    def _refresh(self, response, available=None):
+        """
+        Updates the game from the response holding its sections and the one
+        to the ``is_available`` request, ``None`` when Yahoo filtered the
+        game out of it.
+        """
+        if response is None:
+            raise YahooFantasySportsError(
+                "game '{0}' was not found".format(self._game_key))
+
+        # the sections are walked directly, which is several times faster
+        # than the generic ``normalize`` on this hot path
+        game = response['fantasy_content']['game']
+        sections = game[1]
+        state = self._meta(game[0])
+        state['_game_weeks'] = self._parse_game_weeks(sections)
+        state['_stats'] = self._parse_stat_categories(sections)
+        state['_position_types'] = self._parse_position_types(sections)
+        state['_roster_positions'] = self._parse_roster_positions(sections)
+        state.update(self._indexes_for(state['_stats'],
+                                       state['_game_weeks']))
+        # games that are not available are filtered out of the response
+        state['_is_available'] = True if available else False
+        state['_updated_at'] = time.time()
+        # swapped in with a single update, so that concurrent readers see
+        # either the previous refresh or this one, never a mix of both
+        self.__dict__.update(state)
+
+    def _state(self):
+        state = super(Game, self)._state()
+        for name in self._indexes + ('_player_index',):
+            state.pop(name, None)
+        return state
+
+    def _restore(self, oauth, state):
+        super(Game, self)._restore(oauth, state)
+        self._build_indexes()
+
+    def _build_indexes(self):
+        self.__dict__.update(self._indexes_for(self._stats, self._game_weeks))
+
+    @staticmethod
+    def _indexes_for(stats, game_weeks):
+        by_id = {}
+        by_position_type = {}
+        by_display_name = {}
+        for stat_id, stat in six.iteritems(stats):
+            # player stats carry stat ids as strings
+            by_id[str(stat_id)] = stat
+            # display names are not unique, e.g. 'Int' for thrown and
+            # defensive interceptions
+            by_display_name.setdefault(stat['display_name'], []).append(
+                stat_id)
+            for position_type in stat.get('position_types', ()):
+                by_position_type.setdefault(position_type, []).append(
+                    stat_id)
+
+        # week boundaries as day ordinals sorted by start, for bisection
+        weeks = sorted(
+            (_ordinal(week['start']), _ordinal(week['end']),
+             int(week.get('week', int(number) + 1)))
+            for number, week in six.iteritems(game_weeks))
+
+        return {
+            '_stats_by_id': by_id,
+            '_stat_ids_by_position_type': dict(
+                (k, tuple(v)) for k, v in six.iteritems(by_position_type)),
+            '_stat_ids_by_display_name': dict(
+                (k, tuple(v)) for k, v in six.iteritems(by_display_name)),
+            '_week_starts': [start for start, _, _ in weeks],
+            '_week_ends': [end for _, end, _ in weeks],
+            '_week_numbers': [number for _, _, number in weeks],
+        }
+
+    @staticmethod
+    def _meta(game):
+        return {
+            '_game_key': game['game_key'],
+            '_game_id': game['game_id'],
+            '_code': game['code'],
+            '_name': game['name'],
+            '_url': game['url'],
+            '_season': game['season'],
+            '_is_registration_over': game['is_registration_over'],
+            '_type': game['type'],
+        }
+
+    # sections keep the records Yahoo sent, holding every field, in the
+    # shape ``normalize`` gives them instead of copying some of their fields
+
+    @staticmethod
+    def _parse_game_weeks(sections):
+        weeks = sections['game_weeks']
+        return dict((str(number), weeks[str(number)]['game_week'])
+                    for number in range(int(weeks['count'])))
+
+    @staticmethod
+    def _parse_stat_categories(sections):
+        stats = {}
+        for stat in sections['stat_categories']['stats']:
+            stat = stat['stat']
+            if 'position_types' in stat:
+                stat = dict(stat, position_types=[
+                    p['position_type'] for p in stat['position_types']])
+            stats[stat['stat_id']] = stat
+        return stats
+
+    @staticmethod
+    def _parse_position_types(sections):
+        return dict(
+            (p['position_type']['type'], p['position_type']['display_name'])
+            for p in sections['position_types'])
+
+    @staticmethod
+    def _parse_roster_positions(sections):
+        return dict(
+            (rp['roster_position']['abbreviation'], rp['roster_position'])
+            for rp in sections['roster_positions'])
 
     @property
     def game_key(self):
@@ -251,7 +430,7 @@ class Game(Resource):
 
     @property
     def stat_categories(self):
-        return self._stat_categories
+        return self._stats
 
     @property
     def position_types(self):
@@ -259,12 +438,135 @@ class Game(Resource):
 
     @property
     def roster_positions(self):
-        return self._roster_types
+        return self._roster_positions
 
     @property
     def is_available(self):
         return self._is_available
 
+    def week_for(self, date):
+        """
+        Returns the number of the week ``date`` falls in, or ``None`` if it
+        is outside of the season.
+
+        :param date: Day, as a date, a datetime or ``'YYYY-MM-DD'``.
+        :type date: datetime.date
+        :rtype: int
+        """
+        day = _ordinal(date)
+        index = bisect.bisect_right(self._week_starts, day) - 1
+        if index < 0 or day > self._week_ends[index]:
+            return None
+        return self._week_numbers[index]
+
     @property
-    def last_updated(self):
-        return self._last_updated
+    def current_week(self):
+        """
+        Number of the week in progress, or ``None`` out of season.
+        """
+        return self.week_for(datetime.date.today())
+
+    def stat(self, stat_id):
+        """
+        Returns the stat category ``stat_id``, an int or a string, or
+        ``None`` if the game has no such stat.
+
+        :rtype: dict
+        """
+        return self._stats_by_id.get(str(stat_id))
+
+    def stat_ids_for(self, position_type):
+        """
+        Returns the ids of the stats applying to ``position_type``, e.g.
+        ``'O'``.
+
+        :rtype: tuple
+        """
+        return self._stat_ids_by_position_type.get(position_type, ())
+
+    def stat_id_for(self, display_name, position_type=None):
+        """
+        Returns the id of the stat displayed as ``display_name``, e.g.
+        ``'Pass Yds'``, or ``None``.
+
+        :param position_type: Only consider the stats applying to this
+            position type, e.g. ``'O'``, to tell apart stats sharing a
+            display name.
+        :type position_type: str
+        :raises YahooFantasySportsError: If several stats are displayed as
+            ``display_name``
+        """
+        stat_ids = self._stat_ids_by_display_name.get(display_name, ())
+        if position_type is not None:
+            stat_ids = [stat_id for stat_id in stat_ids
+                        if stat_id in self.stat_ids_for(position_type)]
+        if len(stat_ids) > 1:
+            raise YahooFantasySportsError(
+                "Stats {0} are all displayed as '{1}', pass their "
+                "position type".format(
+                    ', '.join(str(i) for i in stat_ids), display_name))
+        return stat_ids[0] if stat_ids else None
+
+    def roster_position(self, abbreviation):
+        """
+        Returns the roster position abbreviated ``abbreviation``, e.g.
+        ``'QB'``, or ``None``.
+
+        :rtype: dict
+        """
+        return self._roster_positions.get(abbreviation)
+
+    def player_index(self, refresh=False):
+        """
+        Returns the index of the players of the game, pulled from Yahoo the
+        first time and, if ``refresh`` is true, updated with the players
+        added since.
+
+        >>> game.player_index().search('tom bra')
+        ['348.p.5228']
+
+        :rtype: yahoo_fantasy_sports.search.PlayerIndex
+        """
+        from .search import PlayerIndex
+
+        index = getattr(self, '_player_index', None)
+        if index is None:
+            index = self._player_index = PlayerIndex.build(
+                self._oauth, self.game_key)
+        elif refresh:
+            index.refresh(self._oauth)
+        return index
+
+    def decode_stats(self, stats):
+        """
+        Maps the display name of every stat in ``stats`` to its value.
+        Stats unknown to the game are keyed by their id.
+
+        >>> game.decode_stats(normalize(response)['player']['player_stats']
+        ...                   ['stats'])
+        {'Pass Yds': '305', 'Pass TD': '2', ...}
+
+        :param stats: Stats as listed in a player response, either
+            normalized or as sent by Yahoo.
+        :type stats: list
+        :rtype: dict
+        """
+        by_id = self._stats_by_id
+        decoded = {}
+        for stat in stats:
+            stat = stat.get('stat', stat)
+            stat_id = stat['stat_id']
+            category = by_id.get(str(stat_id))
+            name = category['display_name'] if category else stat_id
+            decoded[name] = stat['value']
+        return decoded
+
+
+def _ordinal(date):
+    if isinstance(date, six.string_types):
+        # 'YYYY-MM-DD', sliced as strptime dominates the refresh otherwise
+        return datetime.date(
+            int(date[:4]), int(date[5:7]), int(date[8:10])).toordinal()
+    if isinstance(date, datetime.datetime):
+        date = date.date()
+    return date.toordinal()
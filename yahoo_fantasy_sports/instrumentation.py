@@ -0,0 +1,297 @@
+from __future__ import absolute_import, division, print_function
+
+import threading
+from collections import defaultdict
+
+import six
+
+# hooks called by ``yfs_request`` before and after every request; when both
+# are empty requests are sent without any timing or bookkeeping
+pre_hooks = []
+post_hooks = []
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+
+def add_hook(pre=None, post=None):
+    """
+    Registers hooks called with a ``RequestEvent`` before and after every
+    request sent through ``yfs_request``.
+
+    :param pre: Called before the request is sent.
+    :type pre: callable
+    :param post: Called once the request completed or failed.
+    :type post: callable
+    """
+    if pre is not None:
+        pre_hooks.append(pre)
+    if post is not None:
+        post_hooks.append(post)
+
+
+def remove_hook(pre=None, post=None):
+    """
+    Unregisters hooks added with ``add_hook``.
+    """
+    if pre is not None and pre in pre_hooks:
+        pre_hooks.remove(pre)
+    if post is not None and post in post_hooks:
+        post_hooks.remove(post)
+
+
+def active():
+    """
+    Returns ``True`` if any hook is registered.
+    """
+    return bool(pre_hooks or post_hooks)
+
+
+def uri_template(uri):
+    """
+    Returns ``uri`` with its keys and parameter values replaced by
+    placeholders, e.g. ``/teams;team_keys={team_keys}/roster;week={week}``.
+    ``;out=`` values are kept since they change what is fetched.
+
+    :rtype: str
+    """
+    path = uri.split('?', 1)[0]
+    if '/fantasy/v2' in path:
+        path = path.split('/fantasy/v2', 1)[1]
+
+    segments = []
+    resource = None
+    for segment in path.strip('/').split('/'):
+        parts = segment.split(';')
+        name = parts[0]
+        if resource is not None:
+            name = '{' + resource + '_key}'
+            resource = None
+        elif len(segments) == 0 and not name.endswith('s'):
+            resource = name
+
+        params = []
+        for part in parts[1:]:
+            param, _, value = part.partition('=')
+            if param != 'out':
+                value = '{' + param + '}'
+            params.append(param + '=' + value)
+        segments.append(';'.join([name] + params))
+
+    return '/' + '/'.join(segments)
+
+
+def resource_type(uri):
+    """
+    Returns the resource type a URI starts with, e.g. ``'game'`` for both
+    ``/game/nfl`` and ``/games;game_keys=nfl``.
+
+    :rtype: str
+    """
+    path = uri.split('?', 1)[0]
+    if '/fantasy/v2' in path:
+        path = path.split('/fantasy/v2', 1)[1]
+    name = path.strip('/').split('/', 1)[0].split(';', 1)[0]
+    return name[:-1] if name.endswith('s') else name
+
+
+class RequestEvent(object):
+    """
+    Describes a single request sent through ``yfs_request``.
+
+    ``cache`` is ``None`` when no cache was involved, otherwise one of
+    ``'hit'``, ``'miss'`` or ``'stale'``, or ``'revalidate'`` for the
+    request refreshing a stale response in the background. Times are in
+    seconds.
+    """
+
+    __slots__ = ('uri', 'method', 'status', 'bytes', 'network_time',
+                 'decode_time', 'cache', 'error', '_template', '_resource')
+
+    def __init__(self, uri, method='GET'):
+        self.uri = uri
+        self.method = method
+        self.status = None
+        self.bytes = 0
+        self.network_time = 0.0
+        self.decode_time = 0.0
+        self.cache = None
+        self.error = None
+        self._template = None
+        self._resource = None
+
+    def __repr__(self):
+        return "<{0} {1} {2} {3}>".format(
+            self.__class__.__name__, self.method, self.uri_template,
+            self.status)
+
+    @property
+    def uri_template(self):
+        if self._template is None:
+            self._template = uri_template(self.uri)
+        return self._template
+
+    @property
+    def resource(self):
+        if self._resource is None:
+            self._resource = resource_type(self.uri)
+        return self._resource
+
+
+def pre_request(event):
+    for hook in pre_hooks:
+        hook(event)
+
+
+def post_request(event):
+    for hook in post_hooks:
+        hook(event)
+
+
+class Histogram(object):
+    """
+    Cumulative histogram with fixed bucket upper bounds.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Returns ``(upper_bound, count)`` pairs, the last one being ``+Inf``.
+        """
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class MetricsAggregator(object):
+    """
+    Keeps request counters and latency histograms per resource type.
+
+    >>> metrics = MetricsAggregator().install()
+    >>> games = GamesFactory(oauth)('nfl')
+    >>> print(metrics.to_prometheus())
+
+    :param buckets: Upper bounds in seconds of the latency histograms.
+    :type buckets: tuple
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def install(self):
+        """
+        Registers the aggregator as a post request hook.
+        """
+        add_hook(post=self.post_request)
+        return self
+
+    def uninstall(self):
+        remove_hook(post=self.post_request)
+
+    def reset(self):
+        with self._lock:
+            self._requests = defaultdict(int)
+            self._bytes = defaultdict(int)
+            self._network = defaultdict(lambda: Histogram(self._buckets))
+            self._decode = defaultdict(lambda: Histogram(self._buckets))
+
+    def post_request(self, event):
+        status = str(event.status) if event.status is not None else 'error'
+        cache = event.cache or 'none'
+
+        with self._lock:
+            self._requests[(event.resource, status, cache)] += 1
+            self._bytes[event.resource] += event.bytes
+            # responses served from the cache never went over the network
+            if event.cache not in ('hit', 'stale'):
+                self._network[event.resource].observe(event.network_time)
+            self._decode[event.resource].observe(event.decode_time)
+
+    def snapshot(self):
+        """
+        Returns the current values as plain dicts.
+
+        :rtype: dict
+        """
+        def histograms(source):
+            return dict((resource, {
+                'count': h.count,
+                'sum': h.sum,
+                'buckets': [[b, c] for b, c in h.cumulative()],
+            }) for resource, h in six.iteritems(source))
+
+        with self._lock:
+            return {
+                'requests': [
+                    {'resource': r, 'status': s, 'cache': c, 'count': n}
+                    for (r, s, c), n in sorted(six.iteritems(self._requests))
+                ],
+                'bytes': dict(self._bytes),
+                'network_seconds': histograms(self._network),
+                'decode_seconds': histograms(self._decode),
+            }
+
+    def to_prometheus(self, prefix='yfs'):
+        """
+        Returns the current values in the Prometheus text exposition format.
+
+        :rtype: str
+        """
+        lines = []
+        with self._lock:
+            name = prefix + '_requests_total'
+            lines.append('# HELP {0} Requests sent to Yahoo.'.format(name))
+            lines.append('# TYPE {0} counter'.format(name))
+            for (resource, status, cache), count in \
+                    sorted(six.iteritems(self._requests)):
+                lines.append(
+                    '{0}{{resource="{1}",status="{2}",cache="{3}"}} {4}'
+                    .format(name, resource, status, cache, count))
+
+            name = prefix + '_response_bytes_total'
+            lines.append('# HELP {0} Response body bytes.'.format(name))
+            lines.append('# TYPE {0} counter'.format(name))
+            for resource, count in sorted(six.iteritems(self._bytes)):
+                lines.append('{0}{{resource="{1}"}} {2}'.format(
+                    name, resource, count))
+
+            for suffix, source, text in (
+                    ('network_seconds', self._network,
+                     'Time waiting for Yahoo.'),
+                    ('decode_seconds', self._decode,
+                     'Time decoding responses.')):
+                name = '{0}_request_{1}'.format(prefix, suffix)
+                lines.append('# HELP {0} {1}'.format(name, text))
+                lines.append('# TYPE {0} histogram'.format(name))
+                for resource, histogram in sorted(six.iteritems(source)):
+                    for bound, count in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(
+                            '{0}_bucket{{resource="{1}",le="{2}"}} {3}'
+                            .format(name, resource, le, count))
+                    lines.append('{0}_sum{{resource="{1}"}} {2!r}'.format(
+                        name, resource, histogram.sum))
+                    lines.append('{0}_count{{resource="{1}"}} {2}'.format(
+                        name, resource, histogram.count))
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,288 @@
+from __future__ import absolute_import, division, print_function
+
+import gc
+import os
+import sys
+import types
+from collections import namedtuple
+
+import six
+
+from . import utils
+from .collection import Collection
+from .error import YahooFantasySportsError
+from .instrumentation import resource_type
+from .resource import Resource
+
+# objects shared with the rest of the process, never counted
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType,
+                 types.BuiltinFunctionType, types.MethodType)
+
+_PACKAGE = os.path.dirname(os.path.abspath(__file__))
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Returns the bytes retained by ``obj`` and every object it references
+    through containers, ``__dict__`` and ``__slots__``. Objects already in
+    ``seen``, a set of ids updated along the way, are not counted again, so
+    that sizes measured with the same set add up.
+
+    :rtype: int
+    """
+    if seen is None:
+        seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, (six.string_types, six.binary_type, int, float)):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(six.iterkeys(obj))
+            stack.extend(six.itervalues(obj))
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        attributes = getattr(obj, '__dict__', None)
+        if attributes is not None:
+            stack.append(attributes)
+        for name in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, name):
+                stack.append(getattr(obj, name))
+    return size
+
+
+ResourceSize = namedtuple('ResourceSize', 'count bytes attributes')
+ResourceSize.__doc__ = """
+Memory retained by the live resources of a type: their number, their total
+size in bytes and the bytes held by each of their attributes.
+"""
+
+
+def resource_sizes(objects=None):
+    """
+    Returns the memory retained by resources and collections, by type.
+
+    Resources are measured before the collections holding them, which are
+    only charged for what they hold on their own. OAuth sessions are shared
+    and never counted.
+
+    :param objects: Resources and collections to measure, by default every
+        live one.
+    :type objects: list
+    :returns: ``ResourceSize`` by type name, e.g. ``'Game'``.
+    :rtype: dict
+    """
+    if objects is None:
+        objects = [o for o in gc.get_objects()
+                   if isinstance(o, (Resource, Collection))]
+    objects = sorted(objects, key=lambda o: isinstance(o, Collection))
+
+    seen = set(id(getattr(o, '_oauth', None)) for o in objects)
+    sizes = {}
+    for obj in objects:
+        name = type(obj).__name__
+        count, total, attributes = sizes.get(name, (0, 0, {}))
+        size = sys.getsizeof(obj)
+        seen.add(id(obj))
+        for attribute, value in six.iteritems(obj.__dict__):
+            retained = deep_sizeof(value, seen)
+            attributes[attribute] = attributes.get(attribute, 0) + retained
+            size += retained
+        sizes[name] = ResourceSize(count + 1, total + size, attributes)
+    return sizes
+
+
+CachedResponse = namedtuple('CachedResponse', 'source resource uri bytes')
+CachedResponse.__doc__ = """
+Response held by a cache: ``source`` is ``'cache'`` for the installed
+response cache and ``'pool'`` for the public responses of a client pool.
+"""
+
+
+def cached_responses(cache=None, pool=None):
+    """
+    Returns the responses held by the response cache and the client pool,
+    largest first.
+
+    :param cache: Cache to inspect, by default the installed one.
+    :type cache: yahoo_fantasy_sports.cache.SQLiteCache
+    :param pool: Client pool to inspect, by default the installed one.
+    :type pool: yahoo_fantasy_sports.pool.ClientPool
+    :rtype: list of CachedResponse
+    """
+    from .pool import ClientPool
+
+    cache = utils._cache if cache is None else cache
+    if pool is None and isinstance(utils._transport, ClientPool):
+        pool = utils._transport
+
+    responses = []
+    if cache is not None and hasattr(cache, '_connection'):
+        rows = cache._connection().execute(
+            'SELECT uri, size FROM responses').fetchall()
+        responses.extend(CachedResponse('cache', resource_type(uri), uri,
+                                        size) for uri, size in rows)
+    if pool is not None:
+        with pool._lock:
+            entries = list(six.iteritems(pool._public))
+        for uri, (_, response) in entries:
+            size = sys.getsizeof(response.content) + \
+                deep_sizeof(dict(response.headers))
+            responses.append(CachedResponse('pool', resource_type(uri), uri,
+                                            size))
+
+    responses.sort(key=lambda r: -r.bytes)
+    return responses
+
+
+AllocationSite = namedtuple('AllocationSite', 'traceback bytes count')
+AllocationSite.__doc__ = """
+Place where memory was allocated during a profiled block: ``traceback`` is
+a list of ``'file:line'``, innermost last, and ``bytes`` and ``count`` the
+growth of the memory and number of blocks allocated there.
+"""
+
+
+class MemoryProfile(object):
+    """
+    Profiles the memory allocated by a block of library calls with
+    ``tracemalloc``, and measures what resources and caches retain at its
+    end.
+
+    >>> with MemoryProfile() as profile:
+    ...     games = GamesFactory(oauth)('nfl', 'nba')
+    ...     games.refresh()
+    >>> print(profile.report())
+
+    :param top: Number of allocation sites kept.
+    :type top: int
+    :param frames: Frames kept per allocation site. Sites are files and
+        lines for a single frame, call stacks otherwise.
+    :type frames: int
+    :param library_only: Only keep allocations made within the library or
+        while decoding JSON, leaving out those of the calling code.
+    :type library_only: bool
+    """
+
+    def __init__(self, top=10, frames=1, library_only=True):
+        self.top = top
+        self.frames = frames
+        self.library_only = library_only
+        # set once the block exits
+        self.allocated = None
+        self.peak = None
+        self.sites = []
+        self.resources = {}
+        self.responses = []
+        self._started = False
+        self._before = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """
+        Starts tracing allocations, if they were not traced already.
+        """
+        tracemalloc = _tracemalloc()
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start(self.frames)
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self._before = self._snapshot()
+        return self
+
+    def stop(self):
+        """
+        Stops tracing allocations if ``start`` started it, and measures the
+        memory allocated and retained.
+        """
+        tracemalloc = _tracemalloc()
+        after = self._snapshot()
+        self.peak = tracemalloc.get_traced_memory()[1]
+        if self._started:
+            tracemalloc.stop()
+
+        key = 'lineno' if self.frames == 1 else 'traceback'
+        self.allocated = sum(
+            s.size_diff for s in after.compare_to(self._before, key))
+        if self.library_only:
+            wanted = [tracemalloc.Filter(True, os.path.join(_PACKAGE, '*'),
+                                         all_frames=True),
+                      tracemalloc.Filter(True, '*json*', all_frames=True)]
+            after = after.filter_traces(wanted)
+            self._before = self._before.filter_traces(wanted)
+        stats = [s for s in after.compare_to(self._before, key)
+                 if s.size_diff > 0]
+        self.sites = [AllocationSite(
+            ['{0}:{1}'.format(f.filename, f.lineno)
+             for f in s.traceback], s.size_diff, s.count_diff)
+            for s in stats[:self.top]]
+        self._before = None
+
+        self.resources = resource_sizes()
+        self.responses = cached_responses()
+
+    def _snapshot(self):
+        tracemalloc = _tracemalloc()
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ])
+
+    def report(self, responses=10):
+        """
+        Returns a human readable summary of the profile.
+
+        :param responses: Number of cached responses listed.
+        :type responses: int
+        :rtype: str
+        """
+        lines = ['allocated {0} bytes, peak {1} bytes'.format(
+            self.allocated, self.peak)]
+
+        lines.append('')
+        lines.append('retained by resources:')
+        for name, size in sorted(six.iteritems(self.resources),
+                                 key=lambda item: -item[1].bytes):
+            lines.append('  {0:<12}{1:>6} objects {2:>12} bytes'.format(
+                name, size.count, size.bytes))
+            for attribute, retained in sorted(
+                    six.iteritems(size.attributes), key=lambda a: -a[1])[:5]:
+                lines.append('    {0:<26}{1:>12} bytes'.format(
+                    attribute, retained))
+
+        lines.append('')
+        lines.append('cached responses ({0}, {1} bytes):'.format(
+            len(self.responses), sum(r.bytes for r in self.responses)))
+        for response in self.responses[:responses]:
+            lines.append('  {0:>10} bytes  {1:<6}{2}'.format(
+                response.bytes, response.source, response.uri))
+
+        lines.append('')
+        lines.append('top allocation sites:')
+        for site in self.sites:
+            lines.append('  {0:>10} bytes {1:>7} blocks  {2}'.format(
+                site.bytes, site.count, site.traceback[-1]))
+            for frame in reversed(site.traceback[:-1]):
+                lines.append('{0:>33}{1}'.format('', frame))
+        return '\n'.join(lines)
+
+
+def _tracemalloc():
+    try:
+        import tracemalloc
+    except ImportError:
+        raise YahooFantasySportsError(
+            "Profiling allocations requires tracemalloc, added in Python 3.4")
+    return tracemalloc
@@ -0,0 +1,148 @@
+from __future__ import absolute_import, division, print_function
+
+
+def normalize(payload):
+    """
+    Flattens a Yahoo response into plain records, dicts of fields, and lists
+    in a single traversal:
+
+    * resources, encoded as lists of metadata (a dict, or a list of one-field
+      dicts) followed by one dict per sub-resource, become a single record
+      holding every field and sub-resource,
+    * collections, encoded as dicts numbered from ``'0'`` with a ``'count'``
+      entry, become lists of records,
+    * lists of one-key wrappers such as ``'stats': [{'stat': {...}}]``
+      become lists of records.
+
+    Records without nested values are not copied but shared with
+    ``payload``, which must therefore not be modified afterwards.
+
+    >>> game = normalize(response)['game']
+    >>> game['code'], game['game_weeks'][0]['start']
+    ('nfl', '2015-09-10')
+
+    :param payload: Decoded response, or its ``fantasy_content``.
+    :type payload: dict
+    :rtype: dict
+    """
+    return _dict(payload.get('fantasy_content', payload))
+
+
+# the helpers below dispatch on exact types and inline the handling of
+# scalars, which make up most of a payload, to avoid a call per field
+
+
+def _node(value):
+    kind = type(value)
+    if kind is dict:
+        return _dict(value)
+    if kind is list:
+        return _list(value, None)
+    return value
+
+
+def _dict(value):
+    if 'count' in value and _is_collection(value):
+        # collection: {'0': {name: item}, ..., 'count': n}
+        items = []
+        for number in range(int(value['count'])):
+            entry = value.get(str(number))
+            if entry is None:
+                continue
+            for child, item in entry.items():
+                kind = type(item)
+                if kind is dict:
+                    items.append(_dict(item))
+                elif kind is list:
+                    items.append(_list(item, child))
+                else:
+                    items.append(item)
+        return items
+
+    for item in value.values():
+        kind = type(item)
+        if kind is dict or kind is list:
+            break
+    else:
+        # nothing to flatten
+        return value
+
+    record = {}
+    for field, item in value.items():
+        kind = type(item)
+        if kind is dict:
+            if field.isdigit():
+                # sub-resources numbered without a count, as in rosters:
+                # {'week': '1', '0': {'players': {...}}}
+                _merge(record, (item,))
+            else:
+                record[field] = _dict(item)
+        elif kind is list:
+            record[field] = _list(item, field)
+        else:
+            record[field] = item
+    return record
+
+
+def _is_collection(value):
+    for key in value:
+        if key != 'count' and not key.isdigit():
+            return False
+    return True
+
+
+def _list(value, name):
+    if not value:
+        return []
+
+    first = value[0]
+    if type(first) is dict and len(first) == 1:
+        child = next(iter(first))
+        # 'stats': [{'stat': ...}], 'eligible_positions': [{'position': ...}]
+        # even with a single entry, or several wrappers sharing a key
+        if len(value) > 1 or name is not None and (
+                name.endswith(child + 's') or name.endswith(child + 'es')):
+            items = _unwrap(value, child)
+            if items is not None:
+                return items
+
+    for part in value:
+        kind = type(part)
+        if kind is not dict and kind is not list:
+            return [_node(e) for e in value]
+
+    # resource: metadata and sub-resources merged in one record
+    record = {}
+    _merge(record, value)
+    return record
+
+
+def _unwrap(value, child):
+    items = []
+    for entry in value:
+        if type(entry) is not dict or len(entry) != 1 or child not in entry:
+            return None
+        item = entry[child]
+        kind = type(item)
+        if kind is dict:
+            items.append(_dict(item))
+        elif kind is list:
+            items.append(_list(item, child))
+        else:
+            items.append(item)
+    return items
+
+
+def _merge(record, parts):
+    for part in parts:
+        if type(part) is list:
+            _merge(record, part)
+            continue
+        for field, item in part.items():
+            kind = type(item)
+            if kind is dict:
+                record[field] = _dict(item)
+            elif kind is list:
+                record[field] = _list(item, field)
+            else:
+                record[field] = item
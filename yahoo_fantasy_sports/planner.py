@@ -0,0 +1,383 @@
+from __future__ import absolute_import, division, print_function
+
+from collections import OrderedDict
+
+import six
+
+from . import YahooFantasySportsError
+from .utils import _format_resources_key, build_uri, yfs_request
+
+# statuses Yahoo answers a collection request with when one of its keys is
+# invalid or not visible to the user, failing the keys sent along with it
+KEY_ERROR_STATUSES = (400, 403, 404)
+
+
+class PlannedAccess(object):
+    """
+    Handle returned by ``QueryPlanner.add``. Holds the part of the response
+    belonging to a single resource once the planner has been executed.
+    """
+
+    def __init__(self, resource, key, sub=None, callback=None):
+        self.resource = resource
+        self.key = str(key)
+        self.sub = sub
+        self._callback = callback
+        self._done = False
+        self._response = None
+        self._error = None
+
+    def __repr__(self):
+        return "<{0} {1}/{2} {3}>".format(
+            self.__class__.__name__, self.resource, self.key, self.sub or '')
+
+    def _resolve(self, response):
+        self._response = response
+        self._done = True
+        if self._callback is not None:
+            self._callback(response)
+
+    def _fail(self, error):
+        self._error = error
+        self._resolve(None)
+
+    @property
+    def done(self):
+        return self._done
+
+    @property
+    def error(self):
+        """
+        Error Yahoo answered with for this key alone, once the collection
+        request including it failed and was split to isolate it.
+        """
+        return self._error
+
+    def result(self):
+        """
+        Returns the response for this resource, shaped as if the resource had
+        been requested on its own, i.e.
+        ``{'fantasy_content': {resource: [metadata, {sub: ...}]}}``. Returns
+        ``None`` if Yahoo did not include the resource in the response (for
+        example when it was filtered out by a parameter such as
+        ``is_available``).
+
+        :raises YahooFantasySportsError: If the planner has not been executed
+        :raises HTTPError: If Yahoo refused this key, see ``error``
+        """
+        if not self._done:
+            raise YahooFantasySportsError(
+                "'{0}' has not been executed yet".format(self))
+        if self._error is not None:
+            raise self._error
+        return self._response
+
+
+class PlannedRequest(object):
+    """
+    A single collection request produced by the planner, along with the
+    accesses it serves.
+
+    Yahoo fails a whole collection request when a single one of its keys is
+    invalid or private. The request is then split in halves, which are sent
+    again and split in turn until the failing keys are isolated: ``errors``
+    maps them to their error while every other key gets its response. If
+    every key fails, the request is refused as a whole and its error is
+    raised.
+    """
+
+    def __init__(self, uri, resource, keys, accesses, parameters=None,
+                 path=None):
+        self.uri = uri
+        self.resource = resource
+        self.keys = keys
+        self.accesses = accesses
+        self.response = None
+        self.errors = OrderedDict()
+        # parameters other than the keys, to build the halves of the request
+        self._parameters = parameters
+        self._path = path
+        self._halves = None
+
+    def __repr__(self):
+        return "<{0} {1}>".format(self.__class__.__name__, self.uri)
+
+    def execute(self, oauth):
+        """
+        Sends the request and resolves its accesses.
+        """
+        self.fetch(oauth).resolve()
+
+    def fetch(self, oauth):
+        """
+        Sends the request without resolving the accesses yet. Requests of a
+        plan are independent of each other and may be fetched concurrently.
+
+        :returns: The request itself.
+        :rtype: PlannedRequest
+        :raises HTTPError: If the request failed for another reason than some
+            of its keys, has a single key, or failed for every one of them
+        """
+        error = self._fetch(oauth)
+        if error is not None and len(self.errors) == len(self.keys):
+            # no key got through: the request is refused as a whole rather
+            # than for some of its keys
+            raise error
+        return self
+
+    def _fetch(self, oauth):
+        # returns the error that made the request bisect, if any
+        try:
+            self.response = yfs_request(oauth, self.uri)
+        except Exception as e:
+            if len(self.keys) < 2 or self._parameters is None or \
+                    not is_key_error(e):
+                raise
+            self._bisect(oauth)
+            return e
+        return None
+
+    def _bisect(self, oauth):
+        middle = len(self.keys) // 2
+        self._halves = []
+        for keys in (self.keys[:middle], self.keys[middle:]):
+            half = PlannedRequest(
+                _collection_uri(self.resource, keys, self._parameters,
+                                self._path),
+                self.resource, keys,
+                [a for a in self.accesses if a.key in keys],
+                self._parameters, self._path)
+            try:
+                half._fetch(oauth)
+            except Exception as e:
+                if len(keys) > 1 or not is_key_error(e):
+                    raise
+                half.errors[keys[0]] = e
+            self.errors.update(half.errors)
+            self._halves.append(half)
+
+    def resolve(self):
+        """
+        Resolves the accesses, running their callbacks, with the fetched
+        response. Accesses to keys in ``errors`` are resolved with ``None``.
+        """
+        if self._halves is not None:
+            for half in self._halves:
+                half.resolve()
+        elif self.errors:
+            for access in self.accesses:
+                access._fail(self.errors[access.key])
+        else:
+            _fan_out(self, self.response)
+
+
+class QueryPlanner(object):
+    """
+    Collects resource accesses and merges them into as few collection URIs as
+    possible.
+
+    Accesses on the same resource type with the same parameters are merged
+    into one ``<resource>s;<resource>_keys=...`` request. Plain
+    sub-resources (``'standings'``, ``'game_weeks'``) are combined through
+    ``;out=``, while sub-resources carrying their own parameters or nested
+    collections (``'roster;week=5'``, ``'teams/roster'``) get one request per
+    distinct path. Key lists are split into chunks of ``max_keys``.
+
+    >>> planner = QueryPlanner(oauth)
+    >>> roster = planner.add('team', '346.l.1328.t.12', sub='roster;week=5')
+    >>> standings = planner.add('team', '346.l.1328.t.12', sub='standings')
+    >>> print(planner.explain())
+    >>> planner.execute()
+    >>> roster.result()
+
+    :param oauth: OAuth1 instance connected to the Yahoo servers.
+    :type oauth: yahoo_oauth.Oauth1
+    :param max_keys: Maximum number of keys in a single collection request.
+    :type max_keys: int
+    """
+
+    def __init__(self, oauth, max_keys=25):
+        if max_keys < 1:
+            raise YahooFantasySportsError("'max_keys' must be at least 1")
+
+        self._oauth = oauth
+        self._max_keys = max_keys
+        self._groups = OrderedDict()
+        self._count = 0
+        # keys refused by Yahoo during the last execution
+        self.errors = OrderedDict()
+
+    def __repr__(self):
+        return "<{0} accesses={1} requests={2}>".format(
+            self.__class__.__name__, self._count, len(self.plan()))
+
+    def __len__(self):
+        return self._count
+
+    def add(self, resource, key, sub=None, out=None, parameters=None,
+            callback=None):
+        """
+        Declares that the caller needs ``resource`` identified by ``key``.
+
+        :param resource: Resource type, e.g. ``'game'`` or ``'team'``.
+        :type resource: str
+        :param key: Resource key.
+        :type key: str or int
+        :param sub: Sub-resource, optionally with parameters or nested
+            collections, e.g. ``'standings'`` or ``'roster;week=5'``.
+        :type sub: str
+        :param out: Plain sub-resources to fetch along with ``sub``.
+        :type out: list
+        :param parameters: Parameters applied to the resource itself, e.g.
+            ``{'is_available': 1}``.
+        :type parameters: dict
+        :param callback: Called with the resource's response once executed.
+        :type callback: callable
+        :returns: Handle holding the response once executed.
+        :rtype: PlannedAccess
+        """
+        outs = list(out or [])
+        path = None
+        if sub:
+            if ';' in sub or '/' in sub:
+                path = sub
+            else:
+                outs.append(sub)
+
+        params = tuple(sorted(
+            (str(k), str(v)) for k, v in six.iteritems(parameters or {})))
+
+        group = self._groups.setdefault((resource, params, path), {
+            'keys': OrderedDict(),
+            'out': OrderedDict(),
+        })
+        access = PlannedAccess(resource, key, sub, callback)
+        group['keys'].setdefault(access.key, []).append(access)
+        for name in outs:
+            group['out'][name] = None
+
+        self._count += 1
+        return access
+
+    def plan(self):
+        """
+        Returns the requests needed to serve every access added so far.
+
+        :rtype: list of PlannedRequest
+        """
+        requests = []
+
+        for (resource, params, path), group in six.iteritems(self._groups):
+            keys = list(group['keys'])
+            for start in range(0, len(keys), self._max_keys):
+                chunk = keys[start:start + self._max_keys]
+
+                parameters = OrderedDict(params)
+                if group['out']:
+                    parameters['out'] = ','.join(group['out'])
+
+                uri = _collection_uri(resource, chunk, parameters, path)
+                accesses = [a for k in chunk for a in group['keys'][k]]
+                requests.append(PlannedRequest(uri, resource, chunk, accesses,
+                                               parameters, path))
+
+        return requests
+
+    def explain(self):
+        """
+        Returns a human readable summary of the planned requests.
+
+        :rtype: str
+        """
+        requests = self.plan()
+        lines = ["{0} accesses -> {1} requests".format(
+            self._count, len(requests))]
+        for request in requests:
+            lines.append("  GET {0}  ({1} keys, {2} accesses)".format(
+                request.uri, len(request.keys), len(request.accesses)))
+        return '\n'.join(lines)
+
+    def execute(self):
+        """
+        Sends the planned requests and resolves every access with its part of
+        the response. The planner is emptied afterwards so it can be reused.
+
+        Keys Yahoo refused are found by splitting the requests including
+        them, and are listed in ``errors`` with the error Yahoo answered with.
+
+        :returns: Number of requests planned.
+        :rtype: int
+        """
+        requests = self.plan()
+        self._groups = OrderedDict()
+        self._count = 0
+        self.errors = OrderedDict()
+
+        for request in requests:
+            request.execute(self._oauth)
+            self.errors.update(request.errors)
+
+        return len(requests)
+
+
+def is_key_error(error):
+    """
+    Returns ``True`` if ``error`` may be caused by a single key of the
+    collection request that raised it.
+
+    :rtype: bool
+    """
+    response = getattr(error, 'response', None)
+    return response is not None and \
+        response.status_code in KEY_ERROR_STATUSES
+
+
+def _collection_uri(resource, keys, parameters, path):
+    params = OrderedDict()
+    params[resource + '_keys'] = _format_resources_key(keys)
+    params.update(parameters)
+    return build_uri(resource + 's', parameters=params, sub=path)
+
+
+def _resource_key(resource, metadata):
+    """
+    Returns the keys identifying a resource in a collection response. Game
+    resources are also identified by their code, e.g. ``'nfl'``.
+    """
+    field = resource + '_key'
+    if isinstance(metadata, dict):
+        entries = [metadata]
+    else:
+        entries = [e for e in metadata if isinstance(e, dict)]
+
+    keys = []
+    for entry in entries:
+        if field in entry:
+            keys.append(str(entry[field]))
+        if resource == 'game' and 'code' in entry:
+            keys.append(str(entry['code']))
+    return keys
+
+
+def _fan_out(request, response):
+    resource = request.resource
+    collection = response['fantasy_content'][resource + 's']
+
+    found = {}
+    if isinstance(collection, dict):
+        for number, entry in six.iteritems(collection):
+            # skip 'count' field
+            if number == 'count':
+                continue
+
+            item = entry[resource]
+            subs = {}
+            for part in item[1:]:
+                subs.update(part)
+            single = {'fantasy_content': {resource: [item[0], subs]}}
+
+            for key in _resource_key(resource, item[0]):
+                found[key] = single
+
+    for access in request.accesses:
+        access._resolve(found.get(access.key))
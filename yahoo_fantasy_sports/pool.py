@@ -0,0 +1,187 @@
+from __future__ import absolute_import, division, print_function
+
+import threading
+import time
+from collections import OrderedDict
+
+from . import utils
+from .cache import PUBLIC, PUBLIC_RESOURCES, cache_scope
+from .error import YahooFantasySportsError
+from .replay import normalize_uri
+
+
+class ClientPool(object):
+    """
+    Serves many Yahoo users, each with their own OAuth1 token, from a single
+    process.
+
+    Once installed, the pool sends every request: at most
+    ``max_connections`` at a time across all users, renewing the token of
+    each user at most once even when several of their requests find it
+    expired. Responses to public resources (game metadata, stat categories,
+    roster positions, ...) are shared by every user for ``public_ttl``
+    seconds, and concurrent requests for the same public resource are sent
+    only once. Anything else, including every ``use_login`` request, is
+    always sent with the token of the user asking for it and never shared.
+
+    >>> pool = ClientPool(max_connections=20).install()
+    >>> yfs = pool.add(user_id, oauth)
+    >>> game = pool[user_id].games('nfl')
+
+    :param max_connections: Requests sent to Yahoo at once.
+    :type max_connections: int
+    :param public_ttl: Seconds public responses are shared.
+    :type public_ttl: float
+    :param max_public: Number of public responses kept.
+    :type max_public: int
+    :param public_resources: Resource types shared by every user.
+    :type public_resources: tuple
+    """
+
+    def __init__(self, max_connections=10, public_ttl=3600, max_public=1024,
+                 public_resources=PUBLIC_RESOURCES):
+        self.max_connections = max_connections
+        self.public_ttl = public_ttl
+        self.max_public = max_public
+        self.public_resources = public_resources
+        # public responses served without contacting Yahoo
+        self.shared = 0
+        self._clients = {}
+        self._token_locks = {}
+        self._public = OrderedDict()
+        self._pending = {}
+        self._connections = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._previous = None
+
+    def __repr__(self):
+        return "<{0} users={1} max_connections={2}>".format(
+            self.__class__.__name__, len(self._clients),
+            self.max_connections)
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __contains__(self, user):
+        return user in self._clients
+
+    def __getitem__(self, user):
+        try:
+            return self._clients[user]
+        except KeyError:
+            raise YahooFantasySportsError(
+                "user '{0}' is not in the pool".format(user))
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def install(self):
+        """
+        Makes every request go through the pool. Requests are then sent
+        through the transport installed before, if any.
+        """
+        self._previous = utils.set_transport(self)
+        return self
+
+    def uninstall(self):
+        utils.set_transport(self._previous)
+        self._previous = None
+
+    def add(self, user, oauth):
+        """
+        Adds a user, replacing any previous session of theirs.
+
+        :param user: Identifier of the user.
+        :param oauth: OAuth1 instance of the user.
+        :type oauth: yahoo_oauth.Oauth1
+        :rtype: YahooFantasySports
+        """
+        from .yahoo_fantasy_sports import YahooFantasySports
+
+        client = YahooFantasySports(oauth)
+        with self._lock:
+            previous = self._clients.get(user)
+            if previous is not None:
+                self._token_locks.pop(id(previous.oauth), None)
+            self._clients[user] = client
+            self._token_locks[id(oauth)] = threading.Lock()
+        return client
+
+    def remove(self, user):
+        """
+        Removes a user. Their responses were never shared, so nothing else
+        needs to be dropped.
+        """
+        with self._lock:
+            client = self._clients.pop(user, None)
+            if client is not None:
+                self._token_locks.pop(id(client.oauth), None)
+
+    def clear_public(self):
+        """
+        Drops every shared public response.
+        """
+        with self._lock:
+            self._public.clear()
+
+    def get(self, oauth, uri):
+        if cache_scope(oauth, uri, self.public_resources) != PUBLIC:
+            return self._send(oauth, uri)
+
+        key = normalize_uri(uri)
+        while True:
+            with self._lock:
+                entry = self._public.get(key)
+                if entry is not None and entry[0] > time.time():
+                    self.shared += 1
+                    return entry[1]
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # the same resource is being fetched for another user, and is
+            # fetched again if that fails
+            pending.wait()
+
+        try:
+            response = self._send(oauth, uri)
+            if response.status_code == 200:
+                with self._lock:
+                    self._public.pop(key, None)
+                    self._public[key] = (time.time() + self.public_ttl,
+                                         response)
+                    while len(self._public) > self.max_public:
+                        self._public.popitem(last=False)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+        return response
+
+    def put(self, oauth, uri, data):
+        return self._send(oauth, uri, 'PUT', data)
+
+    def _send(self, oauth, uri, method='GET', data=None):
+        if oauth is not None:
+            with self._lock:
+                token_lock = self._token_locks.get(id(oauth))
+                if token_lock is None:
+                    token_lock = self._token_locks[id(oauth)] = \
+                        threading.Lock()
+            with token_lock:
+                utils._check_token_validity(oauth)
+
+        with self._connections:
+            transport = self._previous
+            if transport is None:
+                return utils.send_request(oauth, uri, method, data)
+            if method == 'GET':
+                return transport.get(oauth, uri)
+            put = getattr(transport, 'put', None)
+            if put is None:
+                raise YahooFantasySportsError(
+                    "{0} does not support writes".format(transport))
+            return put(oauth, uri, data)
@@ -0,0 +1,109 @@
+from __future__ import absolute_import, division, print_function
+
+import threading
+import time
+from contextlib import contextmanager
+from timeit import default_timer
+
+from . import utils
+from .error import YahooFantasySportsError
+
+_local = threading.local()
+
+
+class DeadlineExceeded(YahooFantasySportsError):
+    """
+    Raised when a request could not be sent before the deadline of the
+    calling thread.
+    """
+    pass
+
+
+@contextmanager
+def deadline(timestamp):
+    """
+    Makes rate limiters raise ``DeadlineExceeded`` instead of waiting past
+    ``timestamp`` for requests sent by the current thread.
+
+    :param timestamp: Unix timestamp, or ``None`` for no deadline.
+    :type timestamp: float
+    """
+    previous = getattr(_local, 'deadline', None)
+    _local.deadline = timestamp
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+class RateLimiter(object):
+    """
+    Thread-safe token bucket letting through ``rate`` requests per second on
+    average, and bursts of up to ``burst`` requests.
+
+    Callers reserve their token before sleeping, so waiting threads are
+    served in the order they arrived without holding the lock.
+
+    >>> limiter = RateLimiter(20, burst=40).install()
+
+    :param rate: Requests per second.
+    :type rate: float
+    :param burst: Bucket size.
+    :type burst: int
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = float(rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = default_timer()
+        self._lock = threading.Lock()
+        self._previous = None
+
+    def __repr__(self):
+        return "<{0} {1}/s burst={2}>".format(
+            self.__class__.__name__, self.rate, self.burst)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def install(self):
+        """
+        Makes every request sent to Yahoo wait for this limiter.
+        """
+        self._previous = utils.set_rate_limiter(self)
+        return self
+
+    def uninstall(self):
+        utils.set_rate_limiter(self._previous)
+        self._previous = None
+
+    def acquire(self):
+        """
+        Takes a token, sleeping until one is available.
+
+        :returns: Seconds waited.
+        :rtype: float
+        :raises DeadlineExceeded: If the token would only be available after
+            the deadline of the current thread, in which case none is taken.
+        """
+        limit = getattr(_local, 'deadline', None)
+        with self._lock:
+            now = default_timer()
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if limit is not None and time.time() + wait > limit:
+                raise DeadlineExceeded("Rate limit would delay the request "
+                                       "past its deadline")
+            self._tokens -= 1
+
+        if wait:
+            time.sleep(wait)
+        return wait
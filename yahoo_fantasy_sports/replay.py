@@ -0,0 +1,189 @@
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from timeit import default_timer
+
+from six.moves.urllib.parse import unquote
+
+import requests
+
+from . import YahooFantasySportsError
+from . import utils
+
+# os.rename does not replace existing files on Windows
+_replace = getattr(os, 'replace', os.rename)
+
+
+def normalize_uri(uri):
+    """
+    Returns ``uri`` without host, API prefix and query string, with the
+    parameters of each path segment sorted, so that equivalent URIs map to
+    the same fixture. Key lists keep their order since it decides the order
+    of the response.
+
+    >>> normalize_uri('http://fantasysports.yahooapis.com/fantasy/v2/'
+    ...               'games;is_available=1;game_keys=nfl?format=json')
+    '/games;game_keys=nfl;is_available=1'
+
+    :rtype: str
+    """
+    path = unquote(uri.split('?', 1)[0])
+    if '/fantasy/v2' in path:
+        path = path.split('/fantasy/v2', 1)[1]
+
+    segments = []
+    for segment in path.strip('/').split('/'):
+        parts = segment.split(';')
+        segments.append(';'.join(parts[:1] + sorted(parts[1:])))
+    return '/' + '/'.join(segments)
+
+
+class FixtureStore(object):
+    """
+    Stores recorded responses in ``path``, one JSON file per normalized URI.
+
+    :param path: Directory holding the fixtures. Created if missing.
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def __repr__(self):
+        return "<{0} {1}>".format(self.__class__.__name__, self.path)
+
+    def __contains__(self, uri):
+        return os.path.exists(self._filename(uri))
+
+    def __len__(self):
+        return len([n for n in os.listdir(self.path) if n.endswith('.json')])
+
+    def _filename(self, uri):
+        digest = hashlib.sha1(normalize_uri(uri).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest + '.json')
+
+    def get(self, uri):
+        """
+        Returns the fixture recorded for ``uri``, or ``None``.
+
+        :rtype: dict
+        """
+        try:
+            with open(self._filename(uri)) as f:
+                return json.load(f)
+        except IOError:
+            return None
+
+    def put(self, uri, status, content, elapsed):
+        """
+        Records a response. The file is replaced atomically so that
+        concurrent replays never see a partial fixture.
+        """
+        fixture = {
+            'uri': normalize_uri(uri),
+            'status': status,
+            'elapsed': elapsed,
+            'recorded': time.time(),
+            'content': content,
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(fixture, f)
+        _replace(tmp, self._filename(uri))
+
+
+class _Transport(object):
+
+    def __init__(self):
+        self._previous = None
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def install(self):
+        """
+        Routes every ``yfs_request`` through this transport.
+        """
+        self._previous = utils.set_transport(self)
+        return self
+
+    def uninstall(self):
+        utils.set_transport(self._previous)
+        self._previous = None
+
+
+class RecordingTransport(_Transport):
+    """
+    Sends requests to Yahoo as usual, through the transport installed before
+    it if any, and records every response, including errors, in ``store``.
+
+    >>> with RecordingTransport(FixtureStore('fixtures')):
+    ...     games = GamesFactory(oauth)('nfl', 'nba')
+
+    :param store: Where responses are recorded.
+    :type store: FixtureStore
+    """
+
+    def __init__(self, store):
+        super(RecordingTransport, self).__init__()
+        self.store = store
+
+    def get(self, oauth, uri):
+        start = default_timer()
+        if self._previous is not None:
+            response = self._previous.get(oauth, uri)
+        else:
+            response = utils.send_request(oauth, uri)
+        elapsed = default_timer() - start
+        self.store.put(uri, response.status_code, response.text, elapsed)
+        return response
+
+
+class ReplayTransport(_Transport):
+    """
+    Answers requests from ``store`` without any network access or OAuth;
+    ``oauth`` may be ``None`` when replaying.
+
+    >>> with ReplayTransport(FixtureStore('fixtures')):
+    ...     games = GamesFactory(None)('nfl', 'nba')
+
+    :param store: Recorded responses.
+    :type store: FixtureStore
+    :param simulate_latency: Wait as long as the recorded request took.
+    :type simulate_latency: bool
+    :param speed: Divides the simulated latency, e.g. ``2`` replays twice as
+        fast as recorded.
+    :type speed: float
+    """
+
+    def __init__(self, store, simulate_latency=False, speed=1.0):
+        super(ReplayTransport, self).__init__()
+        self.store = store
+        self.simulate_latency = simulate_latency
+        self.speed = speed
+
+    def get(self, oauth, uri):
+        fixture = self.store.get(uri)
+        if fixture is None:
+            raise YahooFantasySportsError(
+                "No recorded response for '{0}'".format(normalize_uri(uri)))
+
+        if self.simulate_latency:
+            time.sleep(fixture['elapsed'] / self.speed)
+
+        response = requests.Response()
+        response.status_code = fixture['status']
+        response.url = uri
+        response.reason = 'OK' if fixture['status'] == 200 else 'Error'
+        response.headers['Content-Type'] = 'application/json'
+        response._content = fixture['content'].encode('utf-8')
+        return response
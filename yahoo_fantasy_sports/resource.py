@@ -3,9 +3,72 @@ from __future__ import absolute_import, division, print_function
 from abc import ABCMeta
 from six import add_metaclass
 
+from .freshness import Freshness
+
 
 @add_metaclass(ABCMeta)
-class Resource(object):
+class Resource(Freshness):
     """
     Base class for creating resources such as ``Game``, ``League``, etc...
     """
+
+    # sections compared by refreshes to report changes, mapped to the
+    # attribute holding each of them, see ``changes.subscribe``
+    tracked_sections = {}
+
+    def _state(self):
+        """
+        Returns the loaded data of the resource as plain values.
+        """
+        state = dict(self.__dict__)
+        state.pop('_oauth', None)
+        return state
+
+    def _tracked(self):
+        """
+        Returns the tracked sections as loaded before a refresh, or ``None``
+        if nobody subscribed to changes.
+        """
+        from . import changes
+        if not changes.active() or self._updated_at is None:
+            return None
+        return dict((section, getattr(self, name, None))
+                    for section, name in self.tracked_sections.items())
+
+    def _publish_changes(self, previous):
+        """
+        Reports the changes made by a refresh to the sections returned by
+        ``_tracked`` before it.
+        """
+        if previous is not None:
+            from . import changes
+            changes.publish(self, previous)
+
+    def _restore(self, oauth, state):
+        self.__dict__.update(state)
+        self._oauth = oauth
+
+    def snapshot(self):
+        """
+        Serializes the loaded data, including ``updated_at``, so it can be
+        restored with ``from_snapshot`` without contacting Yahoo.
+
+        :rtype: bytes
+        """
+        from .snapshot import dumps
+        return dumps(self.resource, self._state())
+
+    @classmethod
+    def from_snapshot(cls, oauth, data):
+        """
+        Restores a resource serialized with ``snapshot``.
+
+        :param oauth: OAuth1 instance used by later refreshes.
+        :type oauth: yahoo_oauth.Oauth1
+        :param data: Snapshot.
+        :type data: bytes
+        """
+        from .snapshot import loads
+        resource = cls.__new__(cls)
+        resource._restore(oauth, loads(cls.resource, data))
+        return resource
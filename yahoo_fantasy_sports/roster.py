@@ -0,0 +1,199 @@
+from __future__ import absolute_import, division, print_function
+
+import time
+from concurrent import futures
+
+import six
+
+from . import utils
+from .error import YahooFantasySportsError
+from .ratelimit import DeadlineExceeded, deadline as _deadline
+from .utils import is_retryable
+
+
+def _escape(value):
+    return six.text_type(value).replace('&', '&amp;') \
+        .replace('<', '&lt;').replace('>', '&gt;')
+
+
+class Lineup(object):
+    """
+    Starting positions of a team's players for a week (NFL) or a date
+    (other sports).
+
+    >>> Lineup('348.l.1.t.1', {'348.p.8332': 'WR', '348.p.8334': 'BN'},
+    ...        week=13)
+
+    :param team_key: Team whose roster is set.
+    :type team_key: str
+    :param positions: Maps player keys to positions, or sequence of
+        ``(player_key, position)`` pairs.
+    :type positions: dict
+    :param week: Week the lineup applies to.
+    :type week: int
+    :param date: Day the lineup applies to, as ``'YYYY-MM-DD'``.
+    :type date: str
+    """
+
+    def __init__(self, team_key, positions, week=None, date=None):
+        if (week is None) == (date is None):
+            raise YahooFantasySportsError(
+                "A lineup applies to either a week or a date")
+        if isinstance(positions, dict):
+            positions = sorted(six.iteritems(positions))
+        self.team_key = team_key
+        self.positions = list(positions)
+        self.week = week
+        self.date = date
+
+    def __repr__(self):
+        return "<{0} {1} {2}>".format(self.__class__.__name__, self.team_key,
+                                      self.week or self.date)
+
+    @property
+    def uri(self):
+        return utils.build_uri('team', resource_key=self.team_key,
+                               sub='roster')
+
+    def to_xml(self):
+        """
+        Returns the body Yahoo expects to update the roster.
+
+        :rtype: bytes
+        """
+        if self.week is not None:
+            coverage = ['<coverage_type>week</coverage_type><week>',
+                        _escape(self.week), '</week>']
+        else:
+            coverage = ['<coverage_type>date</coverage_type><date>',
+                        _escape(self.date), '</date>']
+
+        parts = ['<?xml version="1.0"?><fantasy_content><roster>']
+        parts.extend(coverage)
+        parts.append('<players>')
+        for player_key, position in self.positions:
+            parts.extend(('<player><player_key>', _escape(player_key),
+                          '</player_key><position>', _escape(position),
+                          '</position></player>'))
+        parts.append('</players></roster></fantasy_content>')
+        return u''.join(parts).encode('utf-8')
+
+
+class BulkResult(object):
+    """
+    Outcome of ``set_lineups``.
+
+    ``succeeded`` lists the team keys whose lineup was saved, ``failed``
+    maps the others to the last error raised for them and ``attempts`` maps
+    every team key to the number of requests sent for it. ``in_flight``
+    lists the team keys whose request was still running at the deadline:
+    whether their lineup was saved is unknown.
+    """
+
+    def __init__(self):
+        self.succeeded = []
+        self.failed = {}
+        self.in_flight = []
+        self.attempts = {}
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return "<{0} succeeded={1} failed={2} in_flight={3}>".format(
+            self.__class__.__name__, len(self.succeeded), len(self.failed),
+            len(self.in_flight))
+
+    @property
+    def ok(self):
+        return not self.failed and not self.in_flight
+
+
+def _send(oauth, lineup, deadline):
+    with _deadline(deadline):
+        if deadline is not None and time.time() >= deadline:
+            raise DeadlineExceeded("Deadline passed before sending")
+        utils.yfs_put(oauth, lineup.uri, lineup.to_xml())
+
+
+def set_lineups(oauth, lineups, workers=8, retries=2, backoff=0.25,
+                deadline=None):
+    """
+    Saves many lineups concurrently. Requests go through the installed
+    ``RateLimiter``, if any. Lineups failing with a retryable error are sent
+    again, after ``backoff`` seconds doubling on every round, up to
+    ``retries`` times; other failures are reported right away.
+
+    Nothing is sent after ``deadline``: lineups still waiting for it are
+    reported as failed with ``DeadlineExceeded``, while those whose request
+    was already running are reported as ``in_flight``, as they may still be
+    saved.
+
+    >>> result = set_lineups(oauth, lineups, workers=16,
+    ...                      deadline=lock_time - 5)
+    >>> result.failed
+    {}
+
+    :param oauth: OAuth1 instance connected to the Yahoo servers.
+    :type oauth: yahoo_oauth.Oauth1
+    :param lineups: Lineups to save, at most one per team.
+    :type lineups: list
+    :param workers: Number of requests in flight at once.
+    :type workers: int
+    :param retries: Number of times a failed lineup is sent again.
+    :type retries: int
+    :param backoff: Seconds waited before the first retry round.
+    :type backoff: float
+    :param deadline: Unix timestamp after which nothing is sent.
+    :type deadline: float
+    :rtype: BulkResult
+    """
+    start = time.time()
+    result = BulkResult()
+    pending = list(lineups)
+
+    executor = futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        for attempt in range(retries + 1):
+            if attempt:
+                delay = backoff * 2 ** (attempt - 1)
+                if deadline is not None:
+                    delay = min(delay, max(0.0, deadline - time.time()))
+                time.sleep(delay)
+
+            submitted = dict(
+                (executor.submit(_send, oauth, lineup, deadline), lineup)
+                for lineup in pending)
+            timeout = None if deadline is None else \
+                max(0.0, deadline - time.time())
+            done, not_done = futures.wait(submitted, timeout)
+
+            pending = []
+            for future in not_done:
+                key = submitted[future].team_key
+                if future.cancel():
+                    result.failed[key] = DeadlineExceeded(
+                        "Deadline passed before the request was sent")
+                else:
+                    # already running: the request may still go through
+                    result.failed.pop(key, None)
+                    result.in_flight.append(key)
+                    result.attempts[key] = result.attempts.get(key, 0) + 1
+            for future in done:
+                lineup = submitted[future]
+                key = lineup.team_key
+                result.attempts[key] = result.attempts.get(key, 0) + 1
+                error = future.exception()
+                if error is None:
+                    result.failed.pop(key, None)
+                    result.succeeded.append(key)
+                else:
+                    result.failed[key] = error
+                    if is_retryable(error):
+                        pending.append(lineup)
+
+            if not pending or not_done:
+                break
+    finally:
+        executor.shutdown(wait=False)
+
+    result.elapsed = time.time() - start
+    return result
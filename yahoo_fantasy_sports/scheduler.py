@@ -0,0 +1,209 @@
+from __future__ import absolute_import, division, print_function
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry(object):
+
+    __slots__ = ('resource', 'ttl', 'accessed', 'due', 'running', 'parked')
+
+    def __init__(self, resource, ttl):
+        self.resource = resource
+        self.ttl = ttl
+        self.accessed = time.time()
+        self.due = None
+        self.running = False
+        self.parked = False
+
+
+class RefreshScheduler(object):
+    """
+    Refreshes registered resources in the background shortly before they
+    go stale, so that reading them never waits on Yahoo.
+
+    A resource with a ``ttl`` of ``T`` seconds is refreshed between
+    ``lead * T`` and ``(lead + jitter) * T`` seconds before it expires, the
+    random part keeping resources loaded together from being refreshed
+    together. At most ``workers`` refreshes run at once. Resources not
+    accessed for ``idle`` seconds are left to go stale until the next
+    access, which refreshes them in the background.
+
+    Resources are refreshed in place by their ``refresh()`` method, which
+    fetches everything before updating the resource, so reads made while
+    Yahoo is being waited on return the previous data. ``Game`` then swaps
+    its new sections and availability in at once; other resources update
+    their attributes one at a time, so reading several of them while they
+    are updated may mix data of two refreshes.
+
+    >>> scheduler = RefreshScheduler(workers=4).start()
+    >>> game = scheduler.register(GamesFactory(oauth)('nfl'))
+    >>> scheduler.touch(game)  # on every use
+
+    :param workers: Maximum number of concurrent refreshes.
+    :type workers: int
+    :param lead: Fraction of the ttl before expiry at which resources are
+        refreshed.
+    :type lead: float
+    :param jitter: Fraction of the ttl added at random to ``lead``.
+    :type jitter: float
+    :param idle: Seconds without access after which a resource is no longer
+        refreshed.
+    :type idle: float
+    """
+
+    def __init__(self, workers=2, lead=0.1, jitter=0.05, idle=600):
+        self.workers = workers
+        self.lead = lead
+        self.jitter = jitter
+        self.idle = idle
+        self._entries = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._random = random.Random()
+        self._thread = None
+        self._executor = None
+        self._stopping = False
+
+    def __repr__(self):
+        return "<{0} resources={1} workers={2}>".format(
+            self.__class__.__name__, len(self._entries), self.workers)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """
+        Starts refreshing registered resources in the background.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self._condition:
+            if self._thread is not None:
+                return self
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self, wait=True):
+        """
+        Stops scheduling refreshes. Unless ``wait`` is false, waits for the
+        refreshes in progress to finish.
+        """
+        with self._condition:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._condition.notify()
+            thread, self._thread = self._thread, None
+            executor, self._executor = self._executor, None
+        thread.join()
+        executor.shutdown(wait=wait)
+
+    def register(self, resource, ttl=None):
+        """
+        Schedules the refreshes of ``resource``, an object with a
+        ``refresh()`` method, an ``updated_at`` timestamp and a ``ttl``.
+
+        :param ttl: Seconds the resource stays fresh, by default its own
+            ``ttl``.
+        :type ttl: float
+        :returns: ``resource``
+        """
+        with self._condition:
+            entry = self._entries.get(id(resource))
+            if entry is None:
+                entry = self._entries[id(resource)] = _Entry(
+                    resource, resource.ttl if ttl is None else ttl)
+            elif ttl is not None:
+                entry.ttl = ttl
+            if not entry.running:
+                self._schedule(entry, self._next_refresh(entry))
+        return resource
+
+    def unregister(self, resource):
+        """
+        Stops refreshing ``resource``.
+        """
+        with self._condition:
+            entry = self._entries.pop(id(resource), None)
+            if entry is not None:
+                entry.due = None
+
+    def touch(self, resource):
+        """
+        Records an access to ``resource``. If it was left to go stale for
+        lack of accesses, a refresh is started in the background.
+        """
+        with self._condition:
+            entry = self._entries.get(id(resource))
+            if entry is None:
+                return
+            entry.accessed = time.time()
+            if entry.parked:
+                entry.parked = False
+                self._schedule(entry, 0)
+
+    def _next_refresh(self, entry):
+        updated_at = entry.resource.updated_at
+        if updated_at is None:
+            return 0
+        ahead = entry.ttl * (self.lead + self._random.uniform(0, self.jitter))
+        return updated_at + entry.ttl - ahead
+
+    def _schedule(self, entry, due):
+        # called with the condition held, entries already queued keep their
+        # old position, which is ignored once ``due`` no longer matches
+        entry.due = due
+        heapq.heappush(self._queue, (due, next(self._sequence), entry))
+        self._condition.notify()
+
+    def _run(self):
+        with self._condition:
+            while not self._stopping:
+                now = time.time()
+                while self._queue and self._queue[0][0] <= now:
+                    due, _, entry = heapq.heappop(self._queue)
+                    if entry.due != due or entry.running:
+                        continue
+                    entry.due = None
+                    if now - entry.accessed > self.idle:
+                        entry.parked = True
+                        continue
+                    entry.running = True
+                    self._executor.submit(self._refresh, entry)
+
+                timeout = self._queue[0][0] - now if self._queue else None
+                self._condition.wait(timeout)
+
+    def _refresh(self, entry):
+        try:
+            entry.resource.refresh()
+        except Exception:
+            logger.exception("Failed to refresh %s", entry.resource)
+            # try again once the lead time has passed
+            due = time.time() + max(entry.ttl * self.lead, 1.0)
+        else:
+            due = None
+
+        with self._condition:
+            entry.running = False
+            if self._entries.get(id(entry.resource)) is entry:
+                self._schedule(entry, due if due is not None
+                               else self._next_refresh(entry))
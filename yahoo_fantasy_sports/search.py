@@ -0,0 +1,409 @@
+from __future__ import absolute_import, division, print_function
+
+import bisect
+import re
+import unicodedata
+
+import six
+
+from .normalize import normalize
+from .utils import build_uri, yfs_request
+
+_SEPARATORS = re.compile(r'[^0-9a-z]+')
+
+
+def fold(text):
+    """
+    Returns ``text`` lowercased, without accents and with punctuation
+    replaced by spaces, the form names are indexed and searched in.
+
+    >>> fold(u"Le'Veon Bell-Jones")
+    'le veon bell jones'
+
+    :rtype: str
+    """
+    text = unicodedata.normalize('NFKD', six.text_type(text).lower())
+    text = u''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(_SEPARATORS.split(str(text.encode('ascii', 'ignore')
+                                          .decode('ascii')))).strip()
+
+
+def _deletes(token, edits):
+    """
+    Returns every string obtained by deleting up to ``edits`` characters of
+    ``token``, including ``token`` itself.
+    """
+    variants = set([token])
+    frontier = [token]
+    for _ in range(edits):
+        generated = []
+        for word in frontier:
+            for i in range(len(word)):
+                variant = word[:i] + word[i + 1:]
+                if variant not in variants:
+                    variants.add(variant)
+                    generated.append(variant)
+        frontier = generated
+    return variants
+
+
+def distance(a, b, bound):
+    """
+    Returns the Levenshtein distance between ``a`` and ``b``, or
+    ``bound + 1`` as soon as it is known to exceed ``bound``.
+
+    :rtype: int
+    """
+    if a == b:
+        return 0
+    length = len(b)
+    if abs(len(a) - length) > bound:
+        return bound + 1
+    # only cells within ``bound`` of the diagonal can stay within bound
+    over = bound + 1
+    previous = [j if j <= bound else over for j in range(length + 1)]
+    for i, ca in enumerate(a, 1):
+        low, high = max(1, i - bound), min(length, i + bound)
+        current = [over] * (length + 1)
+        current[0] = i if i <= bound else over
+        best = current[0]
+        for j in range(low, high + 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1,
+                       previous[j - 1] + (ca != b[j - 1]))
+            current[j] = cost if cost < over else over
+            if cost < best:
+                best = cost
+        if best > bound:
+            return over
+        previous = current
+    return previous[length]
+
+
+class PlayerIndex(object):
+    """
+    Local index of the players of a game, searched by name prefix, by word
+    prefixes and, for misspelled names, by words within ``max_edits`` edits.
+
+    Prefixes are looked up by bisection in sorted arrays of names and
+    words. Misspellings are matched through the deletion neighbourhood of
+    every word: two words within ``max_edits`` edits share a variant with
+    at most ``max_edits`` characters deleted, so candidates are found with a
+    few dict lookups and only those are compared.
+
+    >>> index = PlayerIndex.build(oauth, 'nfl')
+    >>> index.search('tom bra')
+    ['331.p.5228']
+    >>> data = index.dumps()  # loaded by workers with PlayerIndex.loads
+
+    :param players: Maps player keys to full names.
+    :type players: dict
+    :param game_key: Game the players belong to.
+    :type game_key: str
+    :param max_edits: Maximum edit distance of fuzzy matches.
+    :type max_edits: int
+    """
+
+    kind = 'player_index'
+
+    def __init__(self, players=None, game_key=None, max_edits=2):
+        self.game_key = game_key
+        self.max_edits = max_edits
+        # players listed by the last pull, where the next one resumes, and
+        # the key of the last of them
+        self.pulled = 0
+        self._last = None
+        self._players = {}
+        self._folded = {}
+        self._names = []
+        self._tokens = []
+        self._token_keys = {}
+        self._deletes = {}
+        if players:
+            self.update(players)
+
+    def __repr__(self):
+        return "<{0} {1} players={2}>".format(
+            self.__class__.__name__, self.game_key, len(self._players))
+
+    def __len__(self):
+        return len(self._players)
+
+    def __contains__(self, player_key):
+        return player_key in self._players
+
+    @property
+    def players(self):
+        """
+        Maps the indexed player keys to their names.
+        """
+        return dict(self._players)
+
+    def update(self, players):
+        """
+        Adds players, or renames players already indexed.
+
+        :param players: Maps player keys to full names.
+        :type players: dict
+        """
+        for key, name in six.iteritems(players):
+            if key in self._players:
+                if self._players[key] == name:
+                    continue
+                self._discard(key)
+            self._add(key, name)
+
+    def remove(self, player_keys):
+        """
+        Removes players from the index.
+        """
+        for key in player_keys:
+            if key in self._players:
+                self._discard(key)
+
+    def _add(self, key, name):
+        self._players[key] = name
+        folded = self._folded[key] = fold(name)
+        bisect.insort(self._names, (folded, key))
+
+        for token in set(folded.split()):
+            keys = self._token_keys.get(token)
+            if keys is None:
+                keys = self._token_keys[token] = []
+                bisect.insort(self._tokens, token)
+                for variant in _deletes(token, self.max_edits):
+                    self._deletes.setdefault(variant, []).append(token)
+            keys.append(key)
+
+    def _discard(self, key):
+        del self._players[key]
+        folded = self._folded.pop(key)
+        names = self._names
+        del names[bisect.bisect_left(names, (folded, key))]
+
+        for token in set(folded.split()):
+            keys = self._token_keys[token]
+            keys.remove(key)
+            if keys:
+                continue
+            del self._token_keys[token]
+            del self._tokens[bisect.bisect_left(self._tokens, token)]
+            for variant in _deletes(token, self.max_edits):
+                tokens = self._deletes[variant]
+                tokens.remove(token)
+                if not tokens:
+                    del self._deletes[variant]
+
+    def prefix(self, text, limit=None):
+        """
+        Returns the keys of the players whose name starts with ``text``,
+        ordered by name.
+
+        :rtype: list
+        """
+        text = fold(text)
+        names = self._names
+        keys = []
+        for i in range(bisect.bisect_left(names, (text,)), len(names)):
+            name, key = names[i]
+            if not name.startswith(text) or len(keys) == limit:
+                break
+            keys.append(key)
+        return keys
+
+    def _token_prefix(self, text):
+        tokens = self._tokens
+        keys = set()
+        for i in range(bisect.bisect_left(tokens, text), len(tokens)):
+            if not tokens[i].startswith(text):
+                break
+            keys.update(self._token_keys[tokens[i]])
+        return keys
+
+    def _token_fuzzy(self, text, max_edits):
+        # keys of the players with a word close to ``text``, with the
+        # distance of their closest word
+        matches = {}
+        deletes = self._deletes
+        length = len(text)
+        seen = set()
+        for variant in _deletes(text, max_edits):
+            # words indexed with more deletions than allowed here
+            limit = len(variant) + max_edits
+            for token in deletes.get(variant, ()):
+                if len(token) > limit or token in seen or \
+                        abs(len(token) - length) > max_edits:
+                    continue
+                seen.add(token)
+                d = distance(text, token, max_edits)
+                if d > max_edits:
+                    continue
+                for key in self._token_keys[token]:
+                    if d < matches.get(key, max_edits + 1):
+                        matches[key] = d
+        return matches
+
+    def search(self, query, limit=10, max_edits=None):
+        """
+        Returns the keys of the players matching ``query``, best matches
+        first: names starting with ``query``, then names with a word
+        starting with each word of ``query``, then names with a word within
+        ``max_edits`` edits of each word of ``query``.
+
+        :param query: Partial or misspelled name.
+        :type query: str
+        :param limit: Maximum number of keys returned.
+        :type limit: int
+        :param max_edits: Maximum edit distance of fuzzy matches, at most
+            the ``max_edits`` of the index. ``0`` disables fuzzy matching.
+        :type max_edits: int
+        :rtype: list
+        """
+        words = fold(query).split()
+        if not words:
+            return []
+
+        results = self.prefix(' '.join(words), limit)
+        if len(results) >= limit:
+            return results
+        found = set(results)
+
+        # every word of the query prefixes a word of the name
+        candidates = None
+        for word in sorted(words, key=len, reverse=True):
+            keys = self._token_prefix(word)
+            candidates = keys if candidates is None else candidates & keys
+            if not candidates:
+                break
+        self._extend(results, found, candidates or (), limit)
+        if len(results) >= limit:
+            return results
+
+        max_edits = self.max_edits if max_edits is None else \
+            min(max_edits, self.max_edits)
+        if not max_edits:
+            return results
+
+        # every word of the query is close to a word of the name, words
+        # too short to be told apart from others are matched by prefix
+        scores = None
+        for word in words:
+            edits = min(max_edits, (len(word) - 1) // 2)
+            if edits:
+                matches = self._token_fuzzy(word, edits)
+            else:
+                matches = dict.fromkeys(self._token_prefix(word), 0)
+            if scores is None:
+                scores = matches
+            else:
+                scores = dict((k, d + matches[k])
+                              for k, d in six.iteritems(scores)
+                              if k in matches)
+            if not scores:
+                return results
+        folded = self._folded
+        ranked = sorted(scores, key=lambda k: (scores[k], folded[k]))
+        self._extend(results, found, ranked, limit, sort=False)
+        return results
+
+    def _extend(self, results, found, keys, limit, sort=True):
+        if sort:
+            keys = sorted(keys, key=self._folded.__getitem__)
+        for key in keys:
+            if len(results) >= limit:
+                break
+            if key not in found:
+                found.add(key)
+                results.append(key)
+
+    @classmethod
+    def build(cls, oauth, game_key, page_size=25, max_edits=2):
+        """
+        Pulls every player of a game from Yahoo, ``page_size`` at a time,
+        and indexes them.
+
+        :param oauth: OAuth1 instance connected to the Yahoo servers.
+        :type oauth: yahoo_oauth.Oauth1
+        :param game_key: Game key or code.
+        :type game_key: str
+        :rtype: PlayerIndex
+        """
+        index = cls(game_key=str(game_key), max_edits=max_edits)
+        index.refresh(oauth, page_size)
+        return index
+
+    def refresh(self, oauth, page_size=25):
+        """
+        Pulls the players listed after those seen by the previous pull and
+        indexes them, so that refreshing only costs a request or two once
+        the index is built.
+
+        The pull resumes at the last player seen. Should Yahoo list another
+        player there, players were inserted or removed before it: every
+        player is pulled again and those no longer listed are removed.
+
+        :returns: Number of players added.
+        :rtype: int
+        """
+        if not self.pulled:
+            return self._pull(oauth, 0, page_size)
+
+        players = self._players_from(oauth, self.pulled - 1, page_size)
+        first = next(players, None)
+        if first is None or first[0] != self._last:
+            return self._pull(oauth, 0, page_size, rebuild=True)
+        return self._pull(oauth, self.pulled, page_size, players)
+
+    def _pull(self, oauth, start, page_size, players=None, rebuild=False):
+        if players is None:
+            players = self._players_from(oauth, start, page_size)
+        self.pulled = start
+        previous = set(self._players)
+        listed = set()
+        for key, name in players:
+            self.update({key: name})
+            listed.add(key)
+            self.pulled += 1
+            self._last = key
+        if rebuild:
+            self.remove(previous - listed)
+        return len(listed - previous)
+
+    def _players_from(self, oauth, start, page_size):
+        # yields (key, name) of the players listed from ``start`` on
+        while True:
+            uri = build_uri('game', resource_key=self.game_key,
+                            sub='players;start={0};count={1}'.format(
+                                start, page_size))
+            game = normalize(yfs_request(oauth, uri))['game']
+            players = game.get('players', [])
+            for player in players:
+                yield player['player_key'], player['name']['full']
+            start += len(players)
+            if len(players) < page_size:
+                return
+
+    def dumps(self):
+        """
+        Serializes the index, ready to be searched once loaded.
+
+        :rtype: bytes
+        """
+        from .snapshot import dumps
+
+        return dumps(self.kind, dict(self.__dict__))
+
+    @classmethod
+    def loads(cls, data):
+        """
+        Loads an index serialized with ``dumps``.
+
+        :rtype: PlayerIndex
+        """
+        from .snapshot import loads
+
+        index = cls.__new__(cls)
+        # indexes dumped before pulls kept their last player rebuild instead
+        # of resuming
+        index._last = None
+        index.__dict__.update(loads(cls.kind, data))
+        return index
@@ -0,0 +1,334 @@
+from __future__ import absolute_import, division, print_function
+
+import math
+from collections import namedtuple
+
+import six
+
+from .error import YahooFantasySportsError
+from .normalize import normalize
+from .planner import QueryPlanner
+
+# roster slots whose players do not score for their team
+BENCH_POSITIONS = ('BN', 'IR', 'IL', 'NA')
+
+# wins a tie counts for
+TIE = 0.5
+
+# seasons simulated by default, and drawn at once to bound memory
+SIMULATIONS = 10000
+BATCH = 10000
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise YahooFantasySportsError(
+            "Simulating requires numpy, install it with "
+            "'pip install yahoo-fantasy-sports[simulate]'")
+    return numpy
+
+
+def fantasy_points(stats, modifiers):
+    """
+    Returns the fantasy points scored with ``stats``.
+
+    :param stats: Stats as listed in a player response, either normalized
+        or as sent by Yahoo.
+    :type stats: list
+    :param modifiers: Maps stat ids to the points scored per unit, as in
+        the ``stat_modifiers`` of the league settings.
+    :type modifiers: dict
+    :rtype: float
+    """
+    total = 0.0
+    for stat in stats:
+        stat = stat.get('stat', stat)
+        modifier = modifiers.get(str(stat['stat_id']))
+        if not modifier:
+            continue
+        try:
+            total += float(stat['value']) * float(modifier)
+        except ValueError:
+            # '-' for stats that do not apply
+            pass
+    return total
+
+
+def team_distribution(player_points):
+    """
+    Returns the mean and standard deviation of the weekly score of a team
+    whose players score independently of each other.
+
+    :param player_points: Weekly points of each player of the lineup.
+    :type player_points: list
+    :rtype: tuple
+    """
+    mean = variance = 0.0
+    for points in player_points:
+        if not points:
+            continue
+        player_mean = sum(points) / len(points)
+        mean += player_mean
+        if len(points) > 1:
+            variance += sum((p - player_mean) ** 2 for p in points) / \
+                (len(points) - 1)
+    return mean, math.sqrt(variance)
+
+
+def schedule_from_scoreboards(leagues):
+    """
+    Returns the ``(week, team_key, team_key)`` matchups listed in league
+    scoreboards.
+
+    :param leagues: Normalized league responses with a ``scoreboard``.
+    :type leagues: list
+    :rtype: list
+    """
+    schedule = []
+    for league in leagues:
+        scoreboard = league['scoreboard']
+        for matchup in scoreboard.get('matchups', []):
+            week = int(matchup.get('week', scoreboard.get('week')))
+            first, second = [t['team_key'] for t in matchup['teams']]
+            schedule.append((week, first, second))
+    return schedule
+
+
+class LeagueSeason(object):
+    """
+    What the simulation of the rest of a league season needs: the record of
+    every team so far, the matchups left and the distribution of the weekly
+    score of every team, taken as normal.
+
+    :param team_keys: Teams of the league.
+    :type team_keys: list
+    :param schedule: ``(week, team_key, team_key)`` of the matchups left.
+    :type schedule: list
+    :param means: Maps team keys to their mean weekly score.
+    :type means: dict
+    :param stds: Maps team keys to the standard deviation of their weekly
+        score.
+    :type stds: dict
+    :param wins: Maps team keys to their wins so far, ties counting half.
+    :type wins: dict
+    :param points_for: Maps team keys to their points so far, breaking ties
+        in wins.
+    :type points_for: dict
+    :param playoff_teams: Number of teams making the playoffs.
+    :type playoff_teams: int
+    :param league_key: Key of the league.
+    :type league_key: str
+    """
+
+    def __init__(self, team_keys, schedule, means, stds, wins=None,
+                 points_for=None, playoff_teams=4, league_key=None):
+        self.league_key = league_key
+        self.team_keys = list(team_keys)
+        self.schedule = list(schedule)
+        self.means = dict(means)
+        self.stds = dict(stds)
+        self.wins = dict(wins or {})
+        self.points_for = dict(points_for or {})
+        self.playoff_teams = playoff_teams
+
+    def __repr__(self):
+        return "<{0} {1} teams={2} matchups={3}>".format(
+            self.__class__.__name__, self.league_key, len(self.team_keys),
+            len(self.schedule))
+
+    @classmethod
+    def from_yahoo(cls, oauth, league_key, modifiers, weeks, history,
+                   playoff_teams=4, max_keys=25):
+        """
+        Loads a league season from Yahoo: standings, the scoreboards of the
+        ``weeks`` left and, for the players currently in each lineup, their
+        fantasy points in the ``history`` weeks.
+
+        :param oauth: OAuth1 instance connected to the Yahoo servers.
+        :type oauth: yahoo_oauth.Oauth1
+        :param league_key: League key.
+        :type league_key: str
+        :param modifiers: Maps stat ids to points per unit.
+        :type modifiers: dict
+        :param weeks: Weeks left to simulate.
+        :type weeks: list
+        :param history: Weeks the score distributions are estimated from.
+        :type history: list
+        :rtype: LeagueSeason
+        """
+        planner = QueryPlanner(oauth, max_keys)
+        standings = planner.add('league', league_key, sub='teams/standings')
+        scoreboards = [
+            planner.add('league', league_key,
+                        sub='scoreboard;week={0}'.format(week))
+            for week in weeks]
+        planner.execute()
+
+        teams = _league(standings)['teams']
+        team_keys = [team['team_key'] for team in teams]
+        wins = {}
+        points_for = {}
+        for team in teams:
+            standing = team.get('team_standings', {})
+            totals = standing.get('outcome_totals', {})
+            wins[team['team_key']] = int(totals.get('wins', 0)) + \
+                TIE * int(totals.get('ties', 0))
+            points_for[team['team_key']] = float(
+                standing.get('points_for', 0))
+        schedule = schedule_from_scoreboards(
+            [_league(access) for access in scoreboards])
+
+        planner = QueryPlanner(oauth, max_keys)
+        rosters = [planner.add('team', key, sub='roster')
+                   for key in team_keys]
+        planner.execute()
+
+        lineups = {}
+        for team_key, roster in zip(team_keys, rosters):
+            lineups[team_key] = [
+                p['player_key'] for p in
+                normalize(roster.result())['team']['roster']['players']
+                if p['selected_position']['position'] not in BENCH_POSITIONS]
+
+        planner = QueryPlanner(oauth, max_keys)
+        stats = {}
+        for player_keys in lineups.values():
+            for key in player_keys:
+                stats[key] = [
+                    planner.add('player', key,
+                                sub='stats;type=week;week={0}'.format(week))
+                    for week in history]
+        planner.execute()
+
+        means = {}
+        stds = {}
+        for team_key, player_keys in six.iteritems(lineups):
+            points = []
+            for key in player_keys:
+                points.append([
+                    fantasy_points(normalize(access.result())['player']
+                                   ['player_stats']['stats'], modifiers)
+                    for access in stats[key] if access.result() is not None])
+            means[team_key], stds[team_key] = team_distribution(points)
+
+        return cls(team_keys, schedule, means, stds, wins, points_for,
+                   playoff_teams, league_key)
+
+
+def _league(access):
+    response = access.result()
+    if response is None:
+        raise YahooFantasySportsError(
+            "league '{0}' was not found".format(access.key))
+    return normalize(response)['league']
+
+
+Odds = namedtuple('Odds', 'league_key simulations matchups playoffs wins')
+Odds.__doc__ = """
+Outcome of the simulations of a league season: ``matchups`` maps every
+``(week, team_key, team_key)`` matchup left to the probability that the first
+team wins it, ``playoffs`` maps team keys to their probability of making the
+playoffs and ``wins`` to their expected wins at the end of the season.
+"""
+
+
+def simulate(season, simulations=SIMULATIONS, seed=None, batch=BATCH):
+    """
+    Simulates the rest of a league season ``simulations`` times.
+
+    Scores of every matchup of every simulation are drawn at once as arrays,
+    ``batch`` simulations at a time to bound memory. Teams are ranked by
+    wins then points for, the top ``playoff_teams`` making the playoffs.
+
+    >>> odds = simulate(LeagueSeason.from_yahoo(oauth, league_key,
+    ...                                         modifiers, range(8, 15),
+    ...                                         range(1, 8)), 50000)
+    >>> odds.playoffs['348.l.1.t.3']
+    0.73318
+
+    :param season: League to simulate.
+    :type season: LeagueSeason
+    :param simulations: Number of seasons simulated.
+    :type simulations: int
+    :param seed: Seed of the random draws.
+    :type seed: int
+    :rtype: Odds
+    """
+    np = _numpy()
+    rng = np.random.RandomState(seed)
+
+    team_keys = season.team_keys
+    teams = len(team_keys)
+    index = dict((key, i) for i, key in enumerate(team_keys))
+    first = np.array([index[a] for _, a, _ in season.schedule], dtype=int)
+    second = np.array([index[b] for _, _, b in season.schedule], dtype=int)
+    matchups = len(season.schedule)
+
+    means = np.array([season.means.get(key, 0.0) for key in team_keys])
+    stds = np.array([season.stds.get(key, 0.0) for key in team_keys])
+    wins = np.array([season.wins.get(key, 0.0) for key in team_keys])
+    points = np.array([season.points_for.get(key, 0.0) for key in team_keys])
+
+    # maps matchup outcomes to team totals with a matrix product
+    plays_first = np.zeros((matchups, teams))
+    plays_first[np.arange(matchups), first] = 1
+    plays_second = np.zeros((matchups, teams))
+    plays_second[np.arange(matchups), second] = 1
+
+    first_wins = np.zeros(matchups)
+    playoffs = np.zeros(teams)
+    total_wins = np.zeros(teams)
+    for start in range(0, simulations, batch):
+        size = min(batch, simulations - start)
+        a = means[first] + stds[first] * rng.standard_normal((size, matchups))
+        b = means[second] + stds[second] * \
+            rng.standard_normal((size, matchups))
+        won = (a > b) + TIE * (a == b)
+
+        first_wins += won.sum(axis=0)
+        season_wins = wins + won.dot(plays_first) + \
+            (1 - won).dot(plays_second)
+        season_points = points + a.dot(plays_first) + b.dot(plays_second)
+        total_wins += season_wins.sum(axis=0)
+
+        # rows sorted by wins then points, best teams last
+        ranking = np.lexsort((season_points, season_wins))
+        playoffs += np.bincount(
+            ranking[:, teams - season.playoff_teams:].ravel(),
+            minlength=teams)
+
+    return Odds(
+        season.league_key, simulations,
+        dict((matchup, float(p)) for matchup, p in
+             zip(season.schedule, first_wins / simulations)),
+        dict(zip(team_keys, (float(p) for p in playoffs / simulations))),
+        dict(zip(team_keys, (float(w) for w in total_wins / simulations))))
+
+
+def simulate_leagues(seasons, simulations=SIMULATIONS, seed=None,
+                     processes=None):
+    """
+    Simulates several leagues, split across ``processes`` worker processes
+    if given.
+
+    :param seasons: Leagues to simulate.
+    :type seasons: list
+    :param seed: Seed of the first league, the next ones use the following
+        seeds.
+    :type seed: int
+    :param processes: Number of worker processes, or ``None`` to simulate
+        in the calling process.
+    :type processes: int
+    :returns: ``Odds`` of each league, in order.
+    :rtype: list
+    """
+    seeds = [None if seed is None else seed + i for i in range(len(seasons))]
+    counts = [simulations] * len(seasons)
+    if not processes:
+        return [simulate(s, n, sd) for s, n, sd in zip(seasons, counts, seeds)]
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(simulate, seasons, counts, seeds))
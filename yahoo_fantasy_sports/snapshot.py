@@ -0,0 +1,74 @@
+from __future__ import absolute_import, division, print_function
+
+import pickle
+import struct
+import zlib
+
+from .error import YahooFantasySportsError
+
+MAGIC = b'YFSS'
+VERSION = 3
+
+# the newest protocol of the running Python, up to 5: 2 on Python 2, 3 on
+# Python 3.2 and 3.3, 4 up to 3.7 and 5 from 3.8, so snapshots only load on
+# a Python at least as recent as the one that wrote them
+PROTOCOL = min(pickle.HIGHEST_PROTOCOL, 5)
+
+_HEADER = struct.Struct('>4sB')
+
+
+def dumps(kind, state):
+    """
+    Serializes ``state``, made of plain Python values only, into a versioned
+    and compressed snapshot.
+
+    :param kind: Resource or collection name, checked when loading.
+    :type kind: str
+    :param state: Data to serialize.
+    :type state: dict
+    :rtype: bytes
+    """
+    payload = pickle.dumps({'kind': kind, 'state': state}, PROTOCOL)
+    return _HEADER.pack(MAGIC, VERSION) + zlib.compress(payload, 1)
+
+
+def loads(kind, data):
+    """
+    Returns the state stored by ``dumps``. Snapshots may only contain plain
+    values, so loading one never imports or runs any code.
+
+    :param kind: Expected resource or collection name.
+    :type kind: str
+    :param data: Snapshot.
+    :type data: bytes
+    :rtype: dict
+    :raises YahooFantasySportsError: If ``data`` is not a snapshot of
+        ``kind`` or was written by another format version.
+    """
+    try:
+        magic, version = _HEADER.unpack_from(data)
+    except struct.error:
+        magic, version = None, None
+    if magic != MAGIC:
+        raise YahooFantasySportsError("Not a snapshot")
+    if version != VERSION:
+        raise YahooFantasySportsError(
+            "Unsupported snapshot version {0}".format(version))
+
+    payload = zlib.decompress(data[_HEADER.size:])
+    snapshot = _Unpickler(payload).load()
+    if snapshot['kind'] != kind:
+        raise YahooFantasySportsError(
+            "Snapshot holds '{0}', not '{1}'".format(snapshot['kind'], kind))
+    return snapshot['state']
+
+
+class _Unpickler(pickle.Unpickler):
+
+    def __init__(self, payload):
+        from io import BytesIO
+        pickle.Unpickler.__init__(self, BytesIO(payload))
+
+    def find_class(self, module, name):
+        raise YahooFantasySportsError(
+            "Snapshots may not reference '{0}.{1}'".format(module, name))
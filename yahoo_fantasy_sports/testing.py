@@ -0,0 +1,647 @@
+from __future__ import absolute_import, division, print_function
+
+import datetime
+import json
+import random
+import threading
+import time
+
+import six
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import unquote
+
+import requests
+
+from .utils import base_url
+
+
+class FakeYahoo(object):
+    """
+    In-process model of the Yahoo Fantasy Sports API serving fixture data.
+
+    Fixtures are stored per resource type and key. Each record holds the
+    resource ``meta`` exactly as Yahoo encodes it, its ``subs`` (sub-resource
+    name, optionally with parameters such as ``'roster;week=5'``, mapping to
+    the dict Yahoo inserts for it), ``children`` (nested collections such as
+    a league's ``teams``) and ``filters`` (values matched against collection
+    parameters such as ``is_available``). Any single resource or collection
+    URI, including key lists, ``;out=`` and nested collections, is answered
+    from these records.
+
+    :param fixtures: Records keyed by resource type and resource key.
+    :type fixtures: dict
+    :param latency: Seconds added to every response.
+    :type latency: float
+    :param jitter: Maximum random seconds added on top of ``latency``.
+    :type jitter: float
+    :param error_rate: Fraction of requests failing with a 500 error.
+    :type error_rate: float
+    :param errors: Maps URI substrings to the status code returned for them.
+    :type errors: dict
+    :param seed: Seed for latency jitter and error injection.
+    :type seed: int
+    """
+
+    def __init__(self, fixtures, latency=0.0, jitter=0.0, error_rate=0.0,
+                 errors=None, seed=None):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.errors = dict(errors or {})
+        self.log = []
+        self.writes = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._aliases = {}
+
+        for resource, records in six.iteritems(fixtures):
+            for key, record in six.iteritems(records):
+                meta = record['meta']
+                if isinstance(meta, dict) and 'code' in meta:
+                    self._aliases[(resource, str(meta['code']))] = key
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """
+        Creates a fake from fixtures saved with ``dump``.
+        """
+        with open(path) as f:
+            return cls(json.load(f), **kwargs)
+
+    def dump(self, path):
+        """
+        Saves the fixtures as JSON.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.fixtures, f)
+
+    @property
+    def requests(self):
+        """
+        Number of requests handled so far.
+        """
+        return len(self.log)
+
+    def reset(self):
+        """
+        Clears the request log and the recorded writes.
+        """
+        with self._lock:
+            del self.log[:]
+            del self.writes[:]
+
+    def oauth(self):
+        """
+        Returns an OAuth stand-in whose session is served directly by this
+        fake, without any HTTP.
+        """
+        return FakeOAuth(_MemorySession(self))
+
+    def handle(self, uri, method='GET', body=None):
+        """
+        Answers ``uri`` the way Yahoo would, applying latency and error
+        injection. Successful writes are appended to ``writes`` as
+        ``(method, uri, body)``.
+
+        :returns: Status code and JSON body.
+        :rtype: tuple
+        """
+        with self._lock:
+            self.log.append(uri)
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failing = self._random.random() < self.error_rate
+
+        if delay:
+            time.sleep(delay)
+
+        for fragment, status in six.iteritems(self.errors):
+            if fragment in uri:
+                return status, _error("Injected error for '{0}'".format(
+                    fragment))
+        if failing:
+            return 500, _error("Injected server error")
+        if method != 'GET':
+            with self._lock:
+                self.writes.append((method, uri, body))
+            return 200, {'fantasy_content': {}}
+
+        try:
+            return 200, {'fantasy_content': self._route(uri)}
+        except LookupError as e:
+            return 400, _error(str(e.args[0]))
+
+    def _route(self, uri):
+        path = unquote(uri.split('?', 1)[0])
+        if path.startswith(base_url):
+            path = path[len(base_url):]
+        elif '/fantasy/v2' in path:
+            path = path.split('/fantasy/v2', 1)[1]
+
+        segments = [_segment(s) for s in path.strip('/').split('/') if s]
+        if not segments:
+            raise LookupError("Invalid URI '{0}'".format(uri))
+
+        name, params = segments[0]
+        if name in self.fixtures:
+            if len(segments) < 2:
+                raise LookupError("Missing {0} key".format(name))
+            key, key_params = segments[1]
+            params.update(key_params)
+            return {name: self._item(name, key, params, segments[2:])}
+
+        resource = name[:-1]
+        if name.endswith('s') and resource in self.fixtures:
+            if params.pop('use_login', None):
+                keys = list(self.fixtures[resource])
+            else:
+                keys = params.pop(resource + '_keys', '')
+                keys = [k for k in keys.split(',') if k]
+            return {name: self._collection(resource, keys, params,
+                                           segments[1:])}
+
+        raise LookupError("Invalid resource '{0}'".format(name))
+
+    def _record(self, resource, key):
+        records = self.fixtures[resource]
+        key = self._aliases.get((resource, key), key)
+        if key not in records:
+            raise LookupError("Invalid {0} key {1}".format(resource, key))
+        return records[key]
+
+    def _collection(self, resource, keys, params, rest):
+        wanted = params.pop(resource + '_keys', None)
+        if wanted is not None:
+            wanted = set(self._aliases.get((resource, k), k)
+                         for k in wanted.split(','))
+            keys = [k for k in keys if k in wanted]
+        if 'start' in params or 'count' in params:
+            start = int(params.pop('start', 0))
+            keys = keys[start:start + int(params.pop('count', 25))]
+        records = [(k, self._record(resource, k)) for k in keys]
+
+        collection = {}
+        for key, record in records:
+            if any(str(record.get('filters', {}).get(name, value)) != value
+                   for name, value in six.iteritems(params)):
+                continue
+            collection[str(len(collection))] = {
+                resource: self._item(resource, key, params, rest)}
+
+        if not collection:
+            return []
+        collection['count'] = len(collection)
+        return collection
+
+    def _item(self, resource, key, params, rest):
+        record = self._record(resource, key)
+        item = [record['meta']]
+
+        children = record.get('children', {})
+        for sub in [s for s in params.get('out', '').split(',') if s]:
+            if sub in children:
+                item.append({sub: self._collection(
+                    sub[:-1], children[sub], {}, [])})
+            else:
+                item.append(self._sub(record, sub, {}))
+
+        if rest:
+            name, sub_params = rest[0]
+            if name in children:
+                child = name[:-1]
+                item.append({name: self._collection(
+                    child, children[name], sub_params, rest[1:])})
+            else:
+                item.append(self._sub(record, name, sub_params))
+
+        return item
+
+    def _sub(self, record, name, params):
+        subs = record.get('subs', {})
+        qualified = ';'.join([name] + ['{0}={1}'.format(k, v) for k, v in
+                                       sorted(six.iteritems(params))])
+        if qualified in subs:
+            return subs[qualified]
+        if name in subs:
+            return subs[name]
+        raise LookupError("Invalid subresource {0}".format(name))
+
+
+class FakeYahooServer(object):
+    """
+    Serves a ``FakeYahoo`` over HTTP on localhost from a background thread.
+
+    >>> with FakeYahooServer(FakeYahoo(sample_fixtures())) as server:
+    ...     games = GamesFactory(server.oauth())('nfl', 'nba')
+    """
+
+    def __init__(self, fake, host='127.0.0.1', port=0):
+        self.fake = fake
+        self._server = _ThreadingHTTPServer((host, port), _Handler)
+        self._server.fake = fake
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{0}:{1}/fantasy/v2'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def oauth(self):
+        """
+        Returns an OAuth stand-in whose session sends every request to this
+        server instead of Yahoo.
+        """
+        return FakeOAuth(_RedirectSession(self.url))
+
+
+class FakeOAuth(object):
+    """
+    Stand-in for ``yahoo_oauth.OAuth1`` with an always valid token.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.oauth = self
+        self.base_url = None
+        self.access_token = 'fake-token'
+
+    def token_is_valid(self):
+        return True
+
+    def refresh_access_token(self):
+        pass
+
+
+class _MemorySession(object):
+
+    def __init__(self, fake):
+        self._fake = fake
+
+    def get(self, uri, params=None, **kwargs):
+        return self.request('GET', uri, params=params, **kwargs)
+
+    def put(self, uri, data=None, **kwargs):
+        return self.request('PUT', uri, data=data, **kwargs)
+
+    def request(self, method, uri, data=None, **kwargs):
+        status, body = self._fake.handle(uri, method, data)
+        response = requests.Response()
+        response.status_code = status
+        response.reason = 'OK' if status == 200 else 'Error'
+        response.url = uri
+        response.headers['Content-Type'] = 'application/json'
+        response._content = json.dumps(body).encode('utf-8')
+        return response
+
+
+class _RedirectSession(requests.Session):
+
+    def __init__(self, url):
+        super(_RedirectSession, self).__init__()
+        self._url = url
+
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith(base_url):
+            url = self._url + url[len(base_url):]
+        return super(_RedirectSession, self).request(
+            method, url, *args, **kwargs)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond('GET')
+
+    def do_PUT(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self._respond('PUT', self.rfile.read(length))
+
+    def _respond(self, method, data=None):
+        status, body = self.server.fake.handle(self.path, method, data)
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _segment(segment):
+    parts = segment.split(';')
+    params = {}
+    for part in parts[1:]:
+        name, _, value = part.partition('=')
+        params[name] = value
+    return parts[0], params
+
+
+def _error(description):
+    return {'error': {'lang': 'en-US', 'description': description}}
+
+
+GAMES = [
+    # (game_key, code, name, season, weeks, first week, is_available)
+    ('348', 'nfl', 'Football', '2015', 17, datetime.date(2015, 9, 10), 1),
+    ('352', 'nhl', 'Hockey', '2015', 25, datetime.date(2015, 10, 7), 1),
+    ('353', 'nba', 'Basketball', '2015', 24, datetime.date(2015, 10, 27), 1),
+    ('357', 'mlb', 'Baseball', '2016', 26, datetime.date(2016, 4, 3), 0),
+]
+
+STATS = [
+    # (stat_id, name, display_name, position_type)
+    (4, 'Passing Yards', 'Pass Yds', 'O'),
+    (5, 'Passing Touchdowns', 'Pass TD', 'O'),
+    (6, 'Interceptions', 'Int', 'O'),
+    (9, 'Rushing Yards', 'Rush Yds', 'O'),
+    (10, 'Rushing Touchdowns', 'Rush TD', 'O'),
+    (12, 'Receiving Yards', 'Rec Yds', 'O'),
+    (13, 'Receiving Touchdowns', 'Rec TD', 'O'),
+    (19, 'Field Goals 0-19 Yards', 'FG 0-19', 'K'),
+    (32, 'Sack', 'Sack', 'DT'),
+    (57, 'Offensive Fumble Return TD', 'Fum Ret TD', None),
+]
+
+POSITION_TYPES = [('O', 'Offense'), ('K', 'Kickers'), ('DT', 'Defense/ST')]
+
+ROSTER_POSITIONS = [
+    # (abbreviation, display_name, position_type)
+    ('QB', 'Quarterback', 'O'),
+    ('WR', 'Wide Receiver', 'O'),
+    ('RB', 'Running Back', 'O'),
+    ('TE', 'Tight End', 'O'),
+    ('W/R/T', 'Wide Receiver/Running Back/Tight End', 'O'),
+    ('K', 'Kicker', 'K'),
+    ('DEF', 'Defense', 'DT'),
+    ('BN', 'Bench', None),
+]
+
+
+def _game_record(game_key, code, name, season, weeks, first, available):
+    meta = {
+        'game_key': game_key,
+        'game_id': game_key,
+        'name': name,
+        'code': code,
+        'type': 'full',
+        'url': 'http://football.fantasysports.yahoo.com/f1',
+        'season': season,
+        'is_registration_over': 0 if available else 1,
+    }
+
+    game_weeks = {'count': weeks}
+    for week in range(weeks):
+        start = first + datetime.timedelta(days=7 * week)
+        game_weeks[str(week)] = {'game_week': {
+            'week': str(week + 1),
+            'start': start.isoformat(),
+            'end': (start + datetime.timedelta(days=6)).isoformat(),
+        }}
+
+    stats = []
+    for order, (stat_id, stat_name, display, position_type) in \
+            enumerate(STATS):
+        stat = {'stat_id': stat_id, 'name': stat_name,
+                'display_name': display, 'sort_order': str(order % 2)}
+        if position_type:
+            stat['position_types'] = [{'position_type': position_type}]
+        stats.append({'stat': stat})
+
+    roster_positions = []
+    for abbreviation, display, position_type in ROSTER_POSITIONS:
+        rp = {'position': abbreviation, 'abbreviation': abbreviation,
+              'display_name': display}
+        if position_type:
+            rp['position_type'] = position_type
+        roster_positions.append({'roster_position': rp})
+
+    return {
+        'meta': meta,
+        'subs': {
+            'game_weeks': {'game_weeks': game_weeks},
+            'stat_categories': {'stat_categories': {'stats': stats}},
+            'position_types': {'position_types': [
+                {'position_type': {'type': t, 'display_name': d}}
+                for t, d in POSITION_TYPES]},
+            'roster_positions': {'roster_positions': roster_positions},
+        },
+        'filters': {'is_available': str(available)},
+    }
+
+
+def sample_fixtures(leagues=1, teams=12, players=15, weeks=3):
+    """
+    Builds fixtures shaped like recorded Yahoo responses: the games in
+    ``GAMES`` plus ``leagues`` football leagues of ``teams`` teams, each
+    rostering ``players`` players with stats for the first ``weeks`` weeks.
+
+    :rtype: dict
+    """
+    fixtures = {'game': {}, 'league': {}, 'team': {}, 'player': {},
+                'user': {}}
+    for game in GAMES:
+        fixtures['game'][game[0]] = _game_record(*game)
+    fixtures['user']['me'] = {
+        'meta': [{'guid': 'FAKEGUID'}],
+        'children': {'games': ['348']},
+    }
+    fixtures['game']['348']['children'] = {
+        'leagues': ['348.l.{0}'.format(league_id)
+                    for league_id in range(1, leagues + 1)],
+        'players': [],
+    }
+
+    positions = [p[0] for p in ROSTER_POSITIONS if p[0] not in ('BN',)]
+    player_id = 0
+
+    for league_id in range(1, leagues + 1):
+        league_key = '348.l.{0}'.format(league_id)
+        team_keys = []
+        drafted = []
+
+        for team_id in range(1, teams + 1):
+            team_key = '{0}.t.{1}'.format(league_key, team_id)
+            team_keys.append(team_key)
+
+            roster = {}
+            for slot in range(players):
+                player_id += 1
+                player_key = '348.p.{0}'.format(player_id)
+                position = positions[slot % len(positions)]
+                player_meta = [
+                    {'player_key': player_key},
+                    {'player_id': str(player_id)},
+                    {'name': {'full': 'Player {0}'.format(player_id),
+                              'first': 'Player',
+                              'last': str(player_id)}},
+                    {'display_position': position},
+                    {'position_type': 'O'},
+                ]
+
+                subs = {}
+                for week in range(1, weeks + 1):
+                    subs['stats;type=week;week={0}'.format(week)] = {
+                        'player_stats': {
+                            'coverage_type': 'week',
+                            'week': str(week),
+                            'stats': [
+                                {'stat': {'stat_id': str(s[0]),
+                                          'value': str((player_id * s[0] +
+                                                        week) % 120)}}
+                                for s in STATS],
+                        }}
+                subs['stats'] = subs['stats;type=week;week=1']
+                fixtures['player'][player_key] = {'meta': player_meta,
+                                                  'subs': subs}
+                fixtures['game']['348']['children']['players'].append(
+                    player_key)
+
+                roster[str(slot)] = {'player': [
+                    player_meta,
+                    {'selected_position': [
+                        {'coverage_type': 'week'},
+                        {'position': position if slot < 9 else 'BN'}]},
+                ]}
+            roster['count'] = players
+            drafted.append(['348.p.{0}'.format(p) for p in
+                            range(player_id - players + 1, player_id + 1)])
+
+            fixtures['team'][team_key] = {
+                'meta': [
+                    {'team_key': team_key},
+                    {'team_id': str(team_id)},
+                    {'name': 'Team {0}'.format(team_id)},
+                    {'url': 'http://football.fantasysports.yahoo.com/f1/'
+                            '{0}/{1}'.format(league_id, team_id)},
+                ],
+                'subs': {
+                    'roster': {'roster': {
+                        'coverage_type': 'week',
+                        'week': '1',
+                        '0': {'players': roster},
+                    }},
+                    'standings': {'team_standings': {
+                        'rank': team_id,
+                        'outcome_totals': {
+                            'wins': str(teams - team_id),
+                            'losses': str(team_id - 1),
+                            'ties': 0,
+                        },
+                    }},
+                },
+                'children': {'players': [
+                    '348.p.{0}'.format(p) for p in
+                    range(player_id - players + 1, player_id + 1)]},
+            }
+
+        fixtures['league'][league_key] = {
+            'meta': {
+                'league_key': league_key,
+                'league_id': str(league_id),
+                'name': 'League {0}'.format(league_id),
+                'num_teams': teams,
+                'current_week': 1,
+                'season': '2015',
+                'game_code': 'nfl',
+            },
+            'subs': {'draftresults': {
+                'draft_results': _draft_results(team_keys, drafted)}},
+            'children': {'teams': team_keys},
+        }
+        for week in range(1, weeks + 1):
+            fixtures['league'][league_key]['subs'][
+                'scoreboard;week={0}'.format(week)] = {
+                    'scoreboard': _scoreboard(team_keys, week)}
+
+    return fixtures
+
+
+def _draft_results(team_keys, drafted):
+    # every team drafts its roster, one player per round
+    results = {}
+    for round_index in range(len(drafted[0]) if drafted else 0):
+        for team_key, players in zip(team_keys, drafted):
+            results[str(len(results))] = {'draft_result': {
+                'pick': len(results) + 1,
+                'round': round_index + 1,
+                'team_key': team_key,
+                'player_key': players[round_index],
+            }}
+    results['count'] = len(results)
+    return results
+
+
+def _scoreboard(team_keys, week):
+    # round robin by the circle method, teams paired with None have a bye
+    teams = list(team_keys) + [None] * (len(team_keys) % 2)
+    rotated = teams[1:]
+    if rotated:
+        shift = (week - 1) % len(rotated)
+        rotated = rotated[shift:] + rotated[:shift]
+    teams = teams[:1] + rotated
+
+    matchups = {}
+    for i in range(len(teams) // 2):
+        pair = [teams[i], teams[len(teams) - 1 - i]]
+        if None in pair:
+            continue
+        matchup = {'week': str(week), '0': {'teams': {'count': 2}}}
+        for number, team_key in enumerate(pair):
+            matchup['0']['teams'][str(number)] = {'team': [
+                [{'team_key': team_key}],
+                {'team_points': {'coverage_type': 'week',
+                                 'week': str(week), 'total': '0'}},
+            ]}
+        matchups[str(len(matchups))] = {'matchup': matchup}
+    matchups['count'] = len(matchups)
+    return {'week': str(week), '0': {'matchups': matchups}}
+
+
+def start_draft(fixtures, league_key):
+    """
+    Rewinds the draft of ``league_key`` to its start, where Yahoo lists
+    every pick without its player, and returns a function making the next
+    pick. The function returns ``False`` once the draft is over.
+
+    :rtype: callable
+    """
+    results = fixtures['league'][league_key]['subs']['draftresults'][
+        'draft_results']
+    picks = [results[str(i)]['draft_result']
+             for i in range(results['count'])]
+    players = [pick.pop('player_key', None) for pick in picks]
+    made = [0]
+
+    def pick():
+        if made[0] == len(picks):
+            return False
+        picks[made[0]]['player_key'] = players[made[0]]
+        made[0] += 1
+        return True
+    return pick
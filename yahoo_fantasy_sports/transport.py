@@ -0,0 +1,268 @@
+from __future__ import absolute_import, division, print_function
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+
+import six
+from six.moves.urllib.parse import parse_qsl, quote, urlsplit
+
+from . import utils
+from .error import YahooFantasySportsError
+
+# Yahoo only negotiates HTTP/2 over TLS
+HTTPS_BASE_URL = 'https://fantasysports.yahooapis.com/fantasy/v2'
+
+
+def _encode(value):
+    return quote(six.text_type(value).encode('utf-8'), safe='~')
+
+
+def authorization(oauth, method, uri, params=None, nonce=None,
+                  timestamp=None):
+    """
+    Returns the ``Authorization`` header of a request to ``uri``.
+
+    OAuth1 tokens, carrying an ``access_token_secret``, sign the request with
+    HMAC-SHA1 as in RFC 5849, ``params`` being its query parameters. Other
+    tokens are sent as bearer tokens.
+
+    :param oauth: OAuth instance holding the access token.
+    :type oauth: yahoo_oauth.OAuth1
+    :rtype: str
+    """
+    secret = getattr(oauth, 'access_token_secret', None)
+    if secret is None:
+        return 'Bearer {0}'.format(oauth.access_token)
+
+    oauth_params = [
+        ('oauth_consumer_key', oauth.consumer_key),
+        ('oauth_nonce', nonce or uuid.uuid4().hex),
+        ('oauth_signature_method', 'HMAC-SHA1'),
+        ('oauth_timestamp', str(int(timestamp or time.time()))),
+        ('oauth_token', oauth.access_token),
+        ('oauth_version', '1.0'),
+    ]
+    parts = urlsplit(uri)
+    signed = oauth_params + list(six.iteritems(params or {})) + \
+        parse_qsl(parts.query)
+    normalized = '&'.join(sorted(
+        '{0}={1}'.format(_encode(k), _encode(v)) for k, v in signed))
+    base_uri = '{0}://{1}{2}'.format(parts.scheme.lower(),
+                                     parts.netloc.lower(), parts.path)
+    base_string = '&'.join(
+        [method.upper(), _encode(base_uri), _encode(normalized)])
+    key = '{0}&{1}'.format(_encode(oauth.consumer_secret), _encode(secret))
+    digest = hmac.new(key.encode('utf-8'), base_string.encode('utf-8'),
+                      hashlib.sha1).digest()
+
+    oauth_params.append(
+        ('oauth_signature', base64.b64encode(digest).decode('ascii')))
+    return 'OAuth realm="yahooapis.com", ' + ', '.join(
+        '{0}="{1}"'.format(k, _encode(v)) for k, v in oauth_params)
+
+
+def _response(status_code, content, uri, headers=None):
+    import requests
+
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = 'OK' if status_code == 200 else 'Error'
+    response.url = uri
+    response.headers.update(headers or {})
+    response._content = content
+    return response
+
+
+class Transport(object):
+    """
+    Sends the requests of the library to Yahoo. Subclasses only implement
+    ``send``: renewing the access token, rate limiting and signing requests
+    with the OAuth token are done here for every backend.
+
+    Installed transports receive every ``yfs_request`` and write; other
+    transports such as ``ClientPool`` or ``RecordingTransport`` send theirs
+    through the transport installed before them, if any.
+
+    >>> with RequestsTransport(pool_maxsize=20):
+    ...     games = GamesFactory(oauth)('nfl', 'nba')
+
+    :param base_url: Where requests to Yahoo are sent instead, e.g. a local
+        stub.
+    :type base_url: str
+    """
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url
+        self._previous = None
+
+    def __repr__(self):
+        return "<{0} {1}>".format(self.__class__.__name__,
+                                  self.base_url or utils.base_url)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.uninstall()
+
+    def install(self):
+        """
+        Routes every ``yfs_request`` through this transport.
+        """
+        self._previous = utils.set_transport(self)
+        return self
+
+    def uninstall(self):
+        utils.set_transport(self._previous)
+        self._previous = None
+        self.close()
+
+    def get(self, oauth, uri):
+        return self.request(oauth, 'GET', uri)
+
+    def put(self, oauth, uri, data):
+        return self.request(oauth, 'PUT', uri, data)
+
+    def request(self, oauth, method, uri, data=None):
+        """
+        Sends a signed request for ``uri``, ``data`` being an XML body.
+
+        :param oauth: OAuth instance holding the access token, or ``None``
+            for unsigned requests.
+        :rtype: requests.Response
+        """
+        if self.base_url and uri.startswith(utils.base_url):
+            uri = self.base_url + uri[len(utils.base_url):]
+
+        params = {'format': 'json'}
+        headers = {}
+        if data is not None:
+            headers['Content-Type'] = 'application/xml'
+        if utils._rate_limiter is not None:
+            utils._rate_limiter.acquire()
+        # signed once throttling is over, so that the OAuth timestamp and
+        # the token are still fresh when the request leaves
+        if oauth is not None:
+            utils._check_token_validity(oauth)
+            headers['Authorization'] = authorization(oauth, method, uri,
+                                                     params)
+        return self.send(method, uri, params, headers, data)
+
+    def send(self, method, uri, params, headers, data):
+        """
+        Sends a request already signed.
+
+        :rtype: requests.Response
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases the connections held by the transport.
+        """
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    Sends requests with a ``requests`` session keeping up to
+    ``pool_maxsize`` connections alive.
+
+    :param timeout: Seconds waited for Yahoo to answer.
+    :type timeout: float
+    """
+
+    def __init__(self, base_url=None, pool_maxsize=10, timeout=30.0):
+        super(RequestsTransport, self).__init__(base_url)
+        import requests
+
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_maxsize)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def send(self, method, uri, params, headers, data):
+        return self._session.request(method, uri, params=params, data=data,
+                                     headers=headers, timeout=self.timeout)
+
+    def close(self):
+        self._session.close()
+
+
+class HttpxTransport(Transport):
+    """
+    Sends requests with an ``httpx`` client, multiplexing concurrent
+    requests over HTTP/2 connections. Requests go to Yahoo over HTTPS, as
+    HTTP/2 is not offered over plain HTTP.
+
+    :param http2: Negotiate HTTP/2, or stick to HTTP/1.1.
+    :type http2: bool
+    :param max_connections: Connections kept open at once.
+    :type max_connections: int
+    :param timeout: Seconds waited for Yahoo to answer.
+    :type timeout: float
+    """
+
+    def __init__(self, base_url=HTTPS_BASE_URL, http2=True,
+                 max_connections=10, timeout=30.0):
+        super(HttpxTransport, self).__init__(base_url)
+        try:
+            import httpx
+        except ImportError:
+            raise YahooFantasySportsError(
+                "HttpxTransport requires httpx, install it with "
+                "'pip install yahoo-fantasy-sports[http2]'")
+
+        self.http2 = http2
+        self._client = httpx.Client(
+            http2=http2, timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections))
+
+    def send(self, method, uri, params, headers, data):
+        response = self._client.request(method, uri, params=params,
+                                        content=data, headers=headers)
+        # the rest of the library handles requests responses and errors
+        return _response(response.status_code, response.content,
+                         str(response.url), response.headers)
+
+    def close(self):
+        self._client.close()
+
+
+class MemoryTransport(Transport):
+    """
+    Answers requests from a function in the same process, for tests and
+    benchmarks. Requests are signed as by any other backend, the headers of
+    the last ``history`` requests being kept in ``sent``.
+
+    >>> fake = FakeYahoo(sample_fixtures())
+    >>> with MemoryTransport(fake.handle):
+    ...     games = GamesFactory(fake.oauth())('nfl', 'nba')
+
+    :param handler: Called with the URI, the method and the body of every
+        request, returns its status code and JSON body.
+    :type handler: callable
+    :param history: Number of requests kept in ``sent``.
+    :type history: int
+    """
+
+    def __init__(self, handler, base_url=None, history=100):
+        super(MemoryTransport, self).__init__(base_url)
+        self.handler = handler
+        self.history = history
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, method, uri, params, headers, data):
+        with self._lock:
+            self.sent.append((method, uri, headers))
+            del self.sent[:-self.history]
+        status, body = self.handler(uri, method, data)
+        return _response(status, json.dumps(body).encode('utf-8'), uri,
+                         {'Content-Type': 'application/json'})
@@ -1,7 +1,12 @@
-import json
+import six
+import threading
 
-from requests import HTTPError
-from xml.dom import minidom
+from timeit import default_timer
+
+from . import instrumentation
+
+# json, requests and xml.dom.minidom are imported where they are used, so
+# that importing the package stays cheap
 
 
 base_url = 'http://fantasysports.yahooapis.com/fantasy/v2'
@@ -10,6 +15,7 @@ base_url = 'http://fantasysports.yahooapis.com/fantasy/v2'
 def pretty_json(data):
     """Return a pretty formatted json
     """
+    import json
     data = json.loads(data.decode('utf-8'))
     return json.dumps(data, indent=4, sort_keys=True)
 
@@ -17,6 +23,7 @@ def pretty_json(data):
 def pretty_xml(data):
     """Return a pretty formated xml
     """
+    from xml.dom import minidom
     parsed_string = minidom.parseString(data.decode('utf-8'))
     return parsed_string.toprettyxml(indent='\t', encoding='utf-8')
 
@@ -32,31 +39,342 @@ def _check_token_validity(oauth):
         oauth.refresh_access_token()
 
 
-def yfs_request(oauth, uri):
+# when set, every request goes through this transport instead of the OAuth
+# session, see ``set_transport``
+_transport = None
+
+# when set, responses are looked up in and stored to this cache, see
+# ``set_cache``
+_cache = None
+
+# statuses worth sending the same request again for
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+# when set, every request sent to Yahoo first waits for this limiter, see
+# ``set_rate_limiter``
+_rate_limiter = None
+
+# when set, requests to failing endpoints are not sent, see
+# ``set_circuit_breaker``
+_breaker = None
+
+# cache keys of the stale responses being revalidated in the background
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+
+def set_transport(transport):
     """
-    Sends an request with the given URI and returns the response.
+    Routes every ``yfs_request`` through ``transport``, an object whose
+    ``get(oauth, uri)`` method returns a ``requests.Response``, and writes
+    through its ``put(oauth, uri, data)`` method if any. Passing ``None``
+    restores sending requests with the OAuth session. See
+    ``yahoo_fantasy_sports.transport`` for backends sending requests with
+    other HTTP clients.
+
+    :returns: The previous transport.
+    """
+    global _transport
+    previous, _transport = _transport, transport
+    return previous
+
+
+def set_cache(cache):
+    """
+    Makes every ``yfs_request`` look responses up in ``cache`` before
+    sending the request, and store successful responses in it. A cache
+    provides ``key(oauth, uri)``, returning ``None`` for responses it must
+    not hold, ``get(key)`` returning the cached body or ``None``, and
+    ``set(key, content)``. Passing ``None`` disables caching.
+
+    Caches may also provide ``get_stale(key, max_age=None)``, returning a
+    body that has expired but may still be served. Such a body is returned
+    right away marked with a ``'stale': True`` entry, while a single request
+    per key refreshes the cache in the background unless the circuit
+    breaker refuses it. When the breaker refuses a request that was not
+    served from the cache, a body that expired at any time is served
+    instead.
+
+    :returns: The previous cache.
+    """
+    global _cache
+    previous, _cache = _cache, cache
+    return previous
+
+
+def set_rate_limiter(limiter):
+    """
+    Makes every request sent to Yahoo first call ``limiter.acquire()``.
+    Cached and replayed responses are not limited. Passing ``None`` removes
+    the limit.
+
+    :returns: The previous limiter.
+    """
+    global _rate_limiter
+    previous, _rate_limiter = _rate_limiter, limiter
+    return previous
+
+
+def set_circuit_breaker(breaker):
+    """
+    Makes every ``yfs_request`` sent to Yahoo first call
+    ``breaker.acquire(uri)``, which raises to refuse the request, then
+    ``breaker.record(uri, elapsed, error)`` with its outcome. Passing
+    ``None`` removes the breaker.
+
+    :returns: The previous breaker.
+    """
+    global _breaker
+    previous, _breaker = _breaker, breaker
+    return previous
+
+
+def send_request(oauth, uri, method='GET', data=None):
+    """
+    Sends a request for ``uri`` with the OAuth session, renewing the access
+    token first if needed. ``data`` is sent as an XML body.
+
+    :rtype: requests.Response
+    """
+    if not oauth.oauth.base_url:
+        oauth.oauth.base_url = base_url
+
+    _check_token_validity(oauth)
+    if _rate_limiter is not None:
+        _rate_limiter.acquire()
+
+    if method == 'GET':
+        return oauth.session.get(uri, params={'format': 'json'})
+    return oauth.session.request(
+        method, uri, data=data, params={'format': 'json'},
+        headers={'Content-Type': 'application/xml'})
+
+
+def _get(oauth, uri):
+    if _transport is not None:
+        return _transport.get(oauth, uri)
+    return send_request(oauth, uri)
+
+
+def _put(oauth, uri, data):
+    if _transport is not None:
+        put = getattr(_transport, 'put', None)
+        if put is None:
+            from .error import YahooFantasySportsError
+            raise YahooFantasySportsError(
+                "{0} does not support writes".format(_transport))
+        return put(oauth, uri, data)
+    return send_request(oauth, uri, 'PUT', data)
+
+
+def yfs_put(oauth, uri, data):
+    """
+    Sends ``data``, an XML document, to ``uri`` with a PUT request.
 
     :param oauth: OAuth1 instance connected to the Yahoo servers.
     :type oauth: yahoo_oauth.Oauth1
     :param uri: Requested URI.
     :type uri: str
+    :param data: XML body.
+    :type data: bytes
     :returns: Response from request
+    :rtype: requests.Response
+    :raises HTTPError: If response contains a non-200 code
+    """
+    event = instrumentation.RequestEvent(uri, 'PUT')
+    if instrumentation.active():
+        instrumentation.pre_request(event)
+    try:
+        start = default_timer()
+        response = _put(oauth, uri, data)
+        event.network_time = default_timer() - start
+        event.status = response.status_code
+        event.bytes = len(response.content)
+        _raise_for_status(response)
+    except Exception as e:
+        event.error = e
+        raise
+    finally:
+        if instrumentation.active():
+            instrumentation.post_request(event)
+
+    return response
+
+
+def yfs_request(oauth, uri):
+    """
+    Sends an request with the given URI and returns the response.
+
+    :param oauth: OAuth1 instance connected to the Yahoo servers. May be
+        ``None`` when replaying recorded responses.
+    :type oauth: yahoo_oauth.Oauth1
+    :param uri: Requested URI.
+    :type uri: str
+    :returns: Response from request, with a ``'stale': True`` entry if it
+        was served from the cache past its expiry, see ``set_cache``
     :rtype: HTTP response as a JSON object
     :raises HTTPError: If response contains a non-200 code
+    :raises CircuitOpen: If the circuit breaker refused the request and no
+        cached response could be served instead
     """
-    if not oauth.oauth.base_url:
-        oauth.oauth.base_url = base_url
+    if not instrumentation.active():
+        if _cache is None and _breaker is None:
+            response = _get(oauth, uri)
+            _raise_for_status(response)
+            return response.json()
+        return _request(oauth, uri, instrumentation.RequestEvent(uri))
+
+    event = instrumentation.RequestEvent(uri)
+    instrumentation.pre_request(event)
+    try:
+        return _request(oauth, uri, event)
+    except Exception as e:
+        event.error = e
+        raise
+    finally:
+        instrumentation.post_request(event)
 
-    _check_token_validity(oauth)
-    response = oauth.session.get(uri, params={'format': 'json'})
+
+def _request(oauth, uri, event):
+    cache = _cache
+    breaker = _breaker
+    key = cache.key(oauth, uri) if cache is not None else None
+    get_stale = None
+
+    if key is not None:
+        content = cache.get(key)
+        if content is not None:
+            event.cache = 'hit'
+            event.status = 200
+            event.bytes = len(content)
+            return _decode(content, event)
+
+        get_stale = getattr(cache, 'get_stale', None)
+        content = get_stale(key) if get_stale is not None else None
+        if content is not None:
+            # no point in revalidating while the breaker refuses requests
+            if breaker is None or not breaker.refuses(uri):
+                _revalidate(oauth, uri, cache, key)
+            return _stale(content, event)
+        event.cache = 'miss'
 
+    try:
+        response = _fetch(oauth, uri, event)
+    except Exception as e:
+        if get_stale is None:
+            raise
+        from .breaker import CircuitOpen
+        if not isinstance(e, CircuitOpen):
+            raise
+        # while the circuit is open, an expired response of any age beats
+        # no response at all
+        content = get_stale(key, float('inf'))
+        if content is None:
+            raise
+        return _stale(content, event)
+
+    if key is not None:
+        cache.set(key, response.content)
+    return _decode(response.content, event)
+
+
+def _stale(content, event):
+    event.cache = 'stale'
+    event.status = 200
+    event.bytes = len(content)
+    data = _decode(content, event)
+    data['stale'] = True
+    return data
+
+
+def _fetch(oauth, uri, event):
+    breaker = _breaker
+    if breaker is not None:
+        breaker.acquire(uri)
+
+    start = default_timer()
+    try:
+        response = _get(oauth, uri)
+        event.network_time = default_timer() - start
+        event.status = response.status_code
+        event.bytes = len(response.content)
+        _raise_for_status(response)
+    except Exception as e:
+        if breaker is not None:
+            breaker.record(uri, default_timer() - start, e)
+        raise
+
+    if breaker is not None:
+        breaker.record(uri, event.network_time)
+    return response
+
+
+def _revalidate(oauth, uri, cache, key):
+    with _revalidating_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    thread = threading.Thread(target=_background_revalidate,
+                              args=(oauth, uri, cache, key))
+    thread.daemon = True
+    thread.start()
+
+
+def _background_revalidate(oauth, uri, cache, key):
+    event = instrumentation.RequestEvent(uri)
+    event.cache = 'revalidate'
+    instrumentation.pre_request(event)
+    try:
+        response = _fetch(oauth, uri, event)
+        cache.set(key, response.content)
+    except Exception as e:
+        event.error = e
+        import logging
+        logging.getLogger(__name__).warning(
+            "Failed to revalidate %s", uri, exc_info=True)
+    finally:
+        instrumentation.post_request(event)
+        with _revalidating_lock:
+            _revalidating.discard(key)
+
+
+def _decode(content, event):
+    import json
+    start = default_timer()
+    data = json.loads(content.decode('utf-8'))
+    event.decode_time = default_timer() - start
+    return data
+
+
+def _raise_for_status(response):
+    from requests import HTTPError
     try:
         response.raise_for_status()
     except HTTPError as h:
-        msg = h.message + '\n' + response.json()['error']['description']
-        raise HTTPError(msg)
+        try:
+            description = response.json()['error']['description']
+        except (ValueError, KeyError, TypeError):
+            # errors to writes may come back as XML
+            description = response.text
+        msg = str(h) + '\n' + description
+        raise HTTPError(msg, response=response)
+
+
+def is_retryable(error):
+    """
+    Returns ``True`` if the request that raised ``error`` may succeed when
+    sent again: server errors, throttling and connection failures.
+
+    :rtype: bool
+    """
+    from requests import ConnectionError, HTTPError, Timeout
 
-    return response.json()
+    if isinstance(error, (ConnectionError, Timeout)):
+        return True
+    if isinstance(error, HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUSES
+    return False
 
 
 def _format_resources_key(keys):
@@ -74,7 +392,7 @@ def build_uri(resource, parameters=None, resource_key=None, sub=None):
         uri += "/{0}".format(resource_key)
 
     if parameters:
-        for key, val in parameters.iteritems():
+        for key, val in six.iteritems(parameters):
             uri += ";{0}={1}".format(key, val)
 
     if sub:
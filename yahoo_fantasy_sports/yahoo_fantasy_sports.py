@@ -1,13 +1,9 @@
 from __future__ import absolute_import, division, print_function
 
-import json
-
 from . import GamesFactory
 from . import YahooFantasySportsError
 from .utils import base_url, build_uri, yfs_request
 
-from requests import HTTPError
-
 
 class YahooFantasySports(object):
     """
@@ -32,6 +28,7 @@ class YahooFantasySports(object):
         return "<{0}> <{1}>".format(base_url, self.fmt)
 
     def test_uri(self, uri):
+        import json
         print(json.dumps(yfs_request(self.oauth, base_url + uri),
               indent=4))
 